@@ -3,9 +3,18 @@ DIME Philippines Dashboard Data Scraper Module
 
 This module provides tools for scraping project data from the DIME
 (Digital Information for Monitoring and Evaluation) Philippines Dashboard.
-"""
 
-from .dime_scraper import DIMEScraper
+Importing the package (or one of its analysis modules) does not import
+requests or configure logging; DIMEScraper is loaded on first use, and the
+command-line entry point (`python -m scraper`) sets up logging when it runs.
+"""
 
 __all__ = ['DIMEScraper']
 __version__ = '1.0.0'
+
+
+def __getattr__(name: str):
+    if name == 'DIMEScraper':
+        from .dime_scraper import DIMEScraper
+        return DIMEScraper
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,164 @@
+"""
+Adaptive request control for the DIME scraper
+Backs off exponentially (with jitter, honouring Retry-After) on failures and
+adjusts concurrency, request rate and timeout from observed latency and
+429/5xx responses, so a scrape runs as fast as the server allows.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional, Iterator
+
+from .rate_limit import TokenBucket
+
+# Status codes that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is absent or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 60.0,
+                  retry_after: Optional[float] = None) -> float:
+    """
+    Delay before the next retry: exponential backoff with full jitter
+
+    Args:
+        attempt: Number of attempts made so far (1 for the first failure)
+        base: Base delay in seconds
+        cap: Upper bound for the exponential part
+        retry_after: Server-requested delay, which is never undercut
+
+    Returns:
+        Seconds to wait
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class AdaptiveController:
+    """AIMD controller for concurrency, request rate and timeout"""
+
+    def __init__(self, rate_limiter: TokenBucket,
+                 max_concurrency: int,
+                 target_latency: float = 2.0,
+                 min_timeout: float = 5.0,
+                 max_timeout: float = 30.0,
+                 page_sizes: tuple = (1000, 500, 250, 100)):
+        """
+        Initialize the controller
+
+        Args:
+            rate_limiter: Token bucket whose rate is adjusted; its initial
+                rate is treated as the ceiling
+            max_concurrency: Upper bound for parallel requests
+            target_latency: Response time (seconds) above which load is reduced
+            min_timeout: Lower bound for the request timeout
+            max_timeout: Upper bound for the request timeout
+            page_sizes: perPage values to probe, largest first
+        """
+        self.rate_limiter = rate_limiter
+        self.max_rate = rate_limiter.rate
+        self.min_rate = min(self.max_rate, 0.2)
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency_limit = max(1, self.max_concurrency // 2)
+        self.target_latency = target_latency
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.page_sizes = tuple(sorted(page_sizes, reverse=True))
+        self.page_size: Optional[int] = None
+        self.latency_ewma: Optional[float] = None
+        self.throttled = 0
+        self.errors = 0
+        self._successes = 0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def timeout(self) -> float:
+        """Request timeout derived from the smoothed latency"""
+        if self.latency_ewma is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.latency_ewma * 4))
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the currently allowed concurrent request slots"""
+        with self._cond:
+            while self._in_flight >= self.concurrency_limit:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record_success(self, latency: float):
+        """Additive increase while the server is fast, gentle decrease when slow"""
+        with self._cond:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+
+            if self.latency_ewma > self.target_latency:
+                self._successes = 0
+                self.concurrency_limit = max(1, self.concurrency_limit - 1)
+                return
+
+            self._successes += 1
+            if self._successes >= self.concurrency_limit:
+                self._successes = 0
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1)
+                self.rate_limiter.set_rate(min(self.max_rate, self.rate_limiter.rate * 1.25))
+            self._cond.notify_all()
+
+    def record_failure(self, status_code: Optional[int]):
+        """Multiplicative decrease after a throttled or failed request"""
+        with self._cond:
+            self._successes = 0
+            if status_code in THROTTLE_STATUS_CODES:
+                self.throttled += 1
+                self.rate_limiter.set_rate(max(self.min_rate, self.rate_limiter.rate / 2))
+            else:
+                self.errors += 1
+            self.concurrency_limit = max(1, self.concurrency_limit // 2)
+
+    def page_size_honoured(self, requested: int, data: dict) -> bool:
+        """
+        Whether a probe response honoured the requested perPage
+
+        Args:
+            requested: perPage value that was sent
+            data: JSON response for page 1
+        """
+        projects = data.get('data', [])
+        total = (data.get('meta') or {}).get('total')
+        # Servers that cap perPage return fewer records than asked for
+        return len(projects) >= requested or (total is not None and len(projects) >= total)
@@ -0,0 +1,276 @@
+"""
+Vectorized aggregation engine for scraped DIME project data
+Converts records once into column arrays (categorical codes for dimensions
+such as status, region, province and program; float arrays for cost and
+utilizedAmount) and computes grouped counts, sums, means and utilization
+ratios over any combination of dimensions. Uses NumPy when it is installed
+and falls back to plain array loops otherwise.
+"""
+
+import math
+from array import array
+from typing import List, Dict, Optional, Iterable, Sequence, Tuple, Callable, Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+def _entity_names(field: str, key: str) -> Callable[[Dict], List[Any]]:
+    return lambda project: [entity.get(key, 'Unknown') for entity in project.get(field) or []]
+
+
+# Single-valued dimensions: name -> value extractor
+DIMENSIONS: Dict[str, Callable[[Dict], Any]] = {
+    'status': lambda p: p.get('status', 'Unknown'),
+    'region': lambda p: p.get('region', 'Unknown'),
+    'regionCode': lambda p: p.get('regionCode'),
+    'province': lambda p: p.get('province'),
+    'provinceCode': lambda p: p.get('provinceCode'),
+    'city': lambda p: p.get('city'),
+    'cityCode': lambda p: p.get('cityCode'),
+    'projectType': lambda p: p.get('projectType'),
+    'program': lambda p: (p.get('program') or {}).get('programName'),
+}
+
+# Multi-valued dimensions (a project can have several): name -> values extractor
+MULTI_DIMENSIONS: Dict[str, Callable[[Dict], List[Any]]] = {
+    'implementingOffice': _entity_names('implementingOffices', 'name'),
+    'fundSource': _entity_names('sourceOfFunds', 'name'),
+    'contractor': _entity_names('contractors', 'name'),
+}
+
+MEASURES = ('cost', 'utilizedAmount')
+
+# Project fields needed to build a table with all dimensions and measures
+SOURCE_FIELDS = ('status', 'region', 'regionCode', 'province', 'provinceCode', 'city',
+                 'cityCode', 'projectType', 'program', 'implementingOffices',
+                 'sourceOfFunds', 'contractors') + MEASURES
+
+
+class _Dictionary:
+    """Maps category values to dense integer codes"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ProjectTable:
+    """Column-oriented table of projects for grouped aggregation"""
+
+    def __init__(self, dimensions: Sequence[str] = tuple(DIMENSIONS),
+                 multi_dimensions: Sequence[str] = tuple(MULTI_DIMENSIONS),
+                 measures: Sequence[str] = MEASURES):
+        """
+        Initialize an empty table
+
+        Args:
+            dimensions: Single-valued dimensions to encode
+            multi_dimensions: Multi-valued dimensions to encode
+            measures: Numeric fields to store as float columns
+        """
+        self.num_rows = 0
+        self.dimensions = list(dimensions)
+        self.multi_dimensions = list(multi_dimensions)
+        self.measures = list(measures)
+        self._dicts = {d: _Dictionary() for d in self.dimensions + self.multi_dimensions}
+        self._codes = {d: array('i') for d in self.dimensions}
+        self._offsets = {d: array('q', [0]) for d in self.multi_dimensions}
+        self._multi_codes = {d: array('i') for d in self.multi_dimensions}
+        self._values = {m: array('d') for m in self.measures}
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Dict], **kwargs) -> 'ProjectTable':
+        """Build a table from project records (consumed as a stream)"""
+        table = cls(**kwargs)
+        table.extend(projects)
+        return table
+
+    @classmethod
+    def from_files(cls, files: Iterable, workers: Optional[int] = None, **kwargs) -> 'ProjectTable':
+        """Build a table from part files using the parallel loader"""
+        from .loader import iter_projects
+
+        return cls.from_projects(iter_projects(files, fields=SOURCE_FIELDS, workers=workers), **kwargs)
+
+    def append(self, project: Dict):
+        """Add one project record"""
+        for dim in self.dimensions:
+            self._codes[dim].append(self._dicts[dim].code(DIMENSIONS[dim](project)))
+        for dim in self.multi_dimensions:
+            codes = self._multi_codes[dim]
+            dictionary = self._dicts[dim]
+            for value in MULTI_DIMENSIONS[dim](project):
+                codes.append(dictionary.code(value))
+            self._offsets[dim].append(len(codes))
+        for measure in self.measures:
+            value = project.get(measure)
+            self._values[measure].append(math.nan if value is None else float(value))
+        self.num_rows += 1
+
+    def extend(self, projects: Iterable[Dict]):
+        """Add project records"""
+        for project in projects:
+            self.append(project)
+
+    def categories(self, dim: str) -> List[Any]:
+        """Distinct values of a dimension, indexed by code"""
+        return list(self._dicts[dim].values)
+
+    def column(self, measure: str) -> array:
+        """Float column for a measure (NaN for nulls)"""
+        return self._values[measure]
+
+    def total(self, measure: str) -> float:
+        """Sum of a measure, treating nulls as 0"""
+        return math.fsum(v for v in self._values[measure] if v == v)
+
+    def _exploded(self, dims: Sequence[str]) -> Optional[str]:
+        """The multi-valued dimension in dims, if any (at most one allowed)"""
+        multi = [d for d in dims if d in self._multi_codes]
+        if len(multi) > 1:
+            raise ValueError("group_by supports at most one multi-valued dimension")
+        for dim in dims:
+            if dim not in self._codes and dim not in self._multi_codes:
+                raise KeyError(f"Unknown dimension '{dim}'")
+        return multi[0] if multi else None
+
+    def group_by(self, dims: Sequence[str], sort_by: str = 'count',
+                 top: Optional[int] = None) -> List[Dict]:
+        """
+        Grouped counts, sums, means and utilization ratios
+
+        A multi-valued dimension (implementingOffice, fundSource, contractor)
+        is exploded, so a project with three funding sources counts once in
+        each of them; at most one such dimension can be used per query.
+
+        Args:
+            dims: Dimensions to group by (any combination; [] for a grand total)
+            sort_by: Result key to sort by, descending ('count', 'cost', ...)
+            top: Only return the first N groups
+
+        Returns:
+            One dict per group with the dimension values, `count`, and for each
+            measure its sum, `<measure>_mean` (over non-null values), plus
+            `utilization` = utilizedAmount / cost when both are measures (None
+            when the cost is zero or no project reports utilizedAmount)
+        """
+        dims = list(dims)
+        exploded = self._exploded(dims)
+        radices = [len(self._dicts[dim].values) for dim in dims]
+
+        if np is not None and math.prod(radices) < 2 ** 62:
+            groups = self._group_numpy(dims, exploded, radices)
+        else:
+            groups = self._group_python(dims, exploded)
+
+        for group in groups:
+            valid = {measure: group.pop(f"_{measure}_n") for measure in self.measures}
+            for measure in self.measures:
+                group[f"{measure}_mean"] = group[measure] / valid[measure] if valid[measure] else None
+            if 'cost' in group and 'utilizedAmount' in group:
+                # A group where no project reports utilizedAmount has no utilization, not 0%
+                reported = group['cost'] and valid['utilizedAmount']
+                group['utilization'] = group['utilizedAmount'] / group['cost'] if reported else None
+
+        groups.sort(key=lambda g: (g[sort_by] is not None, g[sort_by] or 0), reverse=True)
+        return groups[:top] if top is not None else groups
+
+    def _group_numpy(self, dims: List[str], exploded: Optional[str], radices: List[int]) -> List[Dict]:
+        rows = None
+        if exploded is not None:
+            offsets = np.frombuffer(self._offsets[exploded], dtype=np.int64)
+            rows = np.repeat(np.arange(self.num_rows), np.diff(offsets))
+        n = self.num_rows if rows is None else len(rows)
+
+        keys = np.zeros(n, dtype=np.int64)
+        for dim, radix in zip(dims, radices):
+            if dim == exploded:
+                codes = np.frombuffer(self._multi_codes[dim], dtype=np.int32)
+            else:
+                codes = np.frombuffer(self._codes[dim], dtype=np.int32)
+                if rows is not None:
+                    codes = codes[rows]
+            keys = keys * radix + codes
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique))
+
+        sums, valid = {}, {}
+        for measure in self.measures:
+            values = np.frombuffer(self._values[measure], dtype=np.float64)
+            if rows is not None:
+                values = values[rows]
+            present = ~np.isnan(values)
+            sums[measure] = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=len(unique))
+            valid[measure] = np.bincount(inverse, weights=present, minlength=len(unique))
+
+        # Decode combined keys back to per-dimension codes (mixed radix)
+        decoded = []
+        remainder = unique.copy()
+        for radix in reversed(radices):
+            decoded.append(remainder % radix)
+            remainder //= radix
+        decoded.reverse()
+
+        groups = []
+        for g in range(len(unique)):
+            group = {dim: self._dicts[dim].values[int(decoded[i][g])] for i, dim in enumerate(dims)}
+            group['count'] = int(counts[g])
+            for measure in self.measures:
+                group[measure] = float(sums[measure][g])
+                group[f"_{measure}_n"] = int(valid[measure][g])
+            groups.append(group)
+        return groups
+
+    def _group_python(self, dims: List[str], exploded: Optional[str]) -> List[Dict]:
+        accumulators: Dict[Tuple, List[float]] = {}
+        width = 1 + 2 * len(self.measures)
+        measure_columns = [self._values[m] for m in self.measures]
+
+        def accumulate(key, row):
+            acc = accumulators.get(key)
+            if acc is None:
+                acc = accumulators[key] = [0.0] * width
+            acc[0] += 1
+            for j, values in enumerate(measure_columns):
+                value = values[row]
+                if value == value:
+                    acc[1 + 2 * j] += value
+                    acc[2 + 2 * j] += 1
+
+        single = [(i, self._codes[dim]) for i, dim in enumerate(dims) if dim != exploded]
+        if exploded is None:
+            for row in range(self.num_rows):
+                accumulate(tuple(codes[row] for _, codes in single), row)
+        else:
+            position = dims.index(exploded)
+            offsets = self._offsets[exploded]
+            multi_codes = self._multi_codes[exploded]
+            for row in range(self.num_rows):
+                key = [codes[row] for _, codes in single]
+                for code in multi_codes[offsets[row]:offsets[row + 1]]:
+                    accumulate(tuple(key[:position] + [code] + key[position:]), row)
+
+        groups = []
+        # Same tie order as the NumPy path: ascending codes, i.e. first-seen order
+        for key, acc in sorted(accumulators.items()):
+            group = {dim: self._dicts[dim].values[code] for dim, code in zip(dims, key)}
+            group['count'] = int(acc[0])
+            for j, measure in enumerate(self.measures):
+                group[measure] = acc[1 + 2 * j]
+                group[f"_{measure}_n"] = int(acc[2 + 2 * j])
+            groups.append(group)
+        return groups
+
+    def value_counts(self, dim: str, top: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """(value, count) pairs for one dimension, most common first"""
+        return [(group[dim], group['count']) for group in self.group_by([dim], top=top)]
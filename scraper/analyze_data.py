@@ -3,13 +3,33 @@ Utility script to analyze scraped JSON files
 Shows statistics about the scraped data
 """
 
-import json
-import os
+import sys
 from pathlib import Path
-from collections import Counter
 
-def analyze_scraped_data(data_dir="scraped_data"):
-    """Analyze all JSON files in the scraped data directory"""
+if __package__ in (None, ''):
+    # Run as a script: make the scraper package importable
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scraper.aggregate import ProjectTable
+from scraper.loader import find_part_files, iter_parts
+from scraper.partio import iter_part_records, read_part_metadata
+
+# Fields the analysis reads; everything else is dropped in the worker processes
+ANALYZED_FIELDS = ('status', 'region', 'implementingOffices', 'sourceOfFunds', 'cost', 'utilizedAmount')
+
+def analyze_scraped_data(data_dir="scraped_data", workers=None, stream=False):
+    """
+    Analyze all JSON part files in the scraped data directory
+    
+    Args:
+        data_dir: Directory with the scraped part files
+        workers: Number of parser processes
+        stream: Read the files one record at a time in this process
+            (constant memory with NDJSON part files) instead of in parallel
+    
+    Returns:
+        Summary statistics as data (None if there is nothing to analyze)
+    """
     
     data_path = Path(data_dir)
     
@@ -18,7 +38,7 @@ def analyze_scraped_data(data_dir="scraped_data"):
         print(f"Run the scraper first: python dime_scraper.py")
         return
     
-    json_files = list(data_path.glob("**/*.json"))
+    json_files = find_part_files(data_dir)
     
     if not json_files:
         print(f"❌ No JSON files found in '{data_dir}'")
@@ -28,57 +48,36 @@ def analyze_scraped_data(data_dir="scraped_data"):
     print(f"📊 Analysis of Scraped Data in '{data_dir}'")
     print("="*60)
     
-    total_projects = 0
-    statuses = Counter()
-    regions = Counter()
-    implementing_offices = Counter()
-    source_of_funds = Counter()
-    total_cost = 0
+    table = ProjectTable(dimensions=['status', 'region'],
+                         multi_dimensions=['implementingOffice', 'fundSource'])
     
-    for json_file in sorted(json_files):
-        print(f"\n📄 Processing: {json_file.name}")
+    parts = _stream_parts(json_files) if stream else \
+        iter_parts(json_files, fields=ANALYZED_FIELDS, workers=workers, compact=True)
+    
+    for part in parts:
+        print(f"\n📄 Processing: {part['path'].name}")
+        
+        if part['error']:
+            print(f"   ⚠️  Error processing file: {part['error']}")
+            continue
+        
+        metadata = part['metadata']
+        rows_before = table.num_rows
         
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            projects = data.get('projects', [])
-            metadata = data.get('metadata', {})
-            
-            print(f"   Projects in file: {len(projects)}")
-            
-            if metadata:
-                print(f"   File {metadata.get('file_number', '?')} of {metadata.get('total_files', '?')}")
-            
-            for project in projects:
-                total_projects += 1
-                
-                # Count statuses
-                status = project.get('status', 'Unknown')
-                statuses[status] += 1
-                
-                # Count regions
-                region = project.get('region', 'Unknown')
-                regions[region] += 1
-                
-                # Count implementing offices
-                offices = project.get('implementingOffices', [])
-                for office in offices:
-                    office_name = office.get('name', 'Unknown')
-                    implementing_offices[office_name] += 1
-                
-                # Count source of funds
-                funds = project.get('sourceOfFunds', [])
-                for fund in funds:
-                    fund_name = fund.get('name', 'Unknown')
-                    source_of_funds[fund_name] += 1
-                
-                # Sum costs
-                cost = project.get('cost', 0) or 0
-                total_cost += cost
-                
-        except Exception as e:
+            table.extend(part['projects'])
+        except ValueError as e:
             print(f"   ⚠️  Error processing file: {e}")
+            continue
+        
+        print(f"   Projects in file: {table.num_rows - rows_before}")
+        
+        if metadata:
+            print(f"   File {metadata.get('file_number', '?')} of {metadata.get('total_files', '?')}")
+    
+    summary = summarize(table)
+    summary['total_files'] = len(json_files)
+    total_projects = summary['total_projects']
     
     # Print summary
     print("\n" + "="*60)
@@ -87,38 +86,74 @@ def analyze_scraped_data(data_dir="scraped_data"):
     
     print(f"\n📁 Total JSON files: {len(json_files)}")
     print(f"📊 Total projects: {total_projects:,}")
-    print(f"💰 Total cost: ₱{total_cost:,.2f}")
+    print(f"💰 Total cost: ₱{summary['total_cost']:,.2f}")
     
     print(f"\n📍 By Status:")
-    for status, count in statuses.most_common():
+    for status, count in summary['by_status']:
         percentage = (count / total_projects * 100) if total_projects > 0 else 0
         print(f"   {status}: {count:,} ({percentage:.1f}%)")
     
     print(f"\n🗺️  Top 10 Regions:")
-    for region, count in regions.most_common(10):
+    for region, count in summary['by_region'][:10]:
         percentage = (count / total_projects * 100) if total_projects > 0 else 0
         print(f"   {region}: {count:,} ({percentage:.1f}%)")
     
     print(f"\n🏢 Top 10 Implementing Offices:")
-    for office, count in implementing_offices.most_common(10):
+    for office, count in summary['by_implementing_office'][:10]:
         print(f"   {office}: {count:,}")
     
     print(f"\n💵 Top 5 Sources of Funds:")
-    for fund, count in source_of_funds.most_common(5):
+    for fund, count in summary['by_fund_source'][:5]:
         print(f"   {fund}: {count:,}")
     
     print("\n" + "="*60)
+    
+    return summary
 
-def main():
-    import sys
+def _stream_parts(json_files):
+    """
+    Like iter_parts, but `projects` is a lazy iterator over the file's
+    records, decoded one at a time in this process
+    """
+    for path in json_files:
+        try:
+            metadata = read_part_metadata(path)
+        except Exception as e:
+            yield {'path': path, 'metadata': {}, 'projects': [], 'error': str(e)}
+            continue
+        yield {'path': path, 'metadata': metadata,
+               'projects': iter_part_records(path, fields=ANALYZED_FIELDS), 'error': None}
+
+def summarize(table):
+    """
+    Compute the summary statistics for a ProjectTable
     
+    Args:
+        table: ProjectTable with status/region and implementingOffice/fundSource dimensions
+        
+    Returns:
+        Dict with totals and (value, count) lists, most common first
+    """
+    return {
+        'total_projects': table.num_rows,
+        'total_cost': table.total('cost'),
+        'total_utilized': table.total('utilizedAmount'),
+        'by_status': table.value_counts('status'),
+        'by_region': table.value_counts('region'),
+        'by_implementing_office': table.value_counts('implementingOffice'),
+        'by_fund_source': table.value_counts('fundSource'),
+        'cost_by_region': table.group_by(['region'], sort_by='cost'),
+    }
+
+def main():
     # Check if custom directory provided
-    if len(sys.argv) > 1:
-        data_dir = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if arg != '--stream']
+    if args:
+        data_dir = args[0]
     else:
         data_dir = "scraped_data"
     
-    analyze_scraped_data(data_dir)
+    analyze_scraped_data(data_dir, stream='--stream' in sys.argv[1:])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,297 @@
+"""
+Benchmark harness for the DIME scraper
+Starts a local MockDIMEServer serving synthetic projects or records replayed
+from scraped_data/, then times scrape_all_projects, save_projects_to_json
+and analyze_scraped_data against it and reports pages/sec, records/sec,
+peak memory and wall time as JSON, so runs can be compared across releases.
+
+Use: python -m scraper.benchmark --records 5000 --latency 0.05 --output bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Any
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from .dime_scraper import DIMEScraper
+from .loader import find_part_files, iter_projects
+from .mock_server import MockDIMEServer
+
+BENCHMARK_VERSION = 1
+
+_REGIONS = ['NCR', 'Region I', 'Region III', 'Region IV-A', 'Region VII', 'Region XI']
+_STATUSES = ['Completed', 'On-Going', 'Not Yet Started', 'Terminated']
+_OFFICES = [f"DPWH District Engineering Office {n}" for n in range(1, 41)]
+_FUNDS = ['GAA 2023', 'GAA 2024', 'GAA 2025', 'Foreign Assisted']
+
+
+def synthetic_projects(count: int, seed: int = 0) -> List[Dict]:
+    """
+    Generate project records with every field of the live API
+
+    Args:
+        count: Number of records
+        seed: Random seed (the same seed gives the same records)
+    """
+    rng = random.Random(seed)
+    projects = []
+    for i in range(1, count + 1):
+        office = rng.randrange(len(_OFFICES))
+        cost = round(rng.lognormvariate(16, 1.5), 2)
+        started = f"20{rng.randint(18, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T16:00:00.000Z"
+        projects.append({
+            'id': i,
+            'latitude': round(rng.uniform(5, 19), 6),
+            'longitude': round(rng.uniform(117, 127), 6),
+            'status': rng.choice(_STATUSES),
+            'latestProgress': round(rng.uniform(0, 100), 2),
+            'implementingOffices': [{'id': office, 'name': _OFFICES[office], 'nameAbbreviation': None}],
+            'program': {'id': i % 12, 'programName': f"Program {i % 12}", 'nameAbbreviation': None,
+                        'programDescription': None},
+            'contractors': [{'id': 1000 + i % 700, 'name': f"Contractor {i % 700} Construction",
+                             'nameAbbreviation': None, 'logoUrl': None}],
+            'sourceOfFunds': [{'id': 9000 + i % 4, 'name': _FUNDS[i % 4], 'nameAbbreviation': None}],
+            'projectName': f"Construction of Road Section {i}",
+            'projectCode': f"{rng.randint(20, 25)}{rng.choice('ABCD')}{i:06d}",
+            'description': "Construction of road section including drainage and slope protection",
+            'projectImageUrl': None,
+            'streetAddress': None,
+            'city': f"City {i % 150}",
+            'cityCode': f"{i % 150:09d}",
+            'zipCode': None,
+            'projectType': 'Infrastructure',
+            'cost': cost,
+            'utilizedAmount': round(cost * rng.random(), 2),
+            'dateStarted': started,
+            'contractCompletionDate': None,
+            'actualContractCompletionDate': None,
+            'barangay': None,
+            'barangayCode': None,
+            'province': f"Province {i % 80}",
+            'provinceCode': f"{i % 80:09d}",
+            'country': 'Philippines',
+            'region': rng.choice(_REGIONS),
+            'regionCode': None,
+            'lastUpdatedProjectCost': started,
+            'actualDateStarted': started,
+        })
+    return projects
+
+
+def fixture_projects(data_dir: str, count: Optional[int] = None) -> List[Dict]:
+    """
+    Load scraped records to replay through the mock server
+
+    Args:
+        data_dir: Directory with scraped part files
+        count: Number of records wanted; fixtures are repeated with fresh
+            ids if there are fewer (defaults to all of them)
+
+    Raises:
+        ValueError: If the directory holds no part files
+    """
+    fixtures = list(iter_projects(find_part_files(data_dir)))
+    if not fixtures:
+        raise ValueError(f"No part files found in '{data_dir}'")
+    count = len(fixtures) if count is None else count
+
+    projects = fixtures[:count]
+    next_id = max(p.get('id') or 0 for p in fixtures) + 1
+    while len(projects) < count:
+        for fixture in fixtures[:count - len(projects)]:
+            projects.append(dict(fixture, id=next_id))
+            next_id += 1
+    return projects
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _measure(stage: str, func: Callable[[], Any], trace_memory: bool) -> Dict:
+    if trace_memory:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - started
+    result = {'stage': stage, 'seconds': round(seconds, 4), 'peak_rss_mb': peak_rss_mb()}
+    if trace_memory:
+        result['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+    result['_value'] = value
+    return result
+
+
+def _rate(count: int, seconds: float) -> Optional[float]:
+    return round(count / seconds, 1) if seconds > 0 else None
+
+
+def run_benchmark(projects: List[Dict],
+                  per_page: int = 100,
+                  concurrency: int = 4,
+                  requests_per_second: float = 1000.0,
+                  latency: float = 0.0,
+                  jitter: float = 0.0,
+                  error_rate: float = 0.0,
+                  retry_delay: float = 0.05,
+                  records_per_file: int = 1000,
+                  file_format: str = 'json',
+                  compression: Optional[str] = None,
+                  trace_memory: bool = False,
+                  seed: int = 0) -> Dict:
+    """
+    Benchmark scraping, saving and analysing `projects` through a local mock API
+
+    Args:
+        projects: Records the mock server serves
+        per_page: Page size requested by the scraper
+        concurrency: Scraper concurrency
+        requests_per_second: Scraper rate limit
+        latency: Mock server latency per request (seconds)
+        jitter: Extra random mock latency of up to this many seconds
+        error_rate: Fraction of requests the mock answers with HTTP 500
+        retry_delay: Scraper base backoff delay (seconds)
+        records_per_file: Records per part file
+        file_format: Part file encoding ('json', 'compact' or 'ndjson')
+        compression: Part file compression ('gzip', 'zstd' or None)
+        trace_memory: Also report the peak of Python allocations per stage
+            with tracemalloc (slows every stage down)
+        seed: Seed for the mock server's error and jitter injection
+
+    Returns:
+        JSON-serialisable report with the configuration, per-stage results
+        and the scraper's own metrics summary (time per phase, retries, bytes)
+    """
+    from .analyze_data import analyze_scraped_data
+
+    config = {
+        'records': len(projects), 'per_page': per_page, 'concurrency': concurrency,
+        'requests_per_second': requests_per_second, 'latency': latency, 'jitter': jitter,
+        'error_rate': error_rate, 'retry_delay': retry_delay, 'records_per_file': records_per_file,
+        'file_format': file_format, 'compression': compression, 'seed': seed,
+    }
+    results = []
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='dime_benchmark_') as output_dir, \
+                MockDIMEServer(projects, latency=latency, jitter=jitter,
+                               error_rate=error_rate, seed=seed) as server:
+            scraper = DIMEScraper(base_url=server.base_url, output_dir=output_dir,
+                                  records_per_file=records_per_file, concurrency=concurrency,
+                                  requests_per_second=requests_per_second,
+                                  file_format=file_format, compression=compression)
+
+            scrape = _measure('scrape_all_projects', lambda: scraper.scrape_all_projects(
+                per_page=per_page, retry_delay=retry_delay), trace_memory)
+            scraped = scrape.pop('_value')
+            # Pages the scraper actually fetched (retries not included)
+            pages = int(scraper.metrics.counter('pages'))
+            scrape.update({'pages': pages, 'pages_per_sec': _rate(pages, scrape['seconds']),
+                           'records': len(scraped), 'records_per_sec': _rate(len(scraped), scrape['seconds']),
+                           'requests': server.request_count, 'complete': len(scraped) == len(projects)})
+            results.append(scrape)
+
+            save = _measure('save_projects_to_json',
+                            lambda: scraper.save_projects_to_json(scraped, prefix='benchmark'), trace_memory)
+            save.pop('_value')
+            files = find_part_files(output_dir)
+            save.update({'records': len(scraped), 'records_per_sec': _rate(len(scraped), save['seconds']),
+                         'files': len(files), 'bytes': sum(f.stat().st_size for f in files)})
+            results.append(save)
+            del scraped
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                analyze = _measure('analyze_scraped_data',
+                                   lambda: analyze_scraped_data(output_dir), trace_memory)
+            summary = analyze.pop('_value') or {}
+            analyze.update({'records': summary.get('total_projects', 0),
+                            'records_per_sec': _rate(summary.get('total_projects', 0), analyze['seconds'])})
+            results.append(analyze)
+            metrics = scraper.metrics.summary()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        'benchmark_version': BENCHMARK_VERSION,
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'results': results,
+        'scraper_metrics': metrics,
+        'total_seconds': round(time.perf_counter() - started, 4),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the DIME scraper against a local mock API")
+    parser.add_argument('--records', type=int,
+                        help="Number of records to serve (default: 5000 synthetic, "
+                             "or every record with --fixtures)")
+    parser.add_argument('--fixtures', metavar='DATA_DIR',
+                        help="Replay records from these part files instead of synthetic ones")
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rps', type=float, default=1000.0, help="Scraper rate limit")
+    parser.add_argument('--latency', type=float, default=0.0, help="Mock latency per request (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random mock latency (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of HTTP 500 answers")
+    parser.add_argument('--file-format', default='json', choices=('json', 'compact', 'ndjson'))
+    parser.add_argument('--compression', choices=('gzip', 'zstd'))
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Report per-stage peak Python allocations (slower)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        projects = fixture_projects(args.fixtures, args.records)
+    else:
+        projects = synthetic_projects(args.records if args.records is not None else 5000, args.seed)
+
+    # Keep the scraper's per-page log lines out of the measurements
+    import logging
+    logging.getLogger('scraper').setLevel(logging.WARNING)
+
+    report = run_benchmark(projects, per_page=args.per_page, concurrency=args.concurrency,
+                           requests_per_second=args.rps, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, file_format=args.file_format,
+                           compression=args.compression, trace_memory=args.trace_memory,
+                           seed=args.seed)
+    report['config']['fixtures'] = args.fixtures
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+        print(f"Wrote {args.output}")
+    else:
+        print(text)
+    # A scrape that lost records makes the timings meaningless
+    return 0 if report['results'][0]['complete'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Resumable scrape checkpoints for the DIME scraper
+Keeps a small page-level journal per status filter and sort order so that an
+interrupted scrape can pick up from the first page that is not yet on disk.
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJournal:
+    """Page-level checkpoint journal for one (status, sort order) scrape"""
+
+    def __init__(self, path: Path):
+        """
+        Initialize the journal
+
+        Args:
+            path: Location of the journal file
+        """
+        self.path = Path(path)
+        self.state: Optional[Dict] = None
+
+    @classmethod
+    def for_scrape(cls, output_dir: Path, prefix: str,
+                   sort_by: str = "cost",
+                   sort_direction: str = "DESC") -> 'ScrapeJournal':
+        """
+        Journal for a scrape writing `prefix` part files in a given sort order
+
+        Args:
+            output_dir: Directory the part files are written to
+            prefix: Prefix for output filenames (already encodes the status filter)
+            sort_by: Field the scrape is sorted by
+            sort_direction: Sort direction (ASC or DESC)
+        """
+        safe_sort = re.sub(r'[^A-Za-z0-9]+', '_', f"{sort_by}_{sort_direction}").lower()
+        return cls(Path(output_dir) / f".{prefix}_{safe_sort}.journal.json")
+
+    def load(self, status: Optional[str], sort_by: str, sort_direction: str) -> Optional[Dict]:
+        """
+        Load an unfinished journal matching this scrape, if one exists
+
+        The journal is ignored when it belongs to a different query or when
+        any of the part files it lists has gone missing from disk.
+
+        Returns:
+            Journal state, or None if the scrape has to start from page 1
+        """
+        if not self.path.exists():
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable journal {self.path.name}: {e}")
+            return None
+
+        if (state.get('status'), state.get('sort_by'), state.get('sort_direction')) != \
+                (status, sort_by, sort_direction):
+            logger.warning(f"Ignoring journal {self.path.name}: it belongs to a different query")
+            return None
+
+        missing = [part['file'] for part in state.get('parts', [])
+                   if not (self.path.parent / part['file']).exists()]
+        if missing:
+            logger.warning(f"Ignoring journal {self.path.name}: {len(missing)} part file(s) missing")
+            return None
+
+        self.state = state
+        return state
+
+    def start(self, status: Optional[str], sort_by: str, sort_direction: str,
+              per_page: int, timestamp: str):
+        """Begin a fresh journal for a scrape starting at page 1"""
+        self.state = {
+            'status': status,
+            'sort_by': sort_by,
+            'sort_direction': sort_direction,
+            'per_page': per_page,
+            'timestamp': timestamp,
+            'records_written': 0,
+            'pages_completed': 0,
+            'parts': []
+        }
+        self._save()
+
+    def resume_point(self) -> Tuple[int, int]:
+        """
+        First page still needed and how many of its records are already on disk
+
+        Returns:
+            (page number, records of that page to skip)
+        """
+        per_page = self.state['per_page']
+        written = self.state['records_written']
+        return written // per_page + 1, written % per_page
+
+    @property
+    def part_files(self) -> List[Path]:
+        """Part files already written by this scrape, in order"""
+        return [self.path.parent / part['file'] for part in self.state['parts']]
+
+    def record_part(self, filepath: Path, total_written: int):
+        """
+        Record a part file that has just been closed
+
+        Args:
+            filepath: Part file that was written
+            total_written: Total records on disk including this file
+        """
+        per_page = self.state['per_page']
+        start_idx = self.state['records_written']
+        self.state['parts'].append({
+            'file': Path(filepath).name,
+            'records_range': f"{start_idx + 1}-{total_written}",
+            'pages': [start_idx // per_page + 1, (total_written + per_page - 1) // per_page]
+        })
+        self.state['records_written'] = total_written
+        self.state['pages_completed'] = total_written // per_page
+        self._save()
+
+    def finish(self):
+        """Remove the journal once the scrape has completed"""
+        self.state = None
+        if self.path.exists():
+            self.path.unlink()
+
+    def _save(self):
+        """Write the journal atomically so a crash never leaves it half-written"""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,202 @@
+"""
+Command-line entry point for the DIME scraper
+`python -m scraper <command>` runs the scraper and the tools built on the
+part files. Only the modules a command needs are imported, after its
+arguments are parsed, and logging is configured here at run time (to
+stderr, plus a log file with --log-file) rather than when the package is
+imported, so short-lived invocations stay fast and free of side effects.
+
+Commands:
+    scrape   Scrape projects into part files (all, by status, or incremental)
+    analyze  Print statistics of scraped part files
+    export   Convert part files to npz / parquet columns, a snapshot or SQLite
+    bench    Benchmark the scraper against the local mock API
+    validate Check part files for data-quality problems
+    search, rollup, history
+             Query the search index, rollup cube or change history
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Commands handled by another module's main(argv, prog), which parses their
+# arguments and returns the exit status
+_DELEGATED = {
+    'bench': ('scraper.benchmark', "Benchmark the scraper against the local mock API"),
+    'validate': ('scraper.quality', "Check part files for data-quality problems"),
+    'search': ('scraper.search', "Search projects by keyword"),
+    'rollup': ('scraper.rollup', "Query the precomputed rollup cube"),
+    'history': ('scraper.history', "Record and query the change history of scrape runs"),
+}
+
+
+def configure_logging(level: str = 'INFO', log_file: Optional[str] = None):
+    """
+    Send log records to stderr and optionally a file
+
+    Does nothing if the root logger already has handlers (e.g. when the
+    caller configured logging itself); the log file is then not opened.
+
+    Args:
+        level: Logging level name
+        log_file: Also append log records to this file
+    """
+    if logging.getLogger().handlers:
+        return
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(level=getattr(logging, level.upper()), format=LOG_FORMAT, handlers=handlers)
+
+
+def _scrape(args: argparse.Namespace) -> int:
+    from .dime_scraper import DIMEScraper
+
+    sinks = []
+    if args.quality_report:
+        from .quality import DataQualityValidator
+
+        sinks.append(DataQualityValidator())
+    scraper = DIMEScraper(base_url=args.base_url, output_dir=args.output_dir, records_per_file=args.records_per_file,
+                          concurrency=args.concurrency, requests_per_second=args.rps,
+                          adaptive=args.adaptive, file_format=args.file_format,
+                          compression=args.compression, validate=args.validate, sinks=sinks)
+    statuses = args.status or [None]
+    if args.incremental:
+        results = [scraper.scrape_incremental(status, prefix=args.prefix, per_page=args.per_page)
+                   for status in statuses]
+    elif len(statuses) == 1:
+        results = [scraper.scrape_to_files(statuses[0], prefix=args.prefix, per_page=args.per_page)]
+    else:
+        results = scraper.scrape_by_status(statuses, max_parallel=args.parallel, per_page=args.per_page)
+
+    scraper.metrics.log_summary()
+    for name in ("scrape_metrics.prom", "scrape_metrics.json"):
+        scraper.metrics.write(scraper.output_dir / name)
+    if args.quality_report:
+        from .quality import DEFAULT_REPORT_NAME
+
+        sinks[0].report.log_summary()
+        sinks[0].report.write(scraper.output_dir / DEFAULT_REPORT_NAME)
+    incomplete = [status for status, result in zip(statuses, results) if not result.get('complete')]
+    if incomplete:
+        logger.error(f"Scrape stopped early for {', '.join(s or 'all projects' for s in incomplete)}; "
+                     f"run the same command again to resume")
+        return 1
+    logger.info(f"Scraping completed, output in {scraper.output_dir}/")
+    return 0
+
+
+def _analyze(args: argparse.Namespace) -> int:
+    from .analyze_data import analyze_scraped_data
+
+    summary = analyze_scraped_data(args.data_dir, workers=args.workers, stream=args.stream)
+    return 0 if summary is not None else 1
+
+
+def _export(args: argparse.Namespace) -> int:
+    from .loader import find_part_files
+
+    files = find_part_files(args.data_dir)
+    if not files:
+        logger.error(f"No part files found in {args.data_dir}")
+        return 1
+    if args.format in ('npz', 'parquet'):
+        from .columnar import convert_part_file
+
+        for path in files:
+            convert_part_file(path, args.format)
+    elif args.format == 'snapshot':
+        from .snapshot import Snapshot
+
+        Snapshot.load_or_build(args.data_dir, args.output, workers=args.workers).close()
+    else:
+        from .sqlite_store import ProjectStore
+
+        with ProjectStore(args.output or str(Path(args.data_dir) / "dime_projects.sqlite")) as store:
+            store.import_files(files, workers=args.workers)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser for all commands"""
+    parser = argparse.ArgumentParser(prog='python -m scraper',
+                                     description="DIME Philippines Dashboard scraper and data tools")
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'))
+    parser.add_argument('--log-file', help="Also write log records to this file")
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    scrape = commands.add_parser('scrape', help="Scrape projects into part files")
+    scrape.add_argument('--status', action='append',
+                        help="Only projects with this status (repeatable; default: all projects)")
+    scrape.add_argument('--output-dir', default="scraped_data")
+    scrape.add_argument('--base-url', default="https://www.dime.gov.ph", help="API host (e.g. a mock server)")
+    scrape.add_argument('--prefix', help="Part-file prefix (default: derived from the status; "
+                                         "only with a single --status)")
+    scrape.add_argument('--records-per-file', type=int, default=1000)
+    scrape.add_argument('--per-page', type=int, default=100)
+    scrape.add_argument('--concurrency', type=int, default=1)
+    scrape.add_argument('--rps', type=float, default=1.0, help="Request rate limit")
+    scrape.add_argument('--parallel', type=int, default=1, help="Statuses scraped at once")
+    scrape.add_argument('--adaptive', action='store_true', help="Tune page size, concurrency and rate")
+    scrape.add_argument('--incremental', action='store_true', help="Only fetch changes, as a delta file")
+    scrape.add_argument('--validate', action='store_true', help="Check records against the schema")
+    scrape.add_argument('--quality-report', action='store_true',
+                        help="Run the data-quality checks on each page and write quality_report.json")
+    scrape.add_argument('--file-format', default='json', choices=('json', 'compact', 'ndjson'))
+    scrape.add_argument('--compression', choices=('gzip', 'zstd'))
+    scrape.set_defaults(handler=_scrape)
+
+    analyze = commands.add_parser('analyze', help="Print statistics of scraped part files")
+    analyze.add_argument('data_dir', nargs='?', default="scraped_data")
+    analyze.add_argument('--workers', type=int, help="Parser processes")
+    analyze.add_argument('--stream', action='store_true', help="Read one record at a time in this process")
+    analyze.set_defaults(handler=_analyze)
+
+    export = commands.add_parser('export', help="Convert part files to another format")
+    export.add_argument('data_dir', nargs='?', default="scraped_data")
+    export.add_argument('--format', default='npz', choices=('npz', 'parquet', 'snapshot', 'sqlite'))
+    export.add_argument('--output', help="Snapshot or SQLite file (default: in data_dir)")
+    export.add_argument('--workers', type=int, help="Parser processes")
+    export.set_defaults(handler=_export)
+
+    for name, (module, help_text) in _DELEGATED.items():
+        # Arguments (including --help) are left unparsed and handed to the module
+        commands.add_parser(name, help=help_text, add_help=False).set_defaults(module=module)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a command
+
+    Args:
+        argv: Arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Process exit status
+    """
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in _DELEGATED:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command == 'scrape' and args.prefix and len(args.status or []) > 1:
+        # Each status needs its own part files and incremental index
+        parser.error("--prefix cannot be combined with more than one --status")
+    configure_logging(args.log_level, args.log_file)
+    if args.command in _DELEGATED:
+        import importlib
+
+        return importlib.import_module(args.module).main(extra, prog=f"{parser.prog} {args.command}") or 0
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
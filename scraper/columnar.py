@@ -0,0 +1,483 @@
+"""
+Columnar export of scraped DIME project data
+Writes project records as typed columns next to the JSON part files, either
+as a NumPy-compatible .npz archive (written with the standard library, so
+numpy is only needed to read it with np.load) or as Parquet when pyarrow is
+installed. Nested entities are dictionary-encoded and the part file's
+`metadata` block is preserved as file-level metadata.
+"""
+
+import ast
+import json
+import logging
+import math
+import sys
+import zipfile
+from array import array
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator
+
+from .partio import read_part_file, sidecar_path
+from .schema import ENTITY_KEYS, FIELD_ORDER, NULL_TIMESTAMP, field_kind, parse_timestamp, format_timestamp
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = ('npz', 'parquet')
+
+# array typecode <-> .npy descr for the dtypes used here
+_NPY_DESCR = {'d': '<f8', 'q': '<i8', 'i': '<i4', 'B': '|u1'}
+_DESCR_TYPECODE = {'<f8': 'd', '<i8': 'q', '<i4': 'i', '|u1': 'B', '|b1': 'B', '<M8[ms]': 'q'}
+
+
+def _npy_bytes(values: array, descr: Optional[str] = None) -> bytes:
+    """Serialise a 1-D array in .npy (version 1.0) format"""
+    descr = descr or _NPY_DESCR[values.typecode]
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    # Magic (6) + version (2) + header length (2) + header must be a multiple of 64
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = header + ' ' * padding + '\n'
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1') + values.tobytes()
+
+
+def _read_npy(data: bytes) -> array:
+    """Parse a 1-D .npy payload written by _npy_bytes (or numpy itself)"""
+    if data[:6] != b'\x93NUMPY':
+        raise ValueError("not a .npy payload")
+    major = data[6]
+    if major == 1:
+        header_len = int.from_bytes(data[8:10], 'little')
+        start = 10
+    else:
+        header_len = int.from_bytes(data[8:12], 'little')
+        start = 12
+    header = ast.literal_eval(data[start:start + header_len].decode('latin1'))
+    typecode = _DESCR_TYPECODE.get(header['descr'])
+    if typecode is None:
+        raise ValueError(f"unsupported dtype {header['descr']}")
+    values = array(typecode)
+    values.frombytes(data[start + header_len:])
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+def _encode_strings(values: List[Optional[str]]) -> Dict[str, array]:
+    """Pack strings as UTF-8 bytes plus int64 offsets and a validity mask"""
+    offsets = array('q', [0])
+    data = bytearray()
+    valid = array('B')
+    for value in values:
+        if value is not None:
+            data.extend(value.encode('utf-8'))
+        offsets.append(len(data))
+        valid.append(value is not None)
+    return {'offsets': offsets, 'data': array('B', bytes(data)), 'valid': valid}
+
+
+def _decode_strings(offsets: array, data: array, valid: array) -> List[Optional[str]]:
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode('utf-8') if valid[i] else None
+            for i in range(len(valid))]
+
+
+def _entity_key(entity: Dict) -> str:
+    return json.dumps(entity, sort_keys=True, ensure_ascii=False)
+
+
+class _EntityDictionary:
+    """Assigns a stable integer code to each distinct entity dict"""
+
+    def __init__(self):
+        self.entities: List[Dict] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, entity: Optional[Dict]) -> int:
+        if entity is None:
+            return -1
+        key = _entity_key(entity)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.entities)
+            self.entities.append(entity)
+        return code
+
+
+def project_fields(projects: List[Dict]) -> List[str]:
+    """Fields present in the records, in API order followed by any extras"""
+    seen = {}
+    for project in projects:
+        for field in project:
+            seen.setdefault(field, None)
+    known = [f for f in FIELD_ORDER if f in seen]
+    return known + [f for f in seen if f not in FIELD_ORDER]
+
+
+def encode_columns(projects: List[Dict]) -> Dict:
+    """
+    Convert project records into typed, dictionary-encoded columns
+
+    Args:
+        projects: Project records in the API's JSON shape
+
+    Returns:
+        Dict with `arrays` (member name -> array), `columns` (field -> kind),
+        `dictionaries` (category values) and `entities` (entity tables)
+    """
+    arrays: Dict[str, array] = {}
+    columns: Dict[str, str] = {}
+    dictionaries: Dict[str, List[str]] = {}
+    entities: Dict[str, List[Dict]] = {}
+
+    for field in project_fields(projects):
+        kind = field_kind(field)
+        values = [project.get(field) for project in projects]
+
+        if kind == 'date':
+            try:
+                millis = [parse_timestamp(v) for v in values]
+            except (TypeError, ValueError, AttributeError):
+                kind = 'json'
+            else:
+                arrays[field] = array('q', [NULL_TIMESTAMP if m is None else m for m in millis])
+
+        if kind in ('float', 'int') and not all(v is None or isinstance(v, (int, float))
+                                                 and not isinstance(v, bool) for v in values):
+            kind = 'json'
+
+        if kind == 'float':
+            arrays[field] = array('d', [math.nan if v is None else float(v) for v in values])
+        elif kind == 'int':
+            if any(isinstance(v, float) for v in values):
+                kind = 'float'
+                arrays[field] = array('d', [math.nan if v is None else float(v) for v in values])
+            else:
+                arrays[field] = array('q', [0 if v is None else v for v in values])
+                if any(v is None for v in values):
+                    arrays[f"{field}__valid"] = array('B', [v is not None for v in values])
+        elif kind == 'category':
+            if not all(v is None or isinstance(v, str) for v in values):
+                kind = 'json'
+            else:
+                lookup: Dict[str, int] = {}
+                codes = array('i', [-1 if v is None else lookup.setdefault(v, len(lookup))
+                                    for v in values])
+                arrays[f"{field}__codes"] = codes
+                dictionaries[field] = list(lookup)
+        elif kind == 'entity':
+            encoder = _EntityDictionary()
+            arrays[f"{field}__codes"] = array('i', [encoder.code(v) for v in values])
+            entities[field] = encoder.entities
+        elif kind == 'entity_list':
+            encoder = _EntityDictionary()
+            offsets = array('q', [0])
+            codes = array('i')
+            valid = array('B')
+            for value in values:
+                for entity in value or []:
+                    codes.append(encoder.code(entity))
+                offsets.append(len(codes))
+                valid.append(value is not None)
+            arrays[f"{field}__offsets"] = offsets
+            arrays[f"{field}__codes"] = codes
+            arrays[f"{field}__valid"] = valid
+            entities[field] = encoder.entities
+
+        if kind in ('text', 'json'):
+            if kind == 'text' and not all(v is None or isinstance(v, str) for v in values):
+                kind = 'json'
+            if kind == 'json':
+                values = [json.dumps(v, ensure_ascii=False) for v in values]
+            for part, packed in _encode_strings(values).items():
+                arrays[f"{field}__{part}"] = packed
+
+        columns[field] = kind
+
+    return {'arrays': arrays, 'columns': columns,
+            'dictionaries': dictionaries, 'entities': entities}
+
+
+def write_npz(projects: List[Dict], path: Path, metadata: Optional[Dict] = None,
+              compress: bool = True) -> Path:
+    """
+    Write projects as a NumPy-compatible .npz archive of typed columns
+
+    Each column is a .npy member (`np.load(path)['cost']`); strings and
+    entity lists use `__offsets`/`__data`/`__codes` members. The JSON
+    members `metadata.json` and `columns.json` hold the part file's metadata
+    and the column kinds, category dictionaries and entity tables.
+
+    Args:
+        projects: Project records
+        path: Output file path
+        metadata: File-level metadata (the part file's `metadata` block)
+        compress: Deflate the members, like np.savez_compressed
+
+    Returns:
+        Path of the written file
+    """
+    encoded = encode_columns(projects)
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    date_fields = {f for f, kind in encoded['columns'].items() if kind == 'date'}
+
+    with zipfile.ZipFile(path, 'w', compression=compression) as archive:
+        for name, values in encoded['arrays'].items():
+            descr = '<M8[ms]' if name in date_fields else ('|b1' if name.endswith('__valid') else None)
+            archive.writestr(f"{name}.npy", _npy_bytes(values, descr))
+        archive.writestr('metadata.json', json.dumps(metadata or {}, ensure_ascii=False))
+        archive.writestr('columns.json', json.dumps({
+            'num_rows': len(projects),
+            'columns': encoded['columns'],
+            'dictionaries': encoded['dictionaries'],
+            'entities': encoded['entities'],
+        }, ensure_ascii=False))
+
+    return Path(path)
+
+
+def parquet_schema(fields: Iterable[str] = FIELD_ORDER):
+    """
+    Arrow schema of the Parquet columns, derived from the schema.py field kinds
+
+    Every part file is written with the same schema, so a directory of parts
+    reads back as one table (`pq.read_table(data_dir)`) whatever the null
+    pattern of each part. Categories and the string members of entities are
+    dictionary-encoded; fields not in schema.py are stored as JSON strings.
+
+    Args:
+        fields: Column names, in order
+
+    Returns:
+        pyarrow.Schema
+    """
+    import pyarrow as pa
+
+    category = pa.dictionary(pa.int32(), pa.string())
+    types = {'float': pa.float64(), 'int': pa.int64(), 'date': pa.timestamp('ms', tz='UTC'),
+             'category': category, 'text': pa.string(), 'json': pa.string()}
+    columns = []
+    for field in fields:
+        kind = field_kind(field)
+        if kind in ('entity', 'entity_list'):
+            entity = pa.struct([(key, pa.int64() if key == 'id' else category) for key in ENTITY_KEYS[field]])
+            columns.append((field, entity if kind == 'entity' else pa.list_(entity)))
+        else:
+            columns.append((field, types[kind]))
+    return pa.schema(columns)
+
+
+def _parquet_value(value, kind: str):
+    """Convert a JSON value to what pyarrow expects for a column of this kind"""
+    if value is None:
+        return None
+    if kind == 'date':
+        return parse_timestamp(value)
+    if kind == 'json':
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def write_parquet(projects: List[Dict], path: Path, metadata: Optional[Dict] = None) -> Path:
+    """
+    Write projects as a Parquet file (requires pyarrow)
+
+    Columns follow parquet_schema(): every field in schema.py is written,
+    even when it is null throughout the part, followed by any extra fields.
+    Values that do not fit their column's type (a timestamp that does not
+    parse, a string in a numeric field) are written as null with a warning;
+    the JSON part file keeps the original. The part file's metadata is kept
+    under the `dime_metadata` schema metadata key.
+
+    Args:
+        projects: Project records
+        path: Output file path
+        metadata: File-level metadata (the part file's `metadata` block)
+
+    Returns:
+        Path of the written file
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+    fields = list(FIELD_ORDER) + [f for f in project_fields(projects) if f not in FIELD_ORDER]
+    schema = parquet_schema(fields).with_metadata({
+        'dime_metadata': json.dumps(metadata or {}, ensure_ascii=False)
+    })
+    columns = []
+    for column in schema:
+        kind = field_kind(column.name)
+        values = [project.get(column.name) for project in projects]
+        try:
+            columns.append(pa.array([_parquet_value(v, kind) for v in values], type=column.type))
+            continue
+        except (TypeError, ValueError, AttributeError, pa.ArrowException):
+            pass
+        # Null out only the values that do not convert
+        converted = []
+        for value in values:
+            try:
+                pa.array([_parquet_value(value, kind)], type=column.type)
+                converted.append(_parquet_value(value, kind))
+            except (TypeError, ValueError, AttributeError, pa.ArrowException):
+                converted.append(None)
+        logger.warning(f"{path}: {converted.count(None) - values.count(None)} '{column.name}' "
+                       f"values do not fit {column.type}, writing null")
+        columns.append(pa.array(converted, type=column.type))
+
+    pq.write_table(pa.Table.from_arrays(columns, schema=schema), path, compression='zstd')
+    return Path(path)
+
+
+class ColumnarFile:
+    """Reader for .npz archives written by write_npz that loads only requested columns"""
+
+    def __init__(self, path: Path):
+        """
+        Open a columnar archive
+
+        Args:
+            path: .npz file written by write_npz
+        """
+        self.path = Path(path)
+        self._archive = zipfile.ZipFile(self.path)
+        schema = json.loads(self._archive.read('columns.json'))
+        self.num_rows: int = schema['num_rows']
+        self.columns: Dict[str, str] = schema['columns']
+        self.dictionaries: Dict[str, List[str]] = schema['dictionaries']
+        self.entities: Dict[str, List[Dict]] = schema['entities']
+        self.metadata: Dict = json.loads(self._archive.read('metadata.json'))
+
+    def raw(self, name: str) -> array:
+        """Raw array member (e.g. 'cost' or 'status__codes')"""
+        return _read_npy(self._archive.read(f"{name}.npy"))
+
+    def column(self, field: str) -> list:
+        """
+        Decode one field back to per-record Python values
+
+        Args:
+            field: Project field name
+
+        Returns:
+            Array for float columns, list of values otherwise
+        """
+        kind = self.columns[field]
+        if kind == 'float':
+            return self.raw(field)
+        if kind == 'int':
+            values = self.raw(field).tolist()
+            if f"{field}__valid" in self._members:
+                valid = self.raw(f"{field}__valid")
+                values = [v if valid[i] else None for i, v in enumerate(values)]
+            return values
+        if kind == 'date':
+            return [format_timestamp(v) for v in self.raw(field)]
+        if kind == 'category':
+            lookup = self.dictionaries[field]
+            return [lookup[c] if c >= 0 else None for c in self.raw(f"{field}__codes")]
+        if kind == 'entity':
+            table = self.entities[field]
+            return [table[c] if c >= 0 else None for c in self.raw(f"{field}__codes")]
+        if kind == 'entity_list':
+            table = self.entities[field]
+            offsets = self.raw(f"{field}__offsets")
+            codes = self.raw(f"{field}__codes")
+            valid = self.raw(f"{field}__valid")
+            return [[table[c] for c in codes[offsets[i]:offsets[i + 1]]] if valid[i] else None
+                    for i in range(self.num_rows)]
+        strings = _decode_strings(self.raw(f"{field}__offsets"), self.raw(f"{field}__data"),
+                                  self.raw(f"{field}__valid"))
+        if kind == 'json':
+            return [json.loads(s) for s in strings]
+        return strings
+
+    @property
+    def _members(self) -> set:
+        return {name[:-4] for name in self._archive.namelist() if name.endswith('.npy')}
+
+    def read(self, fields: Optional[Iterable[str]] = None) -> Dict[str, list]:
+        """Decode the given fields (all by default) into a field -> values dict"""
+        return {field: self.column(field) for field in (fields or self.columns)}
+
+    def iter_projects(self, fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """Rebuild project dicts in the API's JSON shape"""
+        data = self.read(fields)
+        for field, values in data.items():
+            if self.columns[field] == 'float':
+                # NaN marks a JSON null in float columns
+                data[field] = [None if v != v else v for v in values]
+        names = list(data)
+        for i in range(self.num_rows):
+            yield {name: data[name][i] for name in names}
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self) -> 'ColumnarFile':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_columnar(projects: List[Dict], path: Path, fmt: str = 'npz',
+                    metadata: Optional[Dict] = None) -> Path:
+    """
+    Write projects in the given columnar format
+
+    Args:
+        projects: Project records
+        path: Output file path
+        fmt: 'npz' or 'parquet'
+        metadata: File-level metadata
+
+    Returns:
+        Path of the written file
+    """
+    if fmt == 'npz':
+        return write_npz(projects, path, metadata)
+    if fmt == 'parquet':
+        return write_parquet(projects, path, metadata)
+    raise ValueError(f"Unknown columnar format '{fmt}' (expected one of {COLUMNAR_FORMATS})")
+
+
+def convert_part_file(json_path: Path, fmt: str = 'npz') -> Path:
+    """
+    Write a columnar copy of an existing part file next to it
+
+    Args:
+        json_path: Part file with `metadata` and `projects` (any encoding)
+        fmt: 'npz' or 'parquet'
+
+    Returns:
+        Path of the columnar file
+    """
+    json_path = Path(json_path)
+    content = read_part_file(json_path)
+    target = sidecar_path(json_path, f".{fmt}")
+    export_columnar(content.get('projects', []), target, fmt, content.get('metadata'))
+    logger.info(f"Wrote {target.name}")
+    return target
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m scraper.columnar <data_dir> [npz|parquet]")
+        return
+
+    data_dir = Path(sys.argv[1])
+    fmt = sys.argv[2] if len(sys.argv) > 2 else 'npz'
+
+    from .loader import find_part_files
+
+    for json_file in find_part_files(data_dir):
+        convert_part_file(json_file, fmt)
+
+
+if __name__ == "__main__":
+    main()
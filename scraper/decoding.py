@@ -0,0 +1,275 @@
+"""
+JSON decoding for API responses and part files
+Uses orjson or msgspec when installed (about twice as fast as the standard
+library on DIME pages) and falls back to the json module otherwise. Decoded
+project records can be checked against the field kinds in schema.py (numbers,
+coordinates, timestamps, codes, entities), so type problems are reported
+where the data enters instead of surfacing later in analysis. With msgspec
+the check happens while decoding, against typed Structs built from schema.py;
+the Python checks only run to describe the records that fail it.
+"""
+
+import json
+from functools import lru_cache
+from typing import Annotated, List, Dict, Optional, Callable, Iterable, Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - msgspec is optional
+    msgspec = None
+
+from .schema import (FIELD_ORDER, FLOAT_FIELDS, INT_FIELDS, DATE_FIELDS, CATEGORY_FIELDS, TEXT_FIELDS,
+                     ENTITY_FIELDS, ENTITY_LIST_FIELDS, field_kind, parse_timestamp)
+
+JSON_BACKENDS = ('orjson', 'msgspec', 'json')
+
+_COORDINATE_RANGES = {'latitude': (-90, 90), 'longitude': (-180, 180)}
+
+# Timestamps datetime.fromisoformat accepts, for the msgspec Structs (the day is
+# not checked against the month, so "2024-02-30" passes there but not in check_project)
+_TIMESTAMP_PATTERN = (r'^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])'
+                      r'([T ]([01]\d|2[0-3]):[0-5]\d(:[0-5]\d(\.\d{1,6})?)?)?(Z|[+-]\d{2}:\d{2})?$')
+
+
+def available_backends() -> List[str]:
+    """JSON backends importable here, fastest first"""
+    modules = {'orjson': orjson, 'msgspec': msgspec, 'json': json}
+    return [name for name in JSON_BACKENDS if modules[name] is not None]
+
+
+DEFAULT_BACKEND = available_backends()[0]
+
+
+def _orjson_loads(data: Union[bytes, str]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN/Infinity and integers beyond 64 bits are valid for the json module
+        return json.loads(data)
+
+
+def _msgspec_loads(data: Union[bytes, str]) -> Any:
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError:
+        return json.loads(data)
+
+
+def get_loads(backend: Optional[str] = None) -> Callable[[Union[bytes, str]], Any]:
+    """
+    The decode function of a JSON backend
+
+    Every backend returns the same dicts, lists and numbers as json.loads;
+    input the fast backends reject is retried with the json module.
+
+    Args:
+        backend: 'orjson', 'msgspec' or 'json' (defaults to the fastest installed)
+
+    Raises:
+        ValueError: For an unknown backend or one that is not installed
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}' (expected one of {JSON_BACKENDS})")
+    if backend not in available_backends():
+        raise ValueError(f"JSON backend '{backend}' is not installed")
+    if backend == 'orjson':
+        return _orjson_loads
+    if backend == 'msgspec':
+        return _msgspec_loads
+    return json.loads
+
+
+_default_loads = get_loads()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON with the fastest installed backend"""
+    return _default_loads(data)
+
+
+class ProjectValidationError(ValueError):
+    """Raised when decoded project records do not match the schema"""
+
+    def __init__(self, errors: List[str]):
+        more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""
+        super().__init__(f"Invalid project record: {errors[0]}{more}")
+        self.errors = errors
+
+
+def _is_number(value: Any) -> bool:
+    return type(value) in (int, float)
+
+
+def _check_entity(field: str, value: Any) -> Optional[str]:
+    if not isinstance(value, dict):
+        return f"{field}: expected an object, got {type(value).__name__}"
+    return None
+
+
+def check_project(project: Any) -> List[str]:
+    """
+    Check one decoded record against the field kinds in schema.py
+
+    Args:
+        project: Decoded project record
+
+    Returns:
+        Problems found, as "field: message" strings (empty if valid)
+    """
+    if not isinstance(project, dict):
+        return [f"expected an object, got {type(project).__name__}"]
+    errors = []
+    for field, value in project.items():
+        if value is None:
+            continue
+        if field in FLOAT_FIELDS:
+            if not _is_number(value):
+                errors.append(f"{field}: expected a number, got {value!r}")
+            elif field in _COORDINATE_RANGES:
+                low, high = _COORDINATE_RANGES[field]
+                if not low <= value <= high:
+                    errors.append(f"{field}: {value} is outside [{low}, {high}]")
+        elif field in INT_FIELDS:
+            if type(value) is not int:
+                errors.append(f"{field}: expected an integer, got {value!r}")
+        elif field in DATE_FIELDS:
+            try:
+                parse_timestamp(value)
+            except (TypeError, ValueError, AttributeError):
+                errors.append(f"{field}: expected an ISO-8601 timestamp, got {value!r}")
+        elif field in CATEGORY_FIELDS or field in TEXT_FIELDS:
+            if type(value) is not str:
+                errors.append(f"{field}: expected a string, got {value!r}")
+        elif field in ENTITY_FIELDS:
+            error = _check_entity(field, value)
+            if error:
+                errors.append(error)
+        elif field in ENTITY_LIST_FIELDS:
+            if not isinstance(value, list):
+                errors.append(f"{field}: expected a list, got {type(value).__name__}")
+            else:
+                errors.extend(filter(None, (_check_entity(field, item) for item in value)))
+    if project.get('id') is None:
+        errors.append("id: missing")
+    return errors
+
+
+def check_projects(projects: Iterable[Any]) -> List[str]:
+    """Problems in a list of records, each prefixed with the record's id"""
+    errors = []
+    for position, project in enumerate(projects):
+        label = project.get('id', f"#{position}") if isinstance(project, dict) else f"#{position}"
+        errors.extend(f"project {label}: {error}" for error in check_project(project))
+    return errors
+
+
+def _struct_field_type(field: str):
+    """msgspec type of a project field, matching what check_project accepts"""
+    kind = field_kind(field)
+    if field in _COORDINATE_RANGES:
+        low, high = _COORDINATE_RANGES[field]
+        value_type = Union[Annotated[int, msgspec.Meta(ge=low, le=high)],
+                           Annotated[float, msgspec.Meta(ge=low, le=high)]]
+    elif kind == 'float':
+        value_type = Union[int, float]
+    elif kind == 'int':
+        value_type = int
+    elif kind == 'date':
+        value_type = Annotated[str, msgspec.Meta(pattern=_TIMESTAMP_PATTERN)]
+    elif kind in ('category', 'text'):
+        value_type = str
+    elif kind == 'entity':
+        value_type = Dict[str, Any]
+    else:
+        value_type = List[Dict[str, Any]]
+    return Union[value_type, None, msgspec.UnsetType]
+
+
+@lru_cache(maxsize=None)
+def _typed_decoder(key: str):
+    """msgspec decoder for a page or part file whose records live under `key`"""
+    # Unknown fields are rejected rather than dropped, so the document is
+    # decoded again without types and nothing is lost
+    project = msgspec.defstruct(
+        'Project', [('id', int)] + [(field, _struct_field_type(field), msgspec.UNSET)
+                                    for field in FIELD_ORDER if field != 'id'],
+        forbid_unknown_fields=True)
+    members = {'data': ('meta',), 'projects': ('metadata',)}.get(key, ())
+    page = msgspec.defstruct(
+        'Page', [(key, Union[List[project], msgspec.UnsetType], msgspec.UNSET)]
+        + [(member, Any, msgspec.UNSET) for member in members],
+        forbid_unknown_fields=True)
+    return msgspec.json.Decoder(page)
+
+
+def get_typed_loads(key: str = 'data') -> Optional[Callable[[Union[bytes, str]], Optional[Dict]]]:
+    """
+    A decode function that validates the records under `key` as it parses
+
+    The function returns the same dict as json.loads for documents whose
+    records all match the schema, and None for anything else (a record
+    that does not match, an unknown field or member, input only the json
+    module accepts); decode those normally and run check_projects to find
+    out why.
+
+    Args:
+        key: Member holding the records ('data' for API pages,
+            'projects' for part files)
+
+    Returns:
+        The decode function, or None if msgspec is not installed
+    """
+    if msgspec is None:
+        return None
+    decoder = _typed_decoder(key)
+
+    def typed_loads(data: Union[bytes, str]) -> Optional[Dict]:
+        try:
+            document = decoder.decode(data)
+        except msgspec.DecodeError:
+            return None
+        return msgspec.to_builtins(document)
+
+    return typed_loads
+
+
+def decode_projects(data: Union[bytes, str], key: str = 'data', validate: bool = False,
+                    backend: Optional[str] = None) -> Dict:
+    """
+    Decode an API page or part file, optionally validating its records
+
+    Args:
+        data: JSON text or bytes
+        key: Member holding the records ('data' for API pages,
+            'projects' for part files)
+        validate: Check every record with check_project (while decoding,
+            when msgspec is installed and backend is None or 'msgspec')
+        backend: JSON backend (defaults to the fastest installed)
+
+    Returns:
+        The decoded document
+
+    Raises:
+        ValueError: If the text is not valid JSON
+        ProjectValidationError: If validate is set and a record does not
+            match the schema
+    """
+    typed_loads = get_typed_loads(key) if validate and backend in (None, 'msgspec') else None
+    if typed_loads is not None:
+        document = typed_loads(data)
+        if document is not None:
+            return document
+    document = get_loads(backend)(data)
+    if validate:
+        records = document.get(key, []) if isinstance(document, dict) else document
+        errors = check_projects(records or [])
+        if errors:
+            raise ProjectValidationError(errors)
+    return document
+
@@ -6,32 +6,60 @@ and saves it to JSON files with 1000 records per file.
 
 import requests
 import json
+import re
+import shutil
 import time
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Any
 from urllib.parse import urlencode
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('dime_scraper.log'),
-        logging.StreamHandler()
-    ]
-)
+from .adaptive import AdaptiveController, backoff_delay, parse_retry_after
+from .checkpoint import ScrapeJournal
+from .decoding import check_project, get_loads, get_typed_loads
+from .http_cache import ResponseCache
+from .incremental import ProjectIndex, UPDATED_FIELD, update_time, write_delta_file
+from .metrics import ScrapeMetrics
+from .loader import iter_parts, read_part_metadata
+from .partio import remove_part_file, sidecar_path
+from .rate_limit import TokenBucket
+from .transport import RequestsTransport, Transport, TransportResponse
+from .writers import PartFileWriter
 
 logger = logging.getLogger(__name__)
 
 
+class PageFetchError(Exception):
+    """Raised when a page still cannot be fetched after all retries"""
+    
+    def __init__(self, page: int):
+        super().__init__(f"Failed to fetch page {page}")
+        self.page = page
+
+
 class DIMEScraper:
     """Scraper for DIME Philippines Dashboard"""
     
     def __init__(self, base_url: str = "https://www.dime.gov.ph", 
                  output_dir: str = "scraped_data",
-                 records_per_file: int = 1000):
+                 records_per_file: int = 1000,
+                 concurrency: int = 1,
+                 requests_per_second: float = 1.0,
+                 adaptive: bool = False,
+                 columnar_format: Optional[str] = None,
+                 sinks: Optional[List] = None,
+                 cache: Optional[ResponseCache] = None,
+                 file_format: str = 'json',
+                 compression: Optional[str] = None,
+                 metrics: Optional[ScrapeMetrics] = None,
+                 json_backend: Optional[str] = None,
+                 validate: bool = False,
+                 transport: Optional[Transport] = None):
         """
         Initialize the scraper
         
@@ -39,25 +67,70 @@ class DIMEScraper:
             base_url: Base URL for the DIME API
             output_dir: Directory to save JSON files
             records_per_file: Number of records per JSON file
+            concurrency: Maximum number of pages fetched in parallel
+                (1 keeps the original page-by-page behaviour)
+            requests_per_second: Sustained request rate enforced by the
+                token bucket shared by all workers
+            adaptive: Probe the largest honoured perPage and adjust
+                concurrency, request rate and timeout from observed latency
+                and 429/5xx responses (never exceeding the limits above)
+            columnar_format: Also write every part file as 'npz' or
+                'parquet' typed columns alongside the JSON
+            sinks: Extra outputs (e.g. sqlite_store.ProjectStore) whose
+                write(projects) is called with every page scrape_to_files fetches
+            cache: On-disk response cache; fresh pages are served from it
+                without a request, stale ones are revalidated with ETag /
+                Last-Modified when the server supports them
+            file_format: Part file encoding: 'json' (indented, as before),
+                'compact' (no whitespace) or 'ndjson' (one project per line)
+            compression: Compress part files with 'gzip' or 'zstd'
+            metrics: Collector for request, decode and write timings (a new
+                ScrapeMetrics by default; pass one to share it or add hooks)
+            json_backend: 'orjson', 'msgspec' or 'json' for decoding responses
+                (defaults to the fastest one installed)
+            validate: Check every fetched record against the schema field
+                kinds (while decoding, with msgspec, unless another
+                json_backend is chosen); mismatches are logged and counted
+                in metrics as invalid_records, and the records are kept
+            transport: Sends the HTTP requests (a RequestsTransport with a
+                keep-alive pool sized to `concurrency` by default; e.g.
+                transport.HttpxTransport for HTTP/2, or a
+                mock_server.MockTransport in tests)
         """
         self.base_url = base_url
         self.api_endpoint = f"{base_url}/api/v1/projects"
         self.output_dir = Path(output_dir)
         self.records_per_file = records_per_file
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Accept': 'application/json',
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.columnar_format = columnar_format
+        self.file_format = file_format
+        self.compression = compression
+        self.sinks = list(sinks or [])
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else ScrapeMetrics()
+        self._loads = get_loads(json_backend)
+        self._typed_loads = get_typed_loads() if validate and json_backend in (None, 'msgspec') else None
+        self.validate = validate
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = TokenBucket(requests_per_second, capacity=self.concurrency)
+        self.adaptive = AdaptiveController(self.rate_limiter, self.concurrency) if adaptive else None
+        self.transport = transport if transport is not None else RequestsTransport(self.concurrency)
+        self.transport.resize(self.concurrency)
+        self.metrics.add_collector(self._connection_stats)
         
         # Create output directory if it doesn't exist
         self.output_dir.mkdir(exist_ok=True)
-        
+    
+    def _connection_stats(self) -> Dict[str, float]:
+        stats = self.transport.stats()
+        return {name: stats[name] for name in ('connections_opened', 'connections_reused') if name in stats}
+    
     def fetch_projects(self, status: Optional[str] = None, 
                       page: int = 1, 
                       per_page: int = 100,
                       sort_by: str = "cost",
-                      sort_direction: str = "DESC") -> Dict:
+                      sort_direction: str = "DESC",
+                      timeout: Optional[float] = None,
+                      filters: Optional[Dict[str, Any]] = None) -> Dict:
         """
         Fetch projects from the API
         
@@ -67,10 +140,102 @@ class DIMEScraper:
             per_page: Records per page
             sort_by: Field to sort by
             sort_direction: Sort direction (ASC or DESC)
+            timeout: Request timeout in seconds (defaults to 30, or to the
+                adaptive controller's latency-based timeout)
+            filters: Extra query parameters, e.g. {'region': 'NCR'}
             
         Returns:
             JSON response from API
         """
+        params = self._request_params(status, page, per_page, sort_by, sort_direction, filters)
+        cached = self.cache.get(self.api_endpoint, params) if self.cache is not None else None
+        if cached is not None and self.cache.fresh(cached):
+            self.cache.count('hits')
+            self.metrics.inc('cache_hits')
+            return self._decode(cached.body)
+            
+        try:
+            logger.info(f"Fetching page {page} (status: {status or 'All'}"
+                        f"{''.join(f', {k}: {v}' for k, v in (filters or {}).items())})")
+            if timeout is None:
+                timeout = self.adaptive.timeout if self.adaptive else 30
+            headers = cached.validators() if cached is not None else None
+            response = self._send(params, headers, timeout)
+            if response.status_code == 304:
+                if cached is not None:
+                    self.cache.count('revalidated')
+                    self.cache.refresh(cached, self.api_endpoint, params)
+                    return self._decode(cached.body)
+                # Nothing to fall back on (e.g. a proxy answered from its own
+                # validators), so ask again unconditionally
+                logger.warning(f"Page {page}: 304 Not Modified without a cached copy, requesting it again")
+                response = self._send(params, {'Cache-Control': 'no-cache'}, timeout)
+                if response.status_code == 304:
+                    raise requests.exceptions.HTTPError(
+                        f"304 Not Modified for page {page} without a cached copy")
+            response.raise_for_status()
+            data = self._decode(response.content)
+            if self.cache is not None:
+                self.cache.count('misses')
+                self.cache.put(self.api_endpoint, params, response.content,
+                               etag=response.headers.get('ETag'),
+                               last_modified=response.headers.get('Last-Modified'))
+            return data
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching page {page}: {e}")
+            raise
+            
+    def _send(self, params: Dict[str, Any], headers: Optional[Dict[str, str]],
+              timeout: float) -> TransportResponse:
+        """Send one page request, recording its status, duration and size"""
+        started = time.perf_counter()
+        try:
+            response = self.transport.get(self.api_endpoint, params=params, headers=headers,
+                                          timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            self.metrics.inc('requests', status=type(e).__name__)
+            raise
+        self.metrics.observe('request_seconds', time.perf_counter() - started, status=response.status_code)
+        self.metrics.inc('requests', status=response.status_code)
+        self.metrics.inc('response_bytes', response.wire_bytes)
+        return response
+
+    def _decode(self, body: bytes) -> Any:
+        """Parse (and with validate=True, check) a JSON response body, timing each step"""
+        started = time.perf_counter()
+        if self._typed_loads is not None:
+            data = self._typed_loads(body)
+            if data is not None:
+                # Validated while decoding; there is no separate check to time
+                self.metrics.observe('decode_seconds', time.perf_counter() - started)
+                return data
+        data = self._loads(body)
+        decoded = time.perf_counter()
+        self.metrics.observe('decode_seconds', decoded - started)
+        if self.validate and isinstance(data, dict):
+            self._validate_records(data.get('data') or [])
+            self.metrics.observe('validate_seconds', time.perf_counter() - decoded)
+        return data
+    
+    def _validate_records(self, projects: List[Dict]):
+        """Log and count records that do not match the schema"""
+        invalid = 0
+        for project in projects:
+            errors = check_project(project)
+            if errors:
+                invalid += 1
+                if invalid == 1:
+                    logger.warning(f"Project {project.get('id') if isinstance(project, dict) else project!r} "
+                                   f"does not match the schema: {'; '.join(errors)}")
+        if invalid:
+            self.metrics.inc('invalid_records', invalid)
+            if invalid > 1:
+                logger.warning(f"{invalid} records in this page do not match the schema")
+    
+    @staticmethod
+    def _request_params(status: Optional[str], page: int, per_page: int, sort_by: str,
+                        sort_direction: str, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Query parameters for one page request"""
         params = {
             'page': page,
             'perPage': per_page,
@@ -81,93 +246,251 @@ class DIMEScraper:
         if status:
             params['status'] = status
             params['statusName'] = status
+        if filters:
+            params.update(filters)
+        return params
+    
+    def _fetch_page_with_retries(self, status: Optional[str],
+                                 page: int,
+                                 per_page: int,
+                                 max_retries: int,
+                                 retry_delay: int,
+                                 sort_by: str = "cost",
+                                 sort_direction: str = "DESC",
+                                 filters: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+        """
+        Fetch a single page, waiting on the rate limiter and retrying on failure
+        
+        Returns:
+            JSON response from API, or None if every attempt failed
+        """
+        if self.cache is not None and self.cache.is_fresh(
+                self.api_endpoint,
+                self._request_params(status, page, per_page, sort_by, sort_direction, filters)):
+            # Served from disk: no need to wait for a request slot
+            return self.fetch_projects(status=status, page=page, per_page=per_page,
+                                       sort_by=sort_by, sort_direction=sort_direction,
+                                       filters=filters)
+        
+        for attempt in range(1, max_retries + 1):
+            with self.adaptive.slot() if self.adaptive else nullcontext():
+                self.metrics.observe('rate_limit_wait_seconds', self.rate_limiter.acquire())
+                started = time.monotonic()
+                try:
+                    data = self.fetch_projects(status=status, page=page, per_page=per_page,
+                                               sort_by=sort_by, sort_direction=sort_direction,
+                                               filters=filters)
+                except Exception as e:
+                    response = getattr(e, 'response', None)
+                    status_code = response.status_code if response is not None else None
+                    retry_after = parse_retry_after(response.headers.get('Retry-After')) \
+                        if response is not None else None
+                    if self.adaptive:
+                        self.adaptive.record_failure(status_code)
+                    logger.warning(f"Attempt {attempt}/{max_retries} for page {page} failed: {e}")
+                else:
+                    if self.adaptive:
+                        self.adaptive.record_success(time.monotonic() - started)
+                    return data
             
-        try:
-            logger.info(f"Fetching page {page} (status: {status or 'All'})")
-            response = self.session.get(self.api_endpoint, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching page {page}: {e}")
-            raise
+            if attempt < max_retries:
+                self.metrics.inc('retries')
+                delay = backoff_delay(attempt, retry_delay, retry_after=retry_after)
+                logger.info(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+        
+        logger.error(f"Failed to fetch page {page} after {max_retries} attempts")
+        self.metrics.inc('failed_pages')
+        return None
+    
+    def probe_page_size(self, status: Optional[str] = None, default: int = 100) -> int:
+        """
+        Find the largest perPage the API honours
+        
+        Each candidate size is tried on page 1 (largest first) and accepted if
+        the server returns the full page instead of silently capping it. The
+        result is remembered for the rest of the scraper's lifetime.
+        
+        Args:
+            status: Project status filter used for the probe requests
+            default: Page size to fall back to if every probe fails
             
-    def scrape_all_projects(self, status: Optional[str] = None, 
-                           per_page: int = 100,
-                           max_retries: int = 3,
-                           retry_delay: int = 5) -> List[Dict]:
+        Returns:
+            Page size to use for the crawl
         """
-        Scrape all projects from the API with pagination
+        controller = self.adaptive or AdaptiveController(self.rate_limiter, self.concurrency)
+        if controller.page_size is not None:
+            return controller.page_size
+        
+        for size in controller.page_sizes:
+            data = self._fetch_page_with_retries(status, 1, size, 2, 1)
+            if data is not None and controller.page_size_honoured(size, data):
+                logger.info(f"API honours perPage={size}")
+                controller.page_size = size
+                return size
+            logger.info(f"API does not honour perPage={size}")
+        
+        return default
+    
+    def _resolve_per_page(self, status: Optional[str], per_page: int) -> int:
+        """Page size for a fresh crawl: probed when adaptive, as given otherwise"""
+        if self.adaptive:
+            return self.probe_page_size(status, default=per_page)
+        return per_page
+    
+    def iter_pages(self, status: Optional[str] = None,
+                   per_page: int = 100,
+                   max_retries: int = 3,
+                   retry_delay: int = 5,
+                   sort_by: str = "cost",
+                   sort_direction: str = "DESC",
+                   start_page: int = 1,
+                   raise_on_failure: bool = False,
+                   filters: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, List[Dict], Dict]]:
+        """
+        Yield (page number, projects, meta) for every page, in page order
+        
+        The first page is always fetched on its own so that `meta.lastPage` is
+        known; with concurrency > 1 the remaining pages are then fanned out to
+        a thread pool. Iteration stops at the first page that cannot be fetched.
         
         Args:
             status: Project status filter
             per_page: Records per page
             max_retries: Maximum number of retries for failed requests
-            retry_delay: Delay between retries in seconds
-            
-        Returns:
-            List of all project records
+            retry_delay: Base delay for exponential backoff between retries (seconds)
+            sort_by: Field to sort by
+            sort_direction: Sort direction (ASC or DESC)
+            start_page: Page to start from (used when resuming)
+            raise_on_failure: Raise PageFetchError instead of stopping quietly
+                when a page still fails after max_retries
+            filters: Extra query parameters, e.g. {'region': 'NCR'}
         """
-        all_projects = []
-        page = 1
+        fetch_args = (per_page, max_retries, retry_delay, sort_by, sort_direction, filters)
+        page = start_page
         total_pages = None
         
         while True:
-            retry_count = 0
-            success = False
+            data = self._fetch_page_with_retries(status, page, *fetch_args)
+            if data is None:
+                if raise_on_failure:
+                    raise PageFetchError(page)
+                return
             
-            while retry_count < max_retries and not success:
-                try:
-                    data = self.fetch_projects(
-                        status=status,
-                        page=page,
-                        per_page=per_page
+            projects = data.get('data', [])
+            if not projects:
+                logger.info(f"No more projects found at page {page}")
+                return
+            
+            self._count_page(projects)
+            
+            # Check if there are more pages
+            pagination = data.get('meta', {})
+            yield page, projects, pagination
+            
+            if pagination:
+                current_page = pagination.get('currentPage', page)
+                last_page = pagination.get('lastPage', current_page)
+                
+                if total_pages is None:
+                    total_pages = last_page
+                    logger.info(f"Total pages to fetch: {total_pages}")
+                
+                if current_page >= last_page:
+                    logger.info(f"Reached last page ({last_page})")
+                    return
+                
+                if self.concurrency > 1:
+                    yield from self._iter_pages_concurrent(
+                        status, range(current_page + 1, last_page + 1),
+                        fetch_args, raise_on_failure
                     )
+                    return
+            else:
+                # If no pagination metadata, check if we got fewer records than requested
+                if len(projects) < per_page:
+                    logger.info(f"Retrieved fewer projects than requested, assuming last page")
+                    return
+            
+            page += 1
+    
+    def _iter_pages_concurrent(self, status: Optional[str],
+                               pages: Iterable[int],
+                               fetch_args: Tuple,
+                               raise_on_failure: bool) -> Iterator[Tuple[int, List[Dict], Dict]]:
+        """
+        Fetch the given pages in parallel and yield them back in page order
+        
+        At most 2 * concurrency pages are in flight or buffered at once, so
+        memory stays bounded even when later pages finish first.
+        """
+        pages = iter(pages)
+        window = self.concurrency * 2
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix='dime-fetch') as executor:
+            def submit(page_number):
+                return page_number, executor.submit(
+                    self._fetch_page_with_retries, status, page_number, *fetch_args
+                )
+            
+            pending = deque(submit(p) for p in islice(pages, window))
+            
+            try:
+                while pending:
+                    page, future = pending.popleft()
+                    data = future.result()
                     
-                    projects = data.get('data', [])
+                    if data is None:
+                        if raise_on_failure:
+                            raise PageFetchError(page)
+                        return
                     
+                    projects = data.get('data', [])
                     if not projects:
                         logger.info(f"No more projects found at page {page}")
-                        return all_projects
-                    
-                    all_projects.extend(projects)
-                    logger.info(f"Retrieved {len(projects)} projects from page {page}. Total so far: {len(all_projects)}")
-                    
-                    # Check if there are more pages
-                    pagination = data.get('meta', {})
-                    if pagination:
-                        total = pagination.get('total', 0)
-                        current_page = pagination.get('currentPage', page)
-                        last_page = pagination.get('lastPage', current_page)
-                        
-                        if total_pages is None:
-                            total_pages = last_page
-                            logger.info(f"Total pages to fetch: {total_pages}")
-                        
-                        if current_page >= last_page:
-                            logger.info(f"Reached last page ({last_page})")
-                            return all_projects
-                    else:
-                        # If no pagination metadata, check if we got fewer records than requested
-                        if len(projects) < per_page:
-                            logger.info(f"Retrieved fewer projects than requested, assuming last page")
-                            return all_projects
+                        return
                     
-                    success = True
-                    page += 1
+                    self._count_page(projects)
+                    yield page, projects, data.get('meta', {})
                     
-                    # Be respectful - add a small delay between requests
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    retry_count += 1
-                    logger.warning(f"Attempt {retry_count}/{max_retries} failed: {e}")
-                    if retry_count < max_retries:
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                    else:
-                        logger.error(f"Failed to fetch page {page} after {max_retries} attempts")
-                        # Return what we have so far
-                        return all_projects
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        pending.append(submit(next_page))
+            finally:
+                for _, future in pending:
+                    future.cancel()
+    
+    def _count_page(self, projects: List[Dict]):
+        self.metrics.inc('pages')
+        self.metrics.inc('records', len(projects))
+    
+    def scrape_all_projects(self, status: Optional[str] = None, 
+                           per_page: int = 100,
+                           max_retries: int = 3,
+                           retry_delay: int = 5) -> List[Dict]:
+        """
+        Scrape all projects from the API with pagination
+        
+        Requests are paced by the scraper's token bucket; when the scraper was
+        created with concurrency > 1, pages after the first are fetched in
+        parallel and reassembled in page order.
+        
+        Args:
+            status: Project status filter
+            per_page: Records per page
+            max_retries: Maximum number of retries for failed requests
+            retry_delay: Base delay for exponential backoff between retries (seconds)
+            
+        Returns:
+            List of all project records
+        """
+        all_projects = []
+        per_page = self._resolve_per_page(status, per_page)
+        
+        for page, projects, _ in self.iter_pages(status, per_page, max_retries, retry_delay):
+            all_projects.extend(projects)
+            logger.info(f"Retrieved {len(projects)} projects from page {page}. Total so far: {len(all_projects)}")
         
         return all_projects
     
@@ -182,72 +505,409 @@ class DIMEScraper:
         total_projects = len(projects)
         logger.info(f"Saving {total_projects} projects to JSON files...")
         
-        # Split into chunks
-        num_files = (total_projects + self.records_per_file - 1) // self.records_per_file
+        with self._part_writer(prefix, expected_total=total_projects) as writer:
+            writer.write(projects)
+    
+    def _part_writer(self, prefix: str, expected_total: Optional[int] = None,
+                     **kwargs) -> PartFileWriter:
+        """Create a part-file writer configured for this scraper"""
+        return PartFileWriter(
+            self.output_dir,
+            prefix,
+            records_per_file=self.records_per_file,
+            base_url=self.base_url,
+            expected_total=expected_total,
+            columnar_format=self.columnar_format,
+            file_format=self.file_format,
+            compression=self.compression,
+            metrics=self.metrics,
+            **kwargs
+        )
+    
+    @staticmethod
+    def status_prefix(status: Optional[str], filters: Optional[Dict[str, Any]] = None) -> str:
+        """Default output filename prefix for a status filter (and extra filters)"""
+        prefix = f"dime_projects_{status.lower()}" if status else "dime_projects_all"
+        for value in (filters or {}).values():
+            prefix += '_' + re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+        return prefix
+    
+    def scrape_to_files(self, status: Optional[str] = None,
+                        prefix: Optional[str] = None,
+                        per_page: int = 100,
+                        max_retries: int = 3,
+                        retry_delay: int = 5,
+                        sort_by: str = "cost",
+                        sort_direction: str = "DESC",
+                        resume: bool = True,
+                        filters: Optional[Dict[str, Any]] = None) -> Dict:
+        """
+        Scrape all projects, streaming each page straight into part files
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        Unlike scrape_all_projects followed by save_projects_to_json, only
+        about one part file's worth of records is held in memory at a time,
+        and every completed part file is already on disk if the run fails.
         
-        for i in range(num_files):
-            start_idx = i * self.records_per_file
-            end_idx = min((i + 1) * self.records_per_file, total_projects)
-            chunk = projects[start_idx:end_idx]
-            
-            filename = f"{prefix}_{timestamp}_part_{i+1:03d}_of_{num_files:03d}.json"
-            filepath = self.output_dir / filename
+        Progress is checkpointed in a journal next to the part files (one per
+        prefix and sort order). If a page still fails after max_retries the
+        journal is kept, and the next run with the same arguments resumes
+        from the first page that is not on disk instead of from page 1.
+        
+        Args:
+            status: Project status filter
+            prefix: Prefix for output filenames (defaults to status_prefix(status))
+            per_page: Records per page
+            max_retries: Maximum number of retries for failed requests
+            retry_delay: Base delay for exponential backoff between retries (seconds)
+            sort_by: Field to sort by
+            sort_direction: Sort direction (ASC or DESC)
+            resume: Continue from an unfinished journal if one exists
+            filters: Extra query parameters, e.g. {'region': 'NCR'}
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'metadata': {
-                        'total_projects_in_file': len(chunk),
-                        'file_number': i + 1,
-                        'total_files': num_files,
-                        'records_range': f"{start_idx + 1}-{end_idx}",
-                        'total_projects': total_projects,
-                        'scraped_at': timestamp,
-                        'source': 'DIME Philippines Dashboard',
-                        'url': self.base_url
-                    },
-                    'projects': chunk
-                }, f, ensure_ascii=False, indent=2)
+        Returns:
+            Summary with the number of projects written, the part files and
+            whether the scrape reached the last page
+        """
+        prefix = prefix or self.status_prefix(status, filters)
+        journal = ScrapeJournal.for_scrape(self.output_dir, prefix, sort_by, sort_direction)
+        state = journal.load(status, sort_by, sort_direction) if resume else None
+        
+        if state and state['records_written'] != len(state['parts']) * self.records_per_file:
+            logger.warning("Journal was written with a different records_per_file, starting over")
+            state = None
+        
+        if state:
+            per_page = state['per_page']
+            start_page, skip = journal.resume_point()
+            existing_files = journal.part_files
+            logger.info(f"Resuming {prefix} from page {start_page} "
+                        f"({state['records_written']} projects already in {len(existing_files)} files)")
+            writer = self._part_writer(prefix, timestamp=state['timestamp'],
+                                       existing_files=existing_files,
+                                       on_part_written=journal.record_part)
+        else:
+            start_page, skip = 1, 0
+            per_page = self._resolve_per_page(status, per_page)
+            writer = self._part_writer(prefix, on_part_written=journal.record_part)
+            journal.start(status, sort_by, sort_direction, per_page, writer.timestamp)
+        
+        pages = self.iter_pages(status, per_page, max_retries, retry_delay,
+                                sort_by=sort_by, sort_direction=sort_direction,
+                                start_page=start_page, raise_on_failure=True, filters=filters)
+        try:
+            for page, projects, meta in pages:
+                if writer.expected_total is None and meta.get('total'):
+                    writer.expected_total = meta['total']
+                if skip:
+                    # These records were already written before the interruption
+                    projects = projects[skip:]
+                    skip = 0
+                writer.write(projects)
+                for sink in self.sinks:
+                    sink.write(projects)
+                logger.info(f"Retrieved {len(projects)} projects from page {page}. Total so far: {writer.total_received}")
+        except PageFetchError as e:
+            writer.abort()
+            logger.error(f"Scrape of {prefix} stopped at page {e.page}; "
+                         f"rerun to resume from page {journal.resume_point()[0]}")
+            return {
+                'total_projects': writer.total_written,
+                'files': writer.files,
+                'complete': False
+            }
+        except BaseException:
+            writer.abort()
+            raise
+        
+        writer.close()
+        journal.finish()
+        
+        return {
+            'total_projects': writer.total_written,
+            'files': writer.files,
+            'complete': True
+        }
+    
+    def scrape_incremental(self, status: Optional[str] = None,
+                           prefix: Optional[str] = None,
+                           index_path: Optional[str] = None,
+                           per_page: int = 100,
+                           max_retries: int = 3,
+                           retry_delay: int = 5,
+                           unchanged_pages_to_stop: int = 1,
+                           full: bool = False) -> Dict:
+        """
+        Fetch only what changed since the last run and save it as a delta file
+        
+        Pages are requested sorted by lastUpdatedProjectCost (newest first)
+        and compared against a local index of id -> content hash and
+        timestamp. The crawl stops once `unchanged_pages_to_stop` consecutive
+        pages contain no new or changed projects and only projects updated
+        before the newest timestamp of the last run (so every later update
+        has been seen), provided `meta.total` agrees with the index;
+        otherwise (or with full=True) every page is fetched and projects that
+        disappeared from the API are reported as removed.
+        
+        Args:
+            status: Project status filter
+            prefix: Prefix for output filenames (defaults to status_prefix(status))
+            index_path: Location of the project index (defaults to a hidden
+                file next to the part files)
+            per_page: Records per page
+            max_retries: Maximum number of retries for failed requests
+            retry_delay: Base delay for exponential backoff between retries (seconds)
+            unchanged_pages_to_stop: Consecutive unchanged pages that end the crawl
+            full: Always crawl every page (also detects removals)
             
-            logger.info(f"Saved {len(chunk)} projects to {filename}")
+        Returns:
+            Summary with inserted/updated/removed counts, pages fetched and the
+            delta file (None when nothing changed)
+        """
+        prefix = prefix or self.status_prefix(status)
+        index = ProjectIndex(Path(index_path) if index_path else
+                             self.output_dir / f".{prefix}_index.json").load()
+        
+        newest_known = index.newest_update()
+        
+        inserted, updated = [], []
+        seen_ids = set()
+        unchanged_pages = 0
+        pages_fetched = 0
+        reached_end = True
+        
+        pages = self.iter_pages(status, per_page, max_retries, retry_delay,
+                                sort_by=UPDATED_FIELD, sort_direction="DESC",
+                                raise_on_failure=True)
+        try:
+            for page, projects, meta in pages:
+                pages_fetched += 1
+                changed = 0
+                for project in projects:
+                    seen_ids.add(str(project.get('id')))
+                    change = index.classify(project)
+                    if change == 'inserted':
+                        inserted.append(project)
+                    elif change == 'updated':
+                        updated.append(project)
+                    if change:
+                        changed += 1
+                
+                logger.info(f"Page {page}: {changed} new or changed of {len(projects)} projects")
+                
+                # Only a page entirely older than the last run proves that the
+                # remaining pages hold no later updates; projects without a
+                # timestamp carry no ordering information
+                times = [update_time(p.get(UPDATED_FIELD)) for p in projects]
+                if changed or not all(t is not None and (newest_known is None or t < newest_known)
+                                      for t in times):
+                    unchanged_pages = 0
+                    continue
+                unchanged_pages += 1
+                
+                expected_total = len(index) + len(inserted)
+                if not full and unchanged_pages >= unchanged_pages_to_stop:
+                    if meta.get('total') in (None, expected_total):
+                        logger.info(f"Stopping after {unchanged_pages} unchanged page(s)")
+                        reached_end = False
+                        break
+                    if unchanged_pages == unchanged_pages_to_stop:
+                        logger.info(f"API reports {meta.get('total')} projects but index expects "
+                                    f"{expected_total}; crawling all pages to find removals")
+        except PageFetchError as e:
+            logger.error(f"Incremental scrape stopped at page {e.page}; index left unchanged")
+            return {
+                'inserted': len(inserted),
+                'updated': len(updated),
+                'removed': 0,
+                'pages_fetched': pages_fetched,
+                'delta_file': None,
+                'complete': False
+            }
+        finally:
+            pages.close()
+        
+        removed = []
+        if reached_end:
+            removed = [int(k) if k.isdigit() else k for k in index.entries if k not in seen_ids]
+        
+        delta_file = None
+        if inserted or updated or removed:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            delta_file = self.output_dir / f"{prefix}_delta_{timestamp}.json"
+            write_delta_file(delta_file, inserted, updated, removed, {
+                'inserted': len(inserted),
+                'updated': len(updated),
+                'removed': len(removed),
+                'pages_fetched': pages_fetched,
+                'full_crawl': reached_end,
+                'scraped_at': timestamp,
+                'source': 'DIME Philippines Dashboard',
+                'url': self.base_url
+            })
+        else:
+            logger.info("No changes since the last run")
+        
+        index.apply(inserted, updated, removed)
+        index.save()
+        
+        return {
+            'inserted': len(inserted),
+            'updated': len(updated),
+            'removed': len(removed),
+            'pages_fetched': pages_fetched,
+            'delta_file': delta_file,
+            'complete': True
+        }
     
-    def scrape_by_status(self, statuses: List[str] = None):
+    def scrape_by_status(self, statuses: List[str] = None,
+                         partitions: Optional[List[Dict[str, Any]]] = None,
+                         max_parallel: int = 1,
+                         dedupe: bool = True,
+                         per_page: int = 100) -> List[Dict]:
         """
         Scrape projects filtered by multiple statuses
         
+        Every status (times every extra filter in `partitions`) is scraped
+        into its own part files, with the same prefixes as a single-status
+        scrape. Up to `max_parallel` partitions run at once; they share this
+        scraper's transport, connection pool and token bucket, so the overall
+        request rate stays within `requests_per_second`.
+        
         Args:
             statuses: List of status filters (e.g., ["Completed", "Incomplete"])
+            partitions: Extra query parameters to split each status by,
+                e.g. [{'region': 'NCR'}, {'region': 'CALABARZON'}]
+            max_parallel: Number of partitions scraped concurrently
+            dedupe: Drop records whose id already appears in an earlier
+                partition (or earlier in the same one) once all are done
+            per_page: Records per page
+        
+        Returns:
+            One scrape_to_files summary per partition, in partition order,
+            with `status`, `filters`, `prefix` and `duplicates_removed` added
         """
         if statuses is None:
             statuses = [None]  # Will fetch all projects without filter
         
-        for status in statuses:
-            logger.info(f"{'='*60}")
-            logger.info(f"Starting scrape for status: {status or 'All'}")
-            logger.info(f"{'='*60}")
+        jobs = [(status, filters) for status in statuses for filters in (partitions or [None])]
+        max_parallel = max(1, min(max_parallel, len(jobs)))
+        self.transport.resize(self.concurrency * max_parallel)
+        
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='dime-partition') as executor:
+            results = list(executor.map(lambda job: self._scrape_partition(*job, per_page=per_page), jobs))
+        
+        if dedupe:
+            self.dedupe_partitions(results)
+        return results
+    
+    def _scrape_partition(self, status: Optional[str], filters: Optional[Dict[str, Any]],
+                          per_page: int = 100) -> Dict:
+        """Scrape one status/filter partition to part files, logging the outcome"""
+        prefix = self.status_prefix(status, filters)
+        logger.info(f"{'='*60}")
+        logger.info(f"Starting scrape for {prefix}")
+        logger.info(f"{'='*60}")
+        
+        try:
+            result = self.scrape_to_files(status=status, prefix=prefix, per_page=per_page, filters=filters)
             
-            try:
-                projects = self.scrape_all_projects(status=status)
+            if not result['complete']:
+                logger.warning(f"Scrape for {prefix} is incomplete "
+                               f"({result['total_projects']} projects on disk); rerun to resume")
+            elif result['total_projects']:
+                logger.info(f"Successfully scraped {result['total_projects']} projects for {prefix}")
+            else:
+                logger.warning(f"No projects found for {prefix}")
                 
-                if projects:
-                    status_prefix = f"dime_projects_{status.lower()}" if status else "dime_projects_all"
-                    self.save_projects_to_json(projects, prefix=status_prefix)
-                    logger.info(f"Successfully scraped {len(projects)} projects with status: {status or 'All'}")
-                else:
-                    logger.warning(f"No projects found for status: {status or 'All'}")
-                    
-            except Exception as e:
-                logger.error(f"Error scraping projects with status {status or 'All'}: {e}")
+        except Exception as e:
+            logger.error(f"Error scraping {prefix}: {e}")
+            result = {'total_projects': 0, 'files': [], 'complete': False, 'error': str(e)}
+        
+        result.update({'status': status, 'filters': filters, 'prefix': prefix, 'duplicates_removed': 0})
+        return result
+    
+    def dedupe_partitions(self, results: List[Dict]) -> int:
+        """
+        Remove records whose id was already written by an earlier partition
+        
+        Partitions are processed in order and the first copy of each id is
+        kept. Only partitions containing duplicates are rewritten: their part
+        files are streamed through a new PartFileWriter (same prefix and
+        timestamp) and replace the old ones. Incomplete partitions are left
+        alone so they can still be resumed.
+        
+        Args:
+            results: scrape_by_status summaries; `files`, `total_projects`
+                and `duplicates_removed` are updated in place
+        
+        Returns:
+            Number of duplicate records removed
+        """
+        seen = set()
+        removed = 0
+        for result in results:
+            if not result['complete'] or not result['files']:
+                continue
+            
+            keep = bytearray()
+            parts = list(iter_parts(result['files'], fields=('id',)))
+            errors = [part for part in parts if part['error']]
+            if errors:
+                logger.warning(f"Not deduplicating {result['prefix']}: "
+                               f"could not read {errors[0]['path'].name}: {errors[0]['error']}")
                 continue
+            for part in parts:
+                for project in part['projects']:
+                    project_id = project.get('id')
+                    keep.append(project_id is None or project_id not in seen)
+                    seen.add(project_id)
             
-            # Wait a bit between different status queries
-            if len(statuses) > 1:
-                time.sleep(2)
+            duplicates = len(keep) - sum(keep)
+            if duplicates:
+                self._rewrite_partition(result, keep)
+                result['duplicates_removed'] = duplicates
+                removed += duplicates
+                logger.info(f"Removed {duplicates} duplicate projects from {result['prefix']}")
+        return removed
+    
+    def _rewrite_partition(self, result: Dict, keep: bytearray):
+        """Rewrite a partition's part files with only the records flagged in `keep`"""
+        old_files = result['files']
+        timestamp = read_part_metadata(old_files[0]).get('scraped_at')
+        staging = self.output_dir / f".{result['prefix']}_dedupe"
+        shutil.rmtree(staging, ignore_errors=True)
+        
+        writer = PartFileWriter(staging, result['prefix'], records_per_file=self.records_per_file,
+                                base_url=self.base_url, timestamp=timestamp,
+                                expected_total=sum(keep), columnar_format=self.columnar_format,
+                                file_format=self.file_format, compression=self.compression,
+                                metrics=self.metrics)
+        with writer:
+            position = 0
+            for part in iter_parts(old_files):
+                projects = part['projects']
+                writer.write([project for i, project in enumerate(projects, position) if keep[i]])
+                position += len(projects)
+        
+        for path in old_files:
+            remove_part_file(path)
+            if self.columnar_format:
+                sidecar_path(path, f".{self.columnar_format}").unlink(missing_ok=True)
+        
+        # Part files, columnar copies and the NDJSON manifest
+        for path in staging.iterdir():
+            path.replace(self.output_dir / path.name)
+        staging.rmdir()
+        
+        result['files'] = [self.output_dir / path.name for path in writer.files]
+        result['total_projects'] = writer.total_written
 
 
 def main():
     """Main execution function"""
+    from .cli import configure_logging
+    
+    configure_logging(log_file='dime_scraper.log')
     logger.info("="*60)
     logger.info("DIME Philippines Dashboard Data Scraper")
     logger.info("TARGET: Collect at least 10,000 project records")
@@ -263,10 +923,15 @@ def main():
     logger.info("Scraping ALL projects to reach 10,000+ records...")
     scraper.scrape_by_status(statuses=[None])
     
+    scraper.metrics.log_summary()
+    for name in ("scrape_metrics.prom", "scrape_metrics.json"):
+        scraper.metrics.write(scraper.output_dir / name)
+    
     logger.info("="*60)
     logger.info("Scraping completed!")
     logger.info(f"Check the 'scraped_data' directory for output files")
     logger.info(f"Each file contains up to 1,000 records")
+    logger.info(f"Run metrics: scraped_data/scrape_metrics.prom and scrape_metrics.json")
     logger.info("="*60)
 
 
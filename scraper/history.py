@@ -0,0 +1,415 @@
+"""
+Change history of scraped DIME projects
+Ingests successive scrape runs (identified by the `scraped_at` timestamp in
+their part files' metadata) into an append-only SQLite store that keeps, per
+project id and field, only the runs in which the value changed. From it the
+value of a field as of any date, a project's cost / progress time series and
+the projects whose status changed between two runs are answered without
+reloading old snapshots. Projects that disappear from a complete run are
+recorded as removed.
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Sequence, Tuple, Union, Any
+
+from .schema import field_kind
+
+logger = logging.getLogger(__name__)
+
+# Fields tracked unless others are requested
+TRACKED_FIELDS = ('cost', 'utilizedAmount', 'status', 'latestProgress')
+
+# Pseudo-field recording whether a project is listed (1) or was removed (0)
+PRESENT_FIELD = '_present'
+
+SCRAPED_AT_FORMAT = "%Y%m%d_%H%M%S"
+
+# A run, given as its id, scraped_at timestamp ("20251123_065108"), an ISO
+# date or datetime string, or a date / datetime (the latest run at or before it)
+RunSelector = Union[int, str, date, datetime]
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    run_time TEXT NOT NULL,
+    projects INTEGER NOT NULL,
+    changes INTEGER NOT NULL,
+    complete INTEGER NOT NULL,
+    UNIQUE (prefix, scraped_at)
+)""",
+    """CREATE TABLE IF NOT EXISTS fields (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+)""",
+    """CREATE TABLE IF NOT EXISTS changes (
+    project_id INTEGER NOT NULL,
+    field_id INTEGER NOT NULL REFERENCES fields(id),
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    value,
+    PRIMARY KEY (project_id, field_id, run_id)
+) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_changes_run ON changes (run_id, field_id)",
+)
+
+
+def _run_time(scraped_at: str) -> str:
+    """ISO timestamp of a scraped_at value ("20251123_065108" -> "2025-11-23T06:51:08")"""
+    try:
+        return datetime.strptime(scraped_at, SCRAPED_AT_FORMAT).isoformat()
+    except ValueError:
+        return datetime.fromisoformat(scraped_at.replace('Z', '+00:00')).replace(tzinfo=None).isoformat()
+
+
+def _is_json(field: str) -> bool:
+    return field != PRESENT_FIELD and field_kind(field) in ('entity', 'entity_list', 'json')
+
+
+def _encode(field: str, value: Any) -> Any:
+    if value is not None and _is_json(field):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return value
+
+
+def _decode(field: str, value: Any) -> Any:
+    if value is not None and _is_json(field):
+        return json.loads(value)
+    return value
+
+
+class HistoryStore:
+    """Append-only store of per-field project changes across scrape runs"""
+
+    def __init__(self, path: str = "scraped_data/dime_history.sqlite",
+                 fields: Sequence[str] = TRACKED_FIELDS):
+        """
+        Open (and create if needed) the history database
+
+        Args:
+            path: SQLite database file
+            fields: Project fields whose changes are recorded
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in _SCHEMA:
+                self.conn.execute(statement)
+            for name in self.fields + (PRESENT_FIELD,):
+                self.conn.execute("INSERT OR IGNORE INTO fields (name) VALUES (?)", (name,))
+        self._field_ids = {row['name']: row['id'] for row in self.conn.execute("SELECT id, name FROM fields")}
+        self._field_names = {field_id: name for name, field_id in self._field_ids.items()}
+
+    def _latest_values(self) -> Dict[Tuple[int, int], Any]:
+        """(project id, field id) -> most recently recorded value (caller holds the lock)"""
+        # SQLite returns the bare `value` column from the row holding MAX(run_id)
+        rows = self.conn.execute(
+            "SELECT project_id, field_id, value, MAX(run_id) FROM changes GROUP BY project_id, field_id")
+        return {(row[0], row[1]): row[2] for row in rows}
+
+    def ingest_projects(self, projects: Iterable[Dict], scraped_at: str, prefix: str = "",
+                        complete: bool = True, removed: Iterable[int] = ()) -> Dict[str, Any]:
+        """
+        Record one scrape run
+
+        Only values that differ from the latest recorded ones are stored.
+        Runs must be ingested in chronological order; ingesting a run that
+        is already in the store does nothing.
+
+        Args:
+            projects: Project records of the run (a later record with the
+                same id replaces an earlier one)
+            scraped_at: The run's timestamp, as in the part files' metadata
+            prefix: The run's part-file prefix
+            complete: Whether the run listed every project, so projects
+                missing from it are recorded as removed
+            removed: Ids of projects known to be removed (e.g. from a delta)
+
+        Returns:
+            Dict with the run's `run_id`, `projects` count and `changes` stored
+            (None for `run_id` if the run was already ingested)
+
+        Raises:
+            ValueError: If the run is older than the latest ingested run
+        """
+        run_time = _run_time(scraped_at)
+        latest = {}
+        for project in projects:
+            if project.get('id') is not None:
+                latest[project['id']] = project
+
+        with self._lock:
+            existing = self.conn.execute("SELECT id FROM runs WHERE prefix = ? AND scraped_at = ?",
+                                         (prefix, scraped_at)).fetchone()
+            if existing is not None:
+                logger.info(f"Run {prefix or '-'} {scraped_at} is already in the history")
+                return {'run_id': None, 'projects': len(latest), 'changes': 0}
+            newest = self.conn.execute("SELECT MAX(run_time) FROM runs").fetchone()[0]
+            if newest is not None and run_time < newest:
+                raise ValueError(f"Run {scraped_at} is older than the latest ingested run ({newest})")
+
+            state = self._latest_values()
+            present_id = self._field_ids[PRESENT_FIELD]
+            rows = []
+            for project_id, project in latest.items():
+                if state.get((project_id, present_id)) != 1:
+                    rows.append((project_id, present_id, 1))
+                for field in self.fields:
+                    if field not in project:
+                        continue
+                    field_id = self._field_ids[field]
+                    value = _encode(field, project[field])
+                    key = (project_id, field_id)
+                    if key not in state or state[key] != value:
+                        rows.append((project_id, field_id, value))
+            gone = set(removed)
+            if complete:
+                gone.update(project_id for (project_id, field_id), value in state.items()
+                            if field_id == present_id and value == 1)
+            rows.extend((project_id, present_id, 0) for project_id in gone - set(latest)
+                        if state.get((project_id, present_id)) == 1)
+
+            with self.conn:
+                run_id = self.conn.execute(
+                    "INSERT INTO runs (prefix, scraped_at, run_time, projects, changes, complete) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (prefix, scraped_at, run_time, len(latest), len(rows), int(complete))).lastrowid
+                self.conn.executemany(
+                    "INSERT INTO changes (project_id, field_id, run_id, value) VALUES (?, ?, ?, ?)",
+                    [(project_id, field_id, run_id, value) for project_id, field_id, value in rows])
+        logger.info(f"Recorded run {prefix or '-'} {scraped_at}: {len(latest)} projects, {len(rows)} changes")
+        return {'run_id': run_id, 'projects': len(latest), 'changes': len(rows)}
+
+    def ingest_files(self, files: Iterable[Path], scraped_at: str, prefix: str = "",
+                     complete: bool = True, workers: Optional[int] = None) -> Dict[str, Any]:
+        """Record a scrape run from its part files (see ingest_projects)"""
+        from .loader import iter_projects
+
+        projects = iter_projects(files, fields=('id',) + self.fields, workers=workers)
+        return self.ingest_projects(projects, scraped_at, prefix, complete)
+
+    def ingest_delta(self, path: Path) -> Dict[str, Any]:
+        """Record a delta file written by DIMEScraper.scrape_incremental as a run"""
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        prefix = path.name.split('_delta_')[0]
+        return self.ingest_projects(delta.get('inserted', []) + delta.get('updated', []),
+                                    delta.get('metadata', {}).get('scraped_at', ''), prefix,
+                                    complete=False, removed=delta.get('removed', []))
+
+    def ingest(self, data_dir: str = "scraped_data", prefix: Optional[str] = None,
+               workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Record every scrape run found in a directory that is not yet in the store
+
+        Runs older than the latest ingested run are skipped with a warning.
+        Only complete part-file sets mark missing projects as removed, so
+        give `prefix` when the directory also holds filtered scrapes (e.g.
+        by status) that list a subset of the projects.
+
+        Args:
+            data_dir: Directory holding the scraped part files
+            prefix: Only ingest runs with this part-file prefix
+            workers: Number of parser processes used when reading part files
+
+        Returns:
+            One ingest_projects() result per run recorded
+        """
+        from .loader import discover_datasets
+
+        with self._lock:
+            known = {(row['prefix'], row['scraped_at']) for row in self.conn.execute("SELECT * FROM runs")}
+            newest = self.conn.execute("SELECT MAX(run_time) FROM runs").fetchone()[0]
+
+        results = []
+        for dataset in reversed(discover_datasets(data_dir)):
+            if prefix is not None and dataset.prefix != prefix:
+                continue
+            if (dataset.prefix, dataset.scraped_at) in known:
+                continue
+            if newest is not None and _run_time(dataset.scraped_at) < newest:
+                logger.warning(f"Skipping run {dataset.prefix} {dataset.scraped_at}: "
+                               f"older than the latest ingested run")
+                continue
+            results.append(self.ingest_files(dataset.files, dataset.scraped_at, dataset.prefix,
+                                             complete=dataset.is_complete, workers=workers))
+        return results
+
+    def runs(self) -> List[Dict]:
+        """Ingested runs, oldest first"""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM runs ORDER BY run_time, id").fetchall()
+        return [dict(row, complete=bool(row['complete'])) for row in rows]
+
+    def resolve_run(self, when: Optional[RunSelector] = None) -> Optional[int]:
+        """
+        Id of the run a selector refers to
+
+        Args:
+            when: Run id, scraped_at timestamp, or a date / datetime (or ISO
+                string) meaning the latest run at or before it; a date
+                includes runs during that day. None means the latest run.
+
+        Returns:
+            The run id, or None if no run matches
+        """
+        if isinstance(when, int):
+            return when
+        with self._lock:
+            if isinstance(when, str):
+                row = self.conn.execute("SELECT id FROM runs WHERE scraped_at = ? ORDER BY id DESC",
+                                        (when,)).fetchone()
+                if row is not None:
+                    return row[0]
+                when = date.fromisoformat(when) if len(when) == 10 else _run_time(when)
+            if isinstance(when, datetime):
+                when = when.replace(tzinfo=None).isoformat()
+            elif isinstance(when, date):
+                when = datetime.combine(when, time.max).isoformat()
+            if when is None:
+                row = self.conn.execute("SELECT id FROM runs ORDER BY run_time DESC, id DESC").fetchone()
+            else:
+                row = self.conn.execute("SELECT id FROM runs WHERE run_time <= ? ORDER BY run_time DESC, id DESC",
+                                        (when,)).fetchone()
+        return row[0] if row is not None else None
+
+    def project_as_of(self, project_id: int, when: Optional[RunSelector] = None) -> Optional[Dict]:
+        """
+        Tracked fields of a project as they were at a run
+
+        Returns:
+            field -> value, or None if the project was not listed then
+        """
+        run_id = self.resolve_run(when)
+        if run_id is None:
+            return None
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT field_id, value, MAX(run_id) FROM changes "
+                "WHERE project_id = ? AND run_id <= ? GROUP BY field_id", (project_id, run_id)).fetchall()
+        values = {self._field_names[row[0]]: row[1] for row in rows}
+        if values.pop(PRESENT_FIELD, 0) != 1:
+            return None
+        return {field: _decode(field, value) for field, value in values.items()}
+
+    def value_as_of(self, project_id: int, field: str, when: Optional[RunSelector] = None) -> Any:
+        """
+        Value of one field of a project at a run, e.g.
+        value_as_of(1234, 'status', date(2025, 6, 30))
+
+        Returns:
+            The value, or None if the project was not listed then
+        """
+        values = self.project_as_of(project_id, when)
+        return values.get(field) if values else None
+
+    def history(self, project_id: int, field: str) -> List[Dict]:
+        """
+        Time series of one field of a project
+
+        Returns:
+            One dict per change, oldest first, with `scraped_at`, `run_time` and `value`
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT r.scraped_at, r.run_time, c.value FROM changes c JOIN runs r ON r.id = c.run_id "
+                "WHERE c.project_id = ? AND c.field_id = ? ORDER BY c.run_id",
+                (project_id, self._field_ids[field])).fetchall()
+        return [{'scraped_at': row[0], 'run_time': row[1], 'value': _decode(field, row[2])} for row in rows]
+
+    def changed_between(self, start: Optional[RunSelector] = None, end: Optional[RunSelector] = None,
+                        field: str = 'status') -> List[Dict]:
+        """
+        Projects whose field differs between two runs
+
+        Values that changed and changed back in between are not reported.
+
+        Args:
+            start: Earlier run (defaults to the run before `end`)
+            end: Later run (defaults to the latest run)
+            field: Tracked field to compare (PRESENT_FIELD for projects
+                added or removed)
+
+        Returns:
+            Dicts with `id`, `before` and `after` (None before a project
+            first appeared), ordered by id
+        """
+        end_id = self.resolve_run(end)
+        if end_id is None:
+            return []
+        if start is None:
+            with self._lock:
+                row = self.conn.execute("SELECT MAX(id) FROM runs WHERE id < ?", (end_id,)).fetchone()
+            start_id = row[0] if row[0] is not None else 0
+        else:
+            start_id = self.resolve_run(start) or 0
+
+        field_id = self._field_ids[field]
+        as_of = ("(SELECT value FROM changes v WHERE v.project_id = c.project_id AND v.field_id = ? "
+                 "AND v.run_id <= ? ORDER BY v.run_id DESC LIMIT 1)")
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT c.project_id, {as_of} AS before, {as_of} AS after FROM "
+                f"(SELECT DISTINCT project_id FROM changes WHERE field_id = ? AND run_id > ? AND run_id <= ?) c "
+                f"WHERE before IS NOT after ORDER BY c.project_id",
+                (field_id, start_id, field_id, end_id, field_id, start_id, end_id)).fetchall()
+        return [{'id': row[0], 'before': _decode(field, row[1]), 'after': _decode(field, row[2])}
+                for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of runs, distinct projects and stored changes"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT (SELECT COUNT(*) FROM runs), (SELECT COUNT(DISTINCT project_id) FROM changes), "
+                "(SELECT COUNT(*) FROM changes)").fetchone()
+        return {'runs': row[0], 'projects': row[1], 'changes': row[2]}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Record and query the change history of scraped DIME projects")
+    parser.add_argument('data_dir', help="Directory with scraped part files")
+    parser.add_argument('--db', help="History database (default: <data_dir>/dime_history.sqlite)")
+    parser.add_argument('--prefix', help="Only ingest runs with this part-file prefix")
+    parser.add_argument('--project', type=int, help="Print the history of this project id")
+    parser.add_argument('--field', default='status', help="Field to report changes of")
+    args = parser.parse_args(argv)
+
+    with HistoryStore(args.db or str(Path(args.data_dir) / "dime_history.sqlite")) as store:
+        store.ingest(args.data_dir, prefix=args.prefix)
+        stats = store.stats()
+        print(f"History: {stats['runs']} runs, {stats['projects']:,} projects, {stats['changes']:,} changes")
+        if args.project is not None:
+            for change in store.history(args.project, args.field):
+                print(f"   {change['run_time']}: {change['value']}")
+        else:
+            changes = store.changed_between(field=args.field)
+            print(f"{len(changes)} projects changed {args.field} in the latest run")
+            for change in changes[:20]:
+                print(f"   [{change['id']}] {change['before']} -> {change['after']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+On-disk cache of API responses
+Stores response bodies keyed on the request URL and its full query
+parameters, so repeated runs replay unchanged pages from disk. Entries are
+fresh for a configurable TTL; after that they are revalidated with the
+server's ETag / Last-Modified validators when it provided them. The cache
+is bounded in size and evicts least recently used entries first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from .decoding import loads
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(url: str, params: Dict[str, Any]) -> str:
+    """Stable key for a request: URL plus sorted query parameters"""
+    canonical = json.dumps([url, sorted((str(k), str(v)) for k, v in params.items())])
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CacheEntry:
+    """One cached response"""
+
+    def __init__(self, key: str, body: bytes, stored_at: float,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.key = key
+        self.body = body
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def json(self) -> Any:
+        return loads(self.body)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of response bodies in a directory"""
+
+    def __init__(self, directory: str = "scraped_data/.http_cache",
+                 ttl: float = 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        """
+        Open (and create if needed) the cache directory
+
+        Args:
+            directory: Where cached responses are stored
+            ttl: Seconds a response is served without asking the server
+            max_bytes: Total size of cached bodies before LRU eviction
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> [size in bytes, last access time, stored at]; access times persist as file mtimes
+        self._index: Dict[str, list] = {}
+        self._total_bytes = 0
+        for path in self.directory.glob("*.body"):
+            try:
+                with open(self._paths(path.stem)[1], 'r', encoding='utf-8') as f:
+                    stored_at = json.load(f)['stored_at']
+                stat = path.stat()
+            except (OSError, ValueError, KeyError):
+                continue
+            self._index[path.stem] = [stat.st_size, stat.st_mtime, stored_at]
+            self._total_bytes += stat.st_size
+
+    def count(self, outcome: str):
+        """
+        Count a lookup (called from concurrent page fetches)
+
+        Args:
+            outcome: 'hits', 'revalidated' or 'misses'
+        """
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def _paths(self, key: str):
+        return self.directory / f"{key}.body", self.directory / f"{key}.meta.json"
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def is_fresh(self, url: str, params: Dict[str, Any]) -> bool:
+        """Whether a response can be served without contacting the server"""
+        with self._lock:
+            info = self._index.get(cache_key(url, params))
+        return info is not None and time.time() - info[2] < self.ttl
+
+    def fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl
+
+    def get(self, url: str, params: Dict[str, Any], touch: bool = True) -> Optional[CacheEntry]:
+        """
+        Look up a cached response (fresh or stale)
+
+        Args:
+            url: Request URL without query string
+            params: Query parameters
+            touch: Mark the entry as recently used
+
+        Returns:
+            The entry, or None if nothing is cached for this request
+        """
+        key = cache_key(url, params)
+        with self._lock:
+            if key not in self._index:
+                return None
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            self._discard(key)
+            return None
+        if touch:
+            self._touch(key)
+        return CacheEntry(key, body, meta['stored_at'], meta.get('etag'), meta.get('last_modified'))
+
+    def put(self, url: str, params: Dict[str, Any], body: bytes,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheEntry:
+        """Store a response body, evicting old entries if over the size limit"""
+        key = cache_key(url, params)
+        entry = CacheEntry(key, body, time.time(), etag, last_modified)
+        self._write(entry, url, params)
+        with self._lock:
+            previous = self._index.get(key)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._index[key] = [len(body), time.time(), entry.stored_at]
+            self._total_bytes += len(body)
+        self._evict()
+        return entry
+
+    def refresh(self, entry: CacheEntry, url: str, params: Dict[str, Any]):
+        """Restart an entry's TTL after the server confirmed it (304 Not Modified)"""
+        entry.stored_at = time.time()
+        self._write(entry, url, params, body=False)
+        with self._lock:
+            if entry.key in self._index:
+                self._index[entry.key][2] = entry.stored_at
+        self._touch(entry.key)
+
+    def _write(self, entry: CacheEntry, url: str, params: Dict[str, Any], body: bool = True):
+        body_path, meta_path = self._paths(entry.key)
+        meta = {'url': url, 'params': params, 'stored_at': entry.stored_at,
+                'etag': entry.etag, 'last_modified': entry.last_modified}
+        # Write to temporary names first so readers never see half a file
+        if body:
+            tmp_body = body_path.with_name(body_path.name + f".{threading.get_ident()}.tmp")
+            tmp_body.write_bytes(entry.body)
+            os.replace(tmp_body, body_path)
+        tmp_meta = meta_path.with_name(meta_path.name + f".{threading.get_ident()}.tmp")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def _touch(self, key: str):
+        now = time.time()
+        with self._lock:
+            if key in self._index:
+                self._index[key][1] = now
+        try:
+            os.utime(self._paths(key)[0], (now, now))
+        except OSError:
+            pass
+
+    def _discard(self, key: str):
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous:
+                self._total_bytes -= previous[0]
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+    def _evict(self):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                victims.append(key)
+                self._total_bytes -= size
+            for key in victims:
+                del self._index[key]
+        for key in victims:
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+        logger.info(f"Evicted {len(victims)} cached responses")
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            keys = list(self._index)
+        for key in keys:
+            self._discard(key)
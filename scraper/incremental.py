@@ -0,0 +1,114 @@
+"""
+Incremental (delta) scraping support for the DIME scraper
+Keeps a local index of project id -> content hash and lastUpdatedProjectCost
+so that a refresh only needs the pages containing new or changed projects.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Dict, Optional, Any
+
+from .schema import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+UPDATED_FIELD = 'lastUpdatedProjectCost'
+
+
+def update_time(value: Any) -> Optional[int]:
+    """lastUpdatedProjectCost in milliseconds since the epoch, or None if absent or unparseable"""
+    try:
+        return parse_timestamp(value)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def project_hash(project: Dict) -> str:
+    """Stable content hash of a project record"""
+    payload = json.dumps(project, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ProjectIndex:
+    """Local index of project id -> [content hash, lastUpdatedProjectCost]"""
+
+    def __init__(self, path: Path):
+        """
+        Initialize the index
+
+        Args:
+            path: JSON file the index is persisted to
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, List[Optional[str]]] = {}
+
+    def load(self) -> 'ProjectIndex':
+        """Load the index from disk (an absent file means an empty index)"""
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('projects', {})
+            logger.info(f"Loaded index of {len(self.entries)} projects from {self.path.name}")
+        return self
+
+    def save(self):
+        """Write the index atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'projects': self.entries}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def newest_update(self) -> Optional[int]:
+        """Latest lastUpdatedProjectCost in the index (milliseconds), or None if none is known"""
+        times = [t for t in (update_time(entry[1]) for entry in self.entries.values()) if t is not None]
+        return max(times) if times else None
+
+    def classify(self, project: Dict) -> Optional[str]:
+        """
+        Compare a fetched project with the index
+
+        Returns:
+            'inserted', 'updated', or None if the project is unchanged
+        """
+        entry = self.entries.get(str(project.get('id')))
+        if entry is None:
+            return 'inserted'
+        if entry[0] != project_hash(project):
+            return 'updated'
+        return None
+
+    def apply(self, inserted: List[Dict], updated: List[Dict], removed: List[str]):
+        """Apply a delta to the index"""
+        for project in inserted + updated:
+            self.entries[str(project.get('id'))] = [project_hash(project), project.get(UPDATED_FIELD)]
+        for project_id in removed:
+            self.entries.pop(str(project_id), None)
+
+
+def write_delta_file(path: Path, inserted: List[Dict], updated: List[Dict],
+                     removed: List[str], metadata: Dict):
+    """
+    Write a delta file with the inserted, updated and removed projects
+
+    Args:
+        path: Output file path
+        inserted: Projects not present in the index before this run
+        updated: Projects whose content changed since the last run
+        removed: Ids of projects no longer returned by the API
+        metadata: File-level metadata (timestamps, source, counts)
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadata': metadata,
+            'inserted': inserted,
+            'updated': updated,
+            'removed': removed
+        }, f, ensure_ascii=False, indent=2)
+    logger.info(f"Saved delta ({len(inserted)} inserted, {len(updated)} updated, "
+                f"{len(removed)} removed) to {Path(path).name}")
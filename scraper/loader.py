@@ -0,0 +1,316 @@
+"""
+Loader for scraped DIME part files
+Discovers part-file sets from their `metadata` blocks, parses them in
+parallel across processes, and either yields records lazily or materialises
+selected fields into compact arrays.
+"""
+
+import logging
+import os
+import re
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Sequence, Tuple
+
+from .partio import is_part_file, read_part_file, read_part_metadata
+from .schema import field_kind
+
+logger = logging.getLogger(__name__)
+
+PART_FILE_PATTERN = "*_part_*_of_*"
+_PART_NAME = re.compile(r'^(?P<prefix>.+)_(?P<timestamp>\d{8}_\d{6})_part_(?P<number>\d+)_of_(?P<total>\d+)'
+                        r'\.(nd)?json(\.gz|\.zst)?$')
+
+
+class PartFileSet:
+    """One scrape run's worth of part files (same prefix and scraped_at)"""
+
+    def __init__(self, prefix: str, scraped_at: str, total_files: int, total_projects: Optional[int]):
+        self.prefix = prefix
+        self.scraped_at = scraped_at
+        self.total_files = total_files
+        self.total_projects = total_projects
+        self.files: List[Path] = []
+        self._numbers: List[int] = []
+
+    def add(self, path: Path, file_number: int):
+        self.files.append(path)
+        self._numbers.append(file_number)
+
+    def sort(self):
+        order = sorted(range(len(self.files)), key=lambda i: self._numbers[i])
+        self.files = [self.files[i] for i in order]
+        self._numbers = [self._numbers[i] for i in order]
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether every part file 1..total_files is present"""
+        return self._numbers == list(range(1, self.total_files + 1))
+
+    def __repr__(self) -> str:
+        return (f"PartFileSet(prefix={self.prefix!r}, scraped_at={self.scraped_at!r}, "
+                f"files={len(self.files)}/{self.total_files})")
+
+
+def find_part_files(data_dir: str) -> List[Path]:
+    """
+    Find all part files under a directory
+
+    Matches JSON, compact JSON and NDJSON part files, compressed or not;
+    hidden files (temporaries, journals) are skipped.
+
+    Args:
+        data_dir: Directory to search (recursively)
+
+    Returns:
+        Sorted list of part file paths
+    """
+    return sorted(path for path in Path(data_dir).glob(f"**/{PART_FILE_PATTERN}")
+                  if is_part_file(path) and not path.name.startswith('.'))
+
+
+def source_signatures(files: Iterable[Path]) -> List[List]:
+    """
+    (file name, size, mtime_ns) of each part file, recorded in the metadata
+    of files derived from them (snapshots, indexes, cubes)
+
+    Only the file name is kept (part-file names carry their prefix and
+    timestamp, so they are unique within a data directory), so the derived
+    files stay valid when the directory is moved or spelled differently.
+
+    Args:
+        files: Part files
+
+    Returns:
+        One [name, size, mtime_ns] list per file (JSON-serialisable)
+    """
+    signatures = []
+    for path in files:
+        path = Path(path)
+        stat = path.stat()
+        signatures.append([path.name, stat.st_size, stat.st_mtime_ns])
+    return signatures
+
+
+def new_part_files(path: Path, files: Sequence[Path], recorded_files: Sequence) -> Optional[List[Path]]:
+    """
+    Part files added since a derived file was built
+
+    Args:
+        path: The derived file (named in the log message)
+        files: Part files now on disk
+        recorded_files: source_signatures() stored when it was built
+
+    Returns:
+        The part files it does not cover yet, or None if one it was built
+        from has changed or disappeared (it must then be rebuilt)
+    """
+    current = {name: signature for name, *signature in source_signatures(files)}
+    recorded = set()
+    for entry in recorded_files:
+        # Older files recorded only the paths
+        if not isinstance(entry, list) or current.get(entry[0]) != entry[1:]:
+            logger.info(f"Part files changed since {path} was built, rebuilding")
+            return None
+        recorded.add(entry[0])
+    return [f for f in files if Path(f).name not in recorded]
+
+
+def is_current(path: Path, files: Sequence[Path], recorded_files: Sequence) -> bool:
+    """
+    Whether a derived file was built from exactly these part files, unchanged
+
+    Args:
+        path: The derived file (named in the log message)
+        files: Part files now on disk
+        recorded_files: source_signatures() stored when it was built
+    """
+    added = new_part_files(path, files, recorded_files)
+    if added:
+        logger.info(f"Part files added since {path} was built, rebuilding")
+    return added == []
+
+
+def discover_datasets(data_dir: str) -> List[PartFileSet]:
+    """
+    Group part files into scrape runs using their metadata blocks
+
+    Args:
+        data_dir: Directory to search (recursively)
+
+    Returns:
+        Part-file sets, newest scrape first
+    """
+    datasets: Dict[Tuple[str, str, str], PartFileSet] = {}
+
+    for path in find_part_files(data_dir):
+        match = _PART_NAME.match(path.name)
+        metadata = read_part_metadata(path)
+        prefix = match.group('prefix') if match else path.stem
+        scraped_at = metadata.get('scraped_at') or (match.group('timestamp') if match else '')
+        file_number = metadata.get('file_number') or (int(match.group('number')) if match else 1)
+        total_files = metadata.get('total_files') or (int(match.group('total')) if match else 1)
+
+        key = (str(path.parent), prefix, scraped_at)
+        if key not in datasets:
+            datasets[key] = PartFileSet(prefix, scraped_at, total_files, metadata.get('total_projects'))
+        datasets[key].add(path, file_number)
+
+    result = list(datasets.values())
+    for dataset in result:
+        dataset.sort()
+    result.sort(key=lambda d: (d.scraped_at, d.prefix), reverse=True)
+    return result
+
+
+def load_part(path: Path) -> Dict:
+    """
+    Load one part file (any encoding)
+
+    Returns:
+        Dict with `metadata` and `projects` keys
+    """
+    return read_part_file(path)
+
+
+def _select_fields(projects: List[Dict], fields: Optional[Sequence[str]]) -> List[Dict]:
+    if fields is None:
+        return projects
+    return [{field: project[field] for field in fields if field in project} for project in projects]
+
+
+def _load_part_worker(path: Path, fields: Optional[Sequence[str]], compact: bool = False) -> Dict:
+    """Process-pool entry point: load a part file, trimming it to `fields`"""
+    try:
+        content = load_part(path)
+    except Exception as e:
+        return {'path': path, 'metadata': {}, 'projects': [], 'error': str(e)}
+    projects = _select_fields(content['projects'], fields)
+    if compact:
+        from .models import compact_projects
+        projects = compact_projects(projects)
+    return {'path': path, 'metadata': content['metadata'], 'projects': projects, 'error': None}
+
+
+def _columns_worker(path: Path, fields: Sequence[str]) -> Dict[str, object]:
+    """Process-pool entry point: load a part file straight into column arrays"""
+    return _to_columns(load_part(path)['projects'], fields)
+
+
+def _to_columns(projects: List[Dict], fields: Sequence[str]) -> Dict[str, object]:
+    columns = {}
+    for field in fields:
+        values = [project.get(field) for project in projects]
+        kind = field_kind(field)
+        if kind == 'float':
+            columns[field] = array('d', [float('nan') if v is None else float(v) for v in values])
+        elif kind == 'int' and None not in values:
+            columns[field] = array('q', values)
+        else:
+            columns[field] = values
+    return columns
+
+
+def _default_workers(num_files: int) -> int:
+    return max(1, min(num_files, os.cpu_count() or 1))
+
+
+def _map_ordered(func, paths: Sequence[Path], args: tuple, workers: Optional[int]) -> Iterator:
+    """
+    Apply func(path, *args) to each path, yielding results in path order
+
+    Uses a process pool when more than one worker is requested; at most
+    2 * workers parsed files are held in memory at a time.
+    """
+    workers = workers or _default_workers(len(paths))
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield func(path, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        paths_iter = iter(paths)
+        pending = deque(executor.submit(func, path, *args)
+                        for path in islice(paths_iter, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            next_path = next(paths_iter, None)
+            if next_path is not None:
+                pending.append(executor.submit(func, next_path, *args))
+            yield result
+
+
+def iter_parts(files: Iterable[Path], fields: Optional[Sequence[str]] = None,
+               workers: Optional[int] = None, compact: bool = False) -> Iterator[Dict]:
+    """
+    Parse part files in parallel and yield them in order
+
+    Args:
+        files: Part files to load
+        fields: Only keep these project fields (reduces memory and the cost
+            of sending records back from worker processes)
+        workers: Number of worker processes (defaults to the CPU count;
+            1 parses in the current process)
+        compact: Return models.Project records with interned entities
+            instead of dicts (smaller, and cheaper to send between processes)
+
+    Yields:
+        Dicts with `path`, `metadata`, `projects` and `error` (None, or the
+        message if the file could not be parsed)
+    """
+    yield from _map_ordered(_load_part_worker, list(files), (fields, compact), workers)
+
+
+def iter_projects(files: Iterable[Path], fields: Optional[Sequence[str]] = None,
+                  workers: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Yield project records lazily from part files, in file order
+
+    Args:
+        files: Part files to load
+        fields: Only keep these project fields
+        workers: Number of worker processes
+
+    Raises:
+        ValueError: If a part file cannot be parsed
+    """
+    for part in iter_parts(files, fields, workers):
+        if part['error']:
+            raise ValueError(f"Could not load {part['path']}: {part['error']}")
+        yield from part['projects']
+
+
+def load_columns(files: Iterable[Path], fields: Sequence[str],
+                 workers: Optional[int] = None) -> Dict[str, object]:
+    """
+    Materialise selected fields of all part files into column arrays
+
+    Float fields (cost, utilizedAmount, latitude, ...) become array('d')
+    with NaN for nulls, non-null integer fields array('q'); other fields are
+    plain lists of values.
+
+    Args:
+        files: Part files to load
+        fields: Project fields to extract
+        workers: Number of worker processes
+
+    Returns:
+        Dict mapping field name to its column, all columns the same length
+    """
+    fields = list(fields)
+    merged: Dict[str, object] = {}
+    for columns in _map_ordered(_columns_worker, list(files), (fields,), workers):
+        for field, column in columns.items():
+            current = merged.get(field)
+            if current is None:
+                merged[field] = column
+            elif isinstance(current, list):
+                current.extend(column)
+            elif isinstance(current, array) and isinstance(column, array) and current.typecode == column.typecode:
+                current.extend(column)
+            else:
+                merged[field] = list(current) + list(column)
+    return merged
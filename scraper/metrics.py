@@ -0,0 +1,301 @@
+"""
+Instrumentation for scraper runs
+Collects per-request latency, bytes downloaded, retries, rate-limit waits,
+JSON decode time and part-file write time in thread-safe counters and
+histograms. Observations are passed to registered hooks as they happen, and
+the totals can be written at the end of a run as a Prometheus text file or a
+JSON summary, to tell whether a run is network-, parse- or disk-bound.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "dime_scraper"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (kind, help text)
+METRICS = {
+    'requests': ('counter', "HTTP requests sent to the API, by response status"),
+    'cache_hits': ('counter', "Pages served from the response cache without a request"),
+    'response_bytes': ('counter', "Response body bytes downloaded (before decompression)"),
+    'retries': ('counter', "Page fetch attempts that failed and were retried"),
+    'failed_pages': ('counter', "Pages that still failed after every retry"),
+    'pages': ('counter', "Pages fetched"),
+    'records': ('counter', "Project records fetched"),
+    'invalid_records': ('counter', "Fetched records that did not match the schema"),
+    'written_records': ('counter', "Project records written to part files"),
+    'written_bytes': ('counter', "Bytes written to part files"),
+    'request_seconds': ('histogram', "Time from sending a request to receiving the full body, by response status"),
+    'rate_limit_wait_seconds': ('histogram', "Time spent waiting on the token bucket per attempt"),
+    'decode_seconds': ('histogram', "Time spent decoding JSON response bodies (and validating them, with msgspec)"),
+    'validate_seconds': ('histogram', "Time spent checking decoded records against the schema"),
+    'write_seconds': ('histogram', "Time spent writing one part file"),
+    'connections_opened': ('gauge', "HTTP connections opened by the transport"),
+    'connections_reused': ('gauge', "Requests sent on an already open keep-alive connection"),
+}
+
+# Histograms whose sums make up the run's time breakdown
+_PHASES = {'request_seconds': 'network', 'rate_limit_wait_seconds': 'rate_limit',
+           'decode_seconds': 'decode', 'validate_seconds': 'validate', 'write_seconds': 'write'}
+
+Labels = Tuple[Tuple[str, str], ...]
+Hook = Callable[[str, float, Dict[str, str]], None]
+Collector = Callable[[], Dict[str, float]]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        pairs, running = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            pairs.append((bound, running))
+        pairs.append((float('inf'), self.count))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max if beyond the last bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, running in self.cumulative()[:-1]:
+            if running >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 6),
+            'buckets': {_format_bound(bound): running for bound, running in self.cumulative()},
+        }
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs) + '}'
+
+
+class ScrapeMetrics:
+    """Thread-safe counters and histograms for one or more scraper runs"""
+
+    def __init__(self, hooks: Optional[List[Hook]] = None):
+        """
+        Args:
+            hooks: Callables invoked as hook(name, value, labels) for every
+                observation, e.g. to forward them to another metrics system
+        """
+        self.hooks: List[Hook] = list(hooks or [])
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._collectors: List[Collector] = []
+
+    def add_hook(self, hook: Hook):
+        """Register a callable invoked as hook(name, value, labels) for every observation"""
+        self.hooks.append(hook)
+
+    def add_collector(self, collector: Collector):
+        """Register a callable returning {name: value} gauges read whenever metrics are exported"""
+        self._collectors.append(collector)
+
+    def gauges(self) -> Dict[str, float]:
+        """Current values of all collector gauges"""
+        values = {}
+        for collector in self._collectors:
+            try:
+                values.update(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
+        return values
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add to a counter"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._notify(name, amount, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one histogram observation (seconds)"""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+        self._notify(name, value, labels)
+
+    def _notify(self, name: str, value: float, labels: Dict[str, str]):
+        for hook in self.hooks:
+            try:
+                hook(name, value, labels)
+            except Exception as e:
+                logger.warning(f"Metrics hook {hook!r} failed: {e}")
+
+    def counter(self, name: str, **labels) -> float:
+        """Current value of a counter; without labels, summed over all label sets"""
+        wanted = _labels(labels)
+        with self._lock:
+            return sum(value for (n, l), value in self._counters.items()
+                       if n == name and (not labels or l == wanted))
+
+    def histogram(self, name: str) -> Histogram:
+        """A histogram merged over all label sets"""
+        merged = Histogram()
+        with self._lock:
+            for (n, _), histogram in self._histograms.items():
+                if n == name:
+                    for i, count in enumerate(histogram.counts):
+                        merged.counts[i] += count
+                    merged.count += histogram.count
+                    merged.sum += histogram.sum
+                    merged.max = max(merged.max, histogram.max)
+        return merged
+
+    def summary(self) -> Dict:
+        """
+        JSON-serialisable summary of the run
+
+        Returns:
+            Dict with `counters` (label sets as "name{k=v}" keys), `gauges`, `histograms`
+            and `time_breakdown`, the total seconds spent per phase (network,
+            rate_limit, decode, validate, write) and each phase's share of their sum
+        """
+        with self._lock:
+            counters = {name + _format_labels(labels): value
+                        for (name, labels), value in sorted(self._counters.items())}
+            names = sorted({name for name, _ in self._histograms})
+        histograms = {name: self.histogram(name).to_dict() for name in names}
+
+        phases = {phase: histograms.get(name, {}).get('sum', 0.0) for name, phase in _PHASES.items()}
+        total = sum(phases.values())
+        return {
+            'elapsed_seconds': round(time.time() - self.started_at, 3),
+            'counters': counters,
+            'gauges': self.gauges(),
+            'histograms': histograms,
+            'time_breakdown': {
+                phase: {'seconds': round(seconds, 3),
+                        'share': round(seconds / total, 3) if total else None}
+                for phase, seconds in phases.items()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        lines = []
+        described = set()
+
+        def describe(name: str, kind: str, metric: str):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {metric} {METRICS.get(name, ('', name))[1]}")
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for (name, labels), value in counters:
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            describe(name, 'counter', metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+        for name, value in sorted(self.gauges().items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            describe(name, 'gauge', metric)
+            lines.append(f"{metric} {value:g}")
+
+        for (name, labels), histogram in histograms:
+            metric = f"{METRIC_PREFIX}_{name}"
+            describe(name, 'histogram', metric)
+            for bound, running in histogram.cumulative():
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', _format_bound(bound)))} {running}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> Path:
+        """
+        Write the metrics to a file, atomically
+
+        Args:
+            path: Target file; a .json suffix writes summary(), anything
+                else (e.g. .prom for node_exporter's textfile collector)
+                the Prometheus text format
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == '.json':
+            text = json.dumps(self.summary(), indent=2)
+        else:
+            text = self.to_prometheus()
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, path)
+        return path
+
+    def log_summary(self):
+        """Log the time breakdown and request totals"""
+        summary = self.summary()
+        breakdown = ', '.join(f"{phase} {values['seconds']:.1f}s"
+                              for phase, values in summary['time_breakdown'].items())
+        logger.info(f"Requests: {self.counter('requests'):g}, cache hits: {self.counter('cache_hits'):g}, "
+                    f"retries: {self.counter('retries'):g}, "
+                    f"downloaded: {self.counter('response_bytes') / 1e6:.1f} MB")
+        logger.info(f"Time spent: {breakdown}")
+        gauges = summary['gauges']
+        if 'connections_opened' in gauges:
+            logger.info(f"Connections opened: {gauges['connections_opened']:g}, "
+                        f"keep-alive reuses: {gauges.get('connections_reused', 0):g}")
@@ -0,0 +1,276 @@
+"""
+Local stand-in for the DIME Philippines projects API
+Serves /api/v1/projects with the same `data`/`meta` response shape that
+DIMEScraper.fetch_projects expects, so the scraper can be exercised without
+hitting the live dashboard. MockTransport answers the same requests in
+process, without a socket.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Any, Mapping, Tuple
+from urllib.parse import urlencode, urlparse, parse_qs
+
+from .rate_limit import TokenBucket
+from .transport import Transport, TransportResponse
+
+# Query parameters that do not filter on a project field
+_NON_FILTER_PARAMS = {'page', 'perPage', 'sortBy', 'sortDirection', 'statusName'}
+
+
+class _ProjectsHandler(BaseHTTPRequestHandler):
+    """Request handler for the mock projects endpoint"""
+
+    # Keep-alive connections, answered without Nagle delays between headers and body
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep test and benchmark output quiet
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        status_code, headers, body = self.server.mock.respond(parsed.path, query, self.headers)
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockDIMEServer:
+    """In-process HTTP server that mimics the DIME projects API"""
+
+    def __init__(self, projects: List[Dict], host: str = "127.0.0.1", port: int = 0,
+                 max_per_page: Optional[int] = None,
+                 requests_per_second: Optional[float] = None,
+                 latency: float = 0.0,
+                 error_rate: float = 0.0,
+                 seed: Optional[int] = None,
+                 jitter: float = 0.0,
+                 compress: bool = False):
+        """
+        Initialize the mock server
+
+        Args:
+            projects: Project records to serve
+            host: Interface to bind to
+            port: Port to bind to (0 picks a free port)
+            max_per_page: Silently cap perPage at this value, like the live API
+            requests_per_second: Answer 429 with Retry-After above this rate
+            latency: Seconds to wait before answering each request
+            error_rate: Fraction of requests answered with HTTP 500
+            seed: Seed for the error injection and jitter random generator
+            jitter: Extra random delay of up to this many seconds per request
+            compress: gzip response bodies for clients sending
+                `Accept-Encoding: gzip`
+        """
+        self.projects = list(projects)
+        self.max_per_page = max_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.compress = compress
+        self.request_count = 0
+        self.throttled_count = 0
+        self.not_modified_count = 0
+        self._limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        self._random = random.Random(seed)
+        # Pages that always answer with HTTP 500 (to simulate outages)
+        self.fail_pages = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _ProjectsHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to DIMEScraper"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self):
+        """Count a request received by the server"""
+        with self._lock:
+            self.request_count += 1
+
+    def record_not_modified(self):
+        """Count a conditional request answered with 304 Not Modified"""
+        with self._lock:
+            self.not_modified_count += 1
+
+    def check_throttle(self) -> Optional[int]:
+        """
+        Apply the server-side rate limit
+
+        Returns:
+            Retry-After seconds if the request must be rejected, else None
+        """
+        if self._limiter is None or self._limiter.try_acquire():
+            return None
+        with self._lock:
+            self.throttled_count += 1
+        return max(1, math.ceil(1 / self._limiter.rate))
+
+    def respond(self, path: str, query: Dict[str, str],
+                headers: Mapping[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Answer one GET request
+
+        Args:
+            path: URL path
+            query: Query string parameters
+            headers: Request headers
+
+        Returns:
+            (status code, response headers, body)
+        """
+        if path != '/api/v1/projects':
+            return self._json_response(404, {'message': 'Not Found'}, headers)
+        self.record_request()
+
+        retry_after = self.check_throttle()
+        if retry_after is not None:
+            return self._json_response(429, {'message': 'Too Many Attempts.'}, headers,
+                                       {'Retry-After': str(retry_after)})
+        delay = self.response_delay()
+        if delay:
+            time.sleep(delay)
+        if int(query.get('page', 1)) in self.fail_pages or self.should_fail():
+            return self._json_response(500, {'message': 'Internal Server Error'}, headers)
+        return self._json_response(200, self.build_page(query), headers)
+
+    def _json_response(self, status_code: int, payload: Dict, request_headers: Mapping[str, str],
+                       headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        body = json.dumps(payload).encode('utf-8')
+        headers = dict(headers or {})
+        if status_code == 200:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if request_headers.get('If-None-Match') == etag:
+                self.record_not_modified()
+                return 304, {'ETag': etag, 'Content-Length': '0'}, b''
+            headers['ETag'] = etag
+        headers['Content-Type'] = 'application/json'
+        if self.compress and 'gzip' in request_headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        headers['Content-Length'] = str(len(body))
+        return status_code, headers, body
+
+    def transport(self) -> 'MockTransport':
+        """A transport that answers DIMEScraper's requests in process, without HTTP"""
+        return MockTransport(self)
+
+    def response_delay(self) -> float:
+        """Seconds to wait before answering: latency plus random jitter"""
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def should_fail(self) -> bool:
+        """Whether to inject a server error for this request"""
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def build_page(self, query: Dict[str, str]) -> Dict:
+        """
+        Build one page of results for the given query parameters
+
+        Args:
+            query: Query string parameters (page, perPage, sortBy, sortDirection,
+                and filters such as status or region)
+
+        Returns:
+            Response payload with `data` and `meta` keys
+        """
+        page = max(1, int(query.get('page', 1)))
+        per_page = max(1, int(query.get('perPage', 100)))
+        if self.max_per_page:
+            per_page = min(per_page, self.max_per_page)
+        sort_by = query.get('sortBy')
+        descending = query.get('sortDirection', 'DESC').upper() == 'DESC'
+
+        projects = self.projects
+        # Any other parameter naming a project field filters on it (status, region, ...)
+        for field, value in query.items():
+            if field not in _NON_FILTER_PARAMS and value:
+                projects = [p for p in projects if str(p.get(field)) == value]
+        if sort_by:
+            # Records missing the sort field go last, like SQL NULLs
+            present = [p for p in projects if p.get(sort_by) is not None]
+            missing = [p for p in projects if p.get(sort_by) is None]
+            present.sort(key=lambda p: (p[sort_by], p.get('id', 0)), reverse=descending)
+            projects = present + missing
+
+        total = len(projects)
+        last_page = max(1, (total + per_page - 1) // per_page)
+        start = (page - 1) * per_page
+
+        return {
+            'data': projects[start:start + per_page],
+            'meta': {
+                'total': total,
+                'perPage': per_page,
+                'currentPage': page,
+                'lastPage': last_page,
+            }
+        }
+
+    def start(self) -> 'MockDIMEServer':
+        """Start serving requests in a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and release the port"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'MockDIMEServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class MockTransport(Transport):
+    """Transport that hands requests straight to a MockDIMEServer (no sockets)"""
+
+    def __init__(self, server: MockDIMEServer):
+        self.server = server
+        self.requests = 0
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> TransportResponse:
+        parsed = urlparse(url)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        query.update({key: str(value) for key, value in (params or {}).items()})
+        request_headers = {'Accept-Encoding': 'gzip'}
+        request_headers.update(headers or {})
+        status_code, response_headers, body = self.server.respond(parsed.path, query, request_headers)
+        self.requests += 1
+
+        wire_bytes = len(body)
+        if response_headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return TransportResponse(status_code, response_headers, body,
+                                 f"{url}?{urlencode(params or {})}", wire_bytes)
+
+    def stats(self) -> Dict[str, int]:
+        return {'requests': self.requests, 'connections_opened': 0, 'connections_reused': self.requests}
@@ -0,0 +1,253 @@
+"""
+Compact in-memory model for loaded DIME projects
+Project records are stored as `__slots__` objects whose nested entities
+(implementing offices, program, contractors, sources of funds) are interned:
+every distinct entity exists once and projects hold references to it, and
+repeated category and date strings are shared. Records read like the JSON
+dicts (`project['cost']`, `project.get('program')`) and convert back to the
+exact dict shape with `to_dict()`.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Any
+
+from .schema import FIELD_ORDER, CATEGORY_FIELDS, DATE_FIELDS, ENTITY_FIELDS, ENTITY_LIST_FIELDS
+
+
+_MISSING = object()
+
+_FIELDS = frozenset(FIELD_ORDER)
+_SHARED_STRING_FIELDS = frozenset(CATEGORY_FIELDS + DATE_FIELDS)
+
+
+class Entity(Mapping):
+    """Read-only, shared view of one nested entity dict"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Dict):
+        self._data = data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def to_dict(self) -> Dict:
+        """A mutable copy in the API's JSON shape"""
+        return dict(self._data)
+
+    def __repr__(self) -> str:
+        return f"Entity({self._data!r})"
+
+    def __reduce__(self):
+        return Entity, (self._data,)
+
+
+def _entity_key(entity: Dict) -> Tuple:
+    return tuple(entity.items())
+
+
+class EntityPool:
+    """Interns entities, entity lists and repeated strings"""
+
+    def __init__(self):
+        self._entities: Dict[Tuple, Entity] = {}
+        self._lists: Dict[Tuple, Tuple[Entity, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def entity(self, entity: Optional[Dict]) -> Optional[Entity]:
+        """The shared Entity equal to `entity` (None stays None)"""
+        if entity is None:
+            return None
+        key = _entity_key(entity)
+        shared = self._entities.get(key)
+        if shared is None:
+            shared = self._entities[key] = Entity(dict(entity))
+        return shared
+
+    def entity_list(self, entities: Optional[List[Dict]]) -> Optional[Tuple[Entity, ...]]:
+        """The shared tuple of Entities for a list of entity dicts (None stays None)"""
+        if entities is None:
+            return None
+        interned = tuple(self.entity(e) for e in entities)
+        # Many projects share the same office/fund combination
+        key = tuple(id(e) for e in interned)
+        return self._lists.setdefault(key, interned)
+
+    @staticmethod
+    def string(value: Any) -> Any:
+        return sys.intern(value) if type(value) is str else value
+
+
+class Project:
+    """
+    One project record with a slot for every API field
+
+    Fields absent from the source record are left unset rather than stored
+    as None, so to_dict() reproduces the original keys exactly.
+    """
+
+    __slots__ = FIELD_ORDER + ('_extra',)
+
+    @classmethod
+    def from_dict(cls, data: Dict, pool: EntityPool) -> 'Project':
+        """
+        Build a compact record from a project dict
+
+        Args:
+            data: Project in the API's JSON shape
+            pool: Pool that entities and strings are interned in
+        """
+        project = cls()
+        for field, value in data.items():
+            if field in ENTITY_LIST_FIELDS:
+                value = pool.entity_list(value)
+            elif field in ENTITY_FIELDS:
+                value = pool.entity(value)
+            elif field in _SHARED_STRING_FIELDS:
+                value = pool.string(value)
+            elif field not in _FIELDS:
+                project._extra = dict(getattr(project, '_extra', ()), **{field: value})
+                continue
+            setattr(project, field, value)
+        return project
+
+    def reintern(self, pool: EntityPool) -> 'Project':
+        """Point this record's entities at the ones in `pool` (e.g. after unpickling)"""
+        for field in ENTITY_LIST_FIELDS:
+            value = getattr(self, field, None)
+            if value is not None:
+                setattr(self, field, pool.entity_list(value))
+        for field in ENTITY_FIELDS:
+            value = getattr(self, field, None)
+            if value is not None:
+                setattr(self, field, pool.entity(value))
+        return self
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Field value like dict.get; entity lists come back as tuples of Entities"""
+        if field in _FIELDS:
+            return getattr(self, field, default)
+        return getattr(self, '_extra', {}).get(field, default)
+
+    def __getitem__(self, field: str) -> Any:
+        value = self.get(field, _MISSING)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: str) -> bool:
+        return self.get(field, _MISSING) is not _MISSING
+
+    def keys(self) -> List[str]:
+        return list(self.to_dict())
+
+    def to_dict(self) -> Dict:
+        """The record in the API's JSON shape (fresh dicts and lists)"""
+        data = {}
+        for field in FIELD_ORDER:
+            value = getattr(self, field, _MISSING)
+            if value is _MISSING:
+                continue
+            if field in ENTITY_LIST_FIELDS and value is not None:
+                value = [entity.to_dict() for entity in value]
+            elif field in ENTITY_FIELDS and value is not None:
+                value = value.to_dict()
+            data[field] = value
+        data.update(getattr(self, '_extra', ()))
+        return data
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Project):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Project(id={self.get('id')!r}, projectName={self.get('projectName')!r})"
+
+
+def compact_projects(projects: Iterable[Dict], pool: Optional[EntityPool] = None) -> List[Project]:
+    """
+    Convert project dicts to compact records sharing one entity pool
+
+    Args:
+        projects: Project dicts
+        pool: Pool to intern into (a new one if omitted)
+    """
+    pool = pool if pool is not None else EntityPool()
+    return [Project.from_dict(project, pool) for project in projects]
+
+
+class ProjectDataset:
+    """A loaded set of compact project records and their entity pool"""
+
+    def __init__(self):
+        self.pool = EntityPool()
+        self.projects: List[Project] = []
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Dict]) -> 'ProjectDataset':
+        """Build a dataset from project dicts"""
+        dataset = cls()
+        dataset.extend(projects)
+        return dataset
+
+    @classmethod
+    def from_files(cls, files: Iterable, fields: Optional[Iterable[str]] = None,
+                   workers: Optional[int] = None) -> 'ProjectDataset':
+        """
+        Load part files into a dataset using the parallel loader
+
+        Worker processes send back compact records, so shared entities are
+        only serialised once per file.
+
+        Raises:
+            ValueError: If a part file cannot be parsed
+        """
+        from .loader import iter_parts
+
+        dataset = cls()
+        for part in iter_parts(files, fields=fields, workers=workers, compact=True):
+            if part['error']:
+                raise ValueError(f"Could not load {part['path']}: {part['error']}")
+            dataset.extend(part['projects'])
+        return dataset
+
+    def append(self, project):
+        """Add a project dict or compact record"""
+        if isinstance(project, Project):
+            self.projects.append(project.reintern(self.pool))
+        else:
+            self.projects.append(Project.from_dict(project, self.pool))
+
+    def extend(self, projects: Iterable):
+        for project in projects:
+            self.append(project)
+
+    def __len__(self) -> int:
+        return len(self.projects)
+
+    def __iter__(self) -> Iterator[Project]:
+        return iter(self.projects)
+
+    def __getitem__(self, index: int) -> Project:
+        return self.projects[index]
+
+    def to_dicts(self) -> List[Dict]:
+        """All records in the API's JSON shape"""
+        return [project.to_dict() for project in self.projects]
@@ -0,0 +1,309 @@
+"""
+Encodings of scraped DIME part files
+A part file holds one chunk of projects plus its `metadata` block, as
+pretty-printed JSON (the original layout), compact JSON, or NDJSON (one
+project per line, with the metadata of every part kept in a sidecar
+`<prefix>_<timestamp>.manifest.json`), optionally gzip- or zstd-compressed.
+Files are written to a temporary name and renamed into place, so a crash
+never leaves a truncated part file behind, and the readers here detect the
+encoding from the file name.
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+from .decoding import loads
+
+PART_ENCODINGS = ('json', 'compact', 'ndjson')
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+_PART_SUFFIX = re.compile(r'(?P<ext>\.json|\.ndjson)(?P<compression>\.gz|\.zst)?$')
+
+# How much of a file to read when looking for the metadata block
+_METADATA_PROBE_CHARS = 4096
+
+# Metadata fields shared by every part of a run (the rest are per file)
+_RUN_FIELDS = ('total_files', 'total_projects', 'scraped_at', 'source', 'url')
+
+_manifest_lock = threading.Lock()
+
+
+def part_suffix(encoding: str = 'json', compression: Optional[str] = None) -> str:
+    """
+    File name suffix for a part-file encoding, e.g. '.ndjson.gz'
+
+    Raises:
+        ValueError: For an unknown encoding or compression
+    """
+    if encoding not in PART_ENCODINGS:
+        raise ValueError(f"Unknown part file encoding '{encoding}' (expected one of {PART_ENCODINGS})")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}' (expected gzip, zstd or None)")
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+    return ('.ndjson' if encoding == 'ndjson' else '.json') + COMPRESSIONS[compression]
+
+
+def split_part_suffix(path: Path) -> Tuple[str, str, Optional[str]]:
+    """
+    Split a part file name into its stem and encoding
+
+    Returns:
+        (name without suffix, '.json' or '.ndjson', compression or None)
+
+    Raises:
+        ValueError: If the name does not end in a part-file suffix
+    """
+    name = Path(path).name
+    match = _PART_SUFFIX.search(name)
+    if match is None:
+        raise ValueError(f"{name} is not a JSON or NDJSON part file")
+    compression = {'.gz': 'gzip', '.zst': 'zstd'}.get(match.group('compression'))
+    return name[:match.start()], match.group('ext'), compression
+
+
+def is_part_file(path: Path) -> bool:
+    """Whether a file name has a JSON/NDJSON (optionally compressed) suffix"""
+    return _PART_SUFFIX.search(Path(path).name) is not None
+
+
+def sidecar_path(path: Path, suffix: str) -> Path:
+    """Path next to a part file with its part-file suffix replaced, e.g. '.npz'"""
+    path = Path(path)
+    return path.with_name(split_part_suffix(path)[0] + suffix)
+
+
+def open_part(path: Path, mode: str = 'r'):
+    """
+    Open a part file as text, decompressing or compressing by its suffix
+
+    Args:
+        path: Part file path
+        mode: 'r' or 'w'
+    """
+    return _open(path, mode, split_part_suffix(path)[2])
+
+
+def _open(path: Path, mode: str, compression: Optional[str]):
+    if compression == 'gzip':
+        # Level 6 writes about twice as fast as the default 9 for a ~4% larger file
+        return gzip.open(path, mode + 't', compresslevel=6, encoding='utf-8')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError(f"Reading {Path(path).name} requires the zstandard package")
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _replace_atomically(path: Path, write, compression: Optional[str] = None):
+    """Call write(file) on a hidden temporary file, then rename it over `path`"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with _open(tmp_path, 'w', compression) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def manifest_path(path: Path) -> Path:
+    """Manifest of the run an NDJSON part file belongs to"""
+    path = Path(path)
+    stem = split_part_suffix(path)[0]
+    run = stem.rsplit('_part_', 1)[0] if '_part_' in stem else stem
+    return path.with_name(f"{run}.manifest.json")
+
+
+def read_manifest(path: Path) -> Dict:
+    """
+    Load a run manifest (empty if it does not exist)
+
+    Returns:
+        Dict with the run-level metadata fields and `files`, mapping each
+        part file name to its per-file metadata
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _update_manifest(part_path: Path, metadata: Optional[Dict]):
+    """Record (or with metadata=None, forget) one part file in its run manifest"""
+    path = manifest_path(part_path)
+    with _manifest_lock:
+        manifest = read_manifest(path)
+        files = manifest.setdefault('files', {})
+        if metadata is None:
+            files.pop(Path(part_path).name, None)
+        else:
+            manifest.update({k: metadata[k] for k in _RUN_FIELDS if k in metadata})
+            files[Path(part_path).name] = {k: v for k, v in metadata.items() if k not in _RUN_FIELDS}
+        if not files:
+            path.unlink(missing_ok=True)
+            return
+        manifest['files'] = dict(sorted(files.items()))
+        _replace_atomically(path, lambda f: f.write(json.dumps(manifest, ensure_ascii=False, indent=2)))
+
+
+def write_part_file(path: Path, metadata: Dict, projects: List[Dict],
+                    encoding: Optional[str] = None) -> Path:
+    """
+    Write a part file atomically
+
+    The data is streamed to a hidden temporary file in the same directory,
+    which is renamed over `path` only once it is complete. For NDJSON the
+    metadata goes to the run manifest instead of the file itself.
+
+    Args:
+        path: Target path; its suffix selects NDJSON and compression
+        metadata: The file's metadata block
+        projects: Project records
+        encoding: 'json' (indented) or 'compact' for .json files;
+            defaults to 'json' ('ndjson' is implied by the suffix)
+
+    Returns:
+        The path written
+    """
+    path = Path(path)
+    _, ext, compression = split_part_suffix(path)
+
+    def write(f):
+        if ext == '.ndjson':
+            for project in projects:
+                f.write(json.dumps(project, ensure_ascii=False) + '\n')
+        else:
+            # One write call: json.dump's many small chunks are slow through a compressor
+            indent, separators = (None, (',', ':')) if encoding == 'compact' else (2, None)
+            f.write(json.dumps({'metadata': metadata, 'projects': projects},
+                               ensure_ascii=False, indent=indent, separators=separators))
+
+    _replace_atomically(path, write, compression)
+    if ext == '.ndjson':
+        _update_manifest(path, metadata)
+    return path
+
+
+def remove_part_file(path: Path):
+    """Delete a part file (and its manifest entry for NDJSON)"""
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    if split_part_suffix(path)[1] == '.ndjson':
+        _update_manifest(path, None)
+
+
+def _is_header(line: str) -> bool:
+    # NDJSON files written before the manifest existed start with {"metadata": ...}
+    return line.startswith('{"metadata"')
+
+
+def iter_part_records(path: Path, fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """
+    Yield a part file's projects one at a time
+
+    NDJSON files are decoded line by line, so memory use does not depend on
+    the file size; JSON files have to be parsed whole first.
+
+    Args:
+        path: Part file path
+        fields: Only keep these project fields
+    """
+    with open_part(path) as f:
+        if split_part_suffix(path)[1] == '.ndjson':
+            for line in f:
+                if line.strip() and not _is_header(line):
+                    project = loads(line)
+                    yield project if fields is None else {k: project[k] for k in fields if k in project}
+            return
+        projects = loads(f.read()).get('projects', [])
+    for project in projects:
+        yield project if fields is None else {k: project[k] for k in fields if k in project}
+
+
+def iter_records(files: Iterable[Path], fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """Yield the projects of several part files in order, one at a time"""
+    for path in files:
+        yield from iter_part_records(path, fields)
+
+
+def read_part_file(path: Path) -> Dict:
+    """
+    Load a part file in any encoding
+
+    Returns:
+        Dict with `metadata` and `projects` keys
+    """
+    if split_part_suffix(path)[1] == '.ndjson':
+        return {'metadata': read_part_metadata(path), 'projects': list(iter_part_records(path))}
+    with open_part(path) as f:
+        content = loads(f.read())
+    return {'metadata': content.get('metadata', {}), 'projects': content.get('projects', [])}
+
+
+def read_part_metadata(path: Path) -> Dict:
+    """
+    Read a part file's `metadata` block without parsing its projects
+
+    The writers put `metadata` first, so only the head of the file is read;
+    files laid out differently fall back to a full parse. NDJSON metadata
+    comes from the run manifest.
+
+    Returns:
+        The file's metadata dict (empty if it has none)
+    """
+    path = Path(path)
+    if split_part_suffix(path)[1] == '.ndjson':
+        manifest = read_manifest(manifest_path(path))
+        entry = manifest.get('files', {}).get(path.name)
+        if entry is None:
+            with open_part(path) as f:
+                first = f.readline()
+            return json.loads(first).get('metadata', {}) if _is_header(first) else {}
+        metadata = dict(entry)
+        metadata.update({k: manifest[k] for k in _RUN_FIELDS if k in manifest})
+        return metadata
+
+    with open_part(path) as f:
+        head = f.read(_METADATA_PROBE_CHARS)
+
+    cut = head.find('"projects"')
+    if cut != -1:
+        try:
+            return json.loads(head[:cut].rstrip().rstrip(',') + '}').get('metadata', {})
+        except ValueError:
+            pass
+    return read_part_file(path)['metadata']
+
+
+def main():
+    """Write the projects of all part files under a directory to stdout as NDJSON"""
+    if len(sys.argv) < 2:
+        print("Usage: python -m scraper.partio <data_dir>   (e.g. | jq .projectName)")
+        return
+
+    from .loader import find_part_files
+
+    for project in iter_records(find_part_files(sys.argv[1])):
+        sys.stdout.write(json.dumps(project, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    main()
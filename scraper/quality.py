@@ -0,0 +1,391 @@
+"""
+Data-quality validation of scraped DIME projects
+Checks every record for schema types (decoding.check_project), coordinates
+outside the Philippines, placeholder entities such as the "No Data
+Available" contractor, cost / utilizedAmount consistency, progress and date
+ranges, PSGC code format and hierarchy (barangay inside city inside
+province inside region), and duplicate ids or project codes. Part files are
+checked in parallel worker processes; a DataQualityValidator can also be
+attached to DIMEScraper as a sink to check pages as they are scraped. The
+result is a compact report of counts and example ids per check.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple, Any
+
+from .decoding import check_project
+from .schema import ENTITY_FIELDS, ENTITY_LIST_FIELDS, FIELD_ORDER, parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Entity names the API uses when the real value is unknown (compared case-insensitively)
+PLACEHOLDER_NAMES = frozenset({'no data available', 'n/a', 'na', 'none', 'null', 'unknown',
+                               'tba', 'tbd', 'to be announced', '-'})
+
+# Bounding box of the Philippines including the Kalayaan Island Group (degrees)
+PH_LATITUDE = (4.0, 21.5)
+PH_LONGITUDE = (114.0, 127.0)
+
+# PSGC code fields from the most to the least specific, with the number of
+# leading digits that identify each level (a child code starts with them)
+CODE_HIERARCHY = (('barangayCode', 9), ('cityCode', 6), ('provinceCode', 4), ('regionCode', 2))
+
+# name -> (severity, description)
+CHECKS = {
+    'schema': ('error', "A field has the wrong type or an unparseable value"),
+    'missing_id': ('error', "The record has no id"),
+    'duplicate_id': ('error', "The id appears in more than one record"),
+    'duplicate_project_code': ('warning', "The projectCode is shared by different ids"),
+    'missing_coordinates': ('warning', "latitude or longitude is null"),
+    'coordinates_outside_ph': ('error', "The coordinates are outside the Philippines"),
+    'nonpositive_cost': ('warning', "cost is null, zero or negative"),
+    'negative_utilized': ('error', "utilizedAmount is negative"),
+    'utilized_exceeds_cost': ('error', "utilizedAmount is greater than cost"),
+    'progress_out_of_range': ('error', "latestProgress is outside 0-100"),
+    'completion_before_start': ('warning', "contractCompletionDate is before dateStarted"),
+    'code_format': ('error', "A PSGC code is not a 9- or 10-digit string"),
+    'code_hierarchy': ('error', "A PSGC code does not fall inside its parent's code"),
+}
+CHECKS.update({f"placeholder_{field}": ('warning', f"{field} holds a placeholder such as 'No Data Available'")
+               for field in ENTITY_LIST_FIELDS + ENTITY_FIELDS})
+
+DEFAULT_REPORT_NAME = "quality_report.json"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_placeholder(entity: Any) -> bool:
+    if not isinstance(entity, dict):
+        return False
+    names = [entity.get(key) for key in ('name', 'programName')]
+    return any(isinstance(name, str) and name.strip().lower() in PLACEHOLDER_NAMES for name in names)
+
+
+def _timestamp(value: Any) -> Optional[int]:
+    try:
+        return parse_timestamp(value)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def validate_record(project: Dict) -> List[str]:
+    """
+    Names of the CHECKS a single record fails (duplicates are checked across records)
+
+    Args:
+        project: Decoded project record
+
+    Returns:
+        Failed check names, each at most once
+    """
+    if not isinstance(project, dict):
+        return ['schema']
+    failed = []
+    schema_errors = check_project(project)
+    if project.get('id') is None:
+        failed.append('missing_id')
+        schema_errors = [e for e in schema_errors if e != "id: missing"]
+    if schema_errors:
+        failed.append('schema')
+
+    latitude, longitude = project.get('latitude'), project.get('longitude')
+    if latitude is None or longitude is None:
+        failed.append('missing_coordinates')
+    elif _is_number(latitude) and _is_number(longitude):
+        if not (PH_LATITUDE[0] <= latitude <= PH_LATITUDE[1]
+                and PH_LONGITUDE[0] <= longitude <= PH_LONGITUDE[1]):
+            failed.append('coordinates_outside_ph')
+
+    cost, utilized = project.get('cost'), project.get('utilizedAmount')
+    if not _is_number(cost) or cost <= 0:
+        failed.append('nonpositive_cost')
+    if _is_number(utilized):
+        if utilized < 0:
+            failed.append('negative_utilized')
+        elif _is_number(cost) and utilized > cost:
+            failed.append('utilized_exceeds_cost')
+    progress = project.get('latestProgress')
+    if _is_number(progress) and not 0 <= progress <= 100:
+        failed.append('progress_out_of_range')
+    started = _timestamp(project.get('dateStarted'))
+    completion = _timestamp(project.get('contractCompletionDate'))
+    if started is not None and completion is not None and completion < started:
+        failed.append('completion_before_start')
+
+    codes = {field: project.get(field) for field, _ in CODE_HIERARCHY if project.get(field) is not None}
+    if any(not isinstance(code, str) or not code.isdigit() or len(code) not in (9, 10)
+           for code in codes.values()):
+        failed.append('code_format')
+    elif all(len(code) == 9 for code in codes.values()):
+        # Each code must start with the identifying digits of the nearest coarser
+        # code present; trailing zeros are dropped because some cities are coded
+        # at province level (Manila is 133900000, its districts 133901000-133914000)
+        present = [(field, digits) for field, digits in CODE_HIERARCHY if field in codes]
+        for (field, _), (parent, digits) in zip(present, present[1:]):
+            if not codes[field].startswith(codes[parent][:digits].rstrip('0')):
+                failed.append('code_hierarchy')
+                break
+
+    for field in ENTITY_LIST_FIELDS:
+        if any(_is_placeholder(entity) for entity in project.get(field) or []):
+            failed.append(f"placeholder_{field}")
+    for field in ENTITY_FIELDS:
+        if _is_placeholder(project.get(field)):
+            failed.append(f"placeholder_{field}")
+    return failed
+
+
+def _example(project: Any, position: int) -> Any:
+    if isinstance(project, dict) and project.get('id') is not None:
+        return project['id']
+    return f"#{position}"
+
+
+class QualityReport:
+    """Counts and example ids of failed checks, mergeable across workers"""
+
+    def __init__(self, max_examples: int = 5):
+        """
+        Args:
+            max_examples: Example ids kept per check
+        """
+        self.max_examples = max_examples
+        self.records = 0
+        self.invalid_records = 0
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, List[Any]] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.file_errors: Dict[str, str] = {}
+
+    def add(self, check: str, example: Any):
+        """Count one failure of a check"""
+        self.counts[check] = self.counts.get(check, 0) + 1
+        examples = self.examples.setdefault(check, [])
+        if len(examples) < self.max_examples:
+            examples.append(example)
+
+    def add_record(self, project: Any, failed: Iterable[str], example: Any) -> bool:
+        """
+        Count one checked record and the checks it failed
+
+        Returns:
+            Whether the record failed an error-severity check
+        """
+        self.records += 1
+        failed = list(failed)
+        for check in failed:
+            self.add(check, example)
+        invalid = any(CHECKS[check][0] == 'error' for check in failed)
+        if invalid:
+            self.invalid_records += 1
+        if isinstance(project, dict):
+            for field, value in project.items():
+                if value is None:
+                    self.null_counts[field] = self.null_counts.get(field, 0) + 1
+        return invalid
+
+    def merge(self, other: 'QualityReport'):
+        """Add another report's counts to this one"""
+        self.records += other.records
+        self.invalid_records += other.invalid_records
+        for check, count in other.counts.items():
+            self.counts[check] = self.counts.get(check, 0) + count
+            examples = self.examples.setdefault(check, [])
+            examples.extend(other.examples.get(check, [])[:self.max_examples - len(examples)])
+        for field, count in other.null_counts.items():
+            self.null_counts[field] = self.null_counts.get(field, 0) + count
+        self.file_errors.update(other.file_errors)
+
+    @property
+    def errors(self) -> int:
+        """Failures of error-severity checks"""
+        return sum(count for check, count in self.counts.items() if CHECKS[check][0] == 'error')
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable report, checks ordered by severity then count"""
+        order = sorted(self.counts, key=lambda c: (CHECKS[c][0] != 'error', -self.counts[c], c))
+        known = [f for f in FIELD_ORDER if f in self.null_counts]
+        return {
+            'records': self.records,
+            'invalid_records': self.invalid_records,
+            'checks': {check: {'severity': CHECKS[check][0], 'description': CHECKS[check][1],
+                               'count': self.counts[check], 'examples': self.examples.get(check, [])}
+                       for check in order},
+            'null_counts': {field: self.null_counts[field]
+                            for field in known + sorted(set(self.null_counts) - set(known))},
+            'file_errors': self.file_errors,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, max_examples: int = 5) -> 'QualityReport':
+        """Rebuild a report from to_dict() output"""
+        report = cls(max_examples)
+        report.records = data['records']
+        report.invalid_records = data['invalid_records']
+        for check, values in data['checks'].items():
+            report.counts[check] = values['count']
+            report.examples[check] = list(values['examples'])
+        report.null_counts = dict(data['null_counts'])
+        report.file_errors = dict(data['file_errors'])
+        return report
+
+    def write(self, path: str) -> Path:
+        """
+        Write the report as JSON, atomically
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, path)
+        return path
+
+    def log_summary(self):
+        """Log the number of records checked and the failures per check"""
+        logger.info(f"Checked {self.records:,} records: {self.invalid_records:,} with errors")
+        for check, values in self.to_dict()['checks'].items():
+            logger.info(f"   {values['severity']:7} {check}: {values['count']:,} "
+                        f"(e.g. {', '.join(str(e) for e in values['examples'])})")
+        for path, error in self.file_errors.items():
+            logger.warning(f"   Could not read {path}: {error}")
+
+
+def _validate_file(path: Path, max_examples: int) -> Dict:
+    """Process-pool entry point: check one part file"""
+    from .loader import load_part
+
+    report = QualityReport(max_examples)
+    try:
+        projects = load_part(path)['projects']
+    except Exception as e:
+        report.file_errors[str(path)] = str(e)
+        return {'report': report.to_dict(), 'keys': []}
+    keys = []
+    for position, project in enumerate(projects):
+        invalid = report.add_record(project, validate_record(project), _example(project, position))
+        if isinstance(project, dict):
+            keys.append((project.get('id'), project.get('projectCode'), invalid))
+    return {'report': report.to_dict(), 'keys': keys}
+
+
+class DataQualityValidator:
+    """Validation stage over part files or, as a DIMEScraper sink, over scraped pages"""
+
+    def __init__(self, max_examples: int = 5):
+        """
+        Args:
+            max_examples: Example ids kept per check in the report
+        """
+        self.report = QualityReport(max_examples)
+        self._lock = threading.Lock()
+        self._ids: set = set()
+        self._codes: Dict[str, Any] = {}
+
+    def _check_duplicates(self, keys: Iterable[Tuple[Any, Any, bool]]):
+        """
+        Count repeated ids and project codes shared by different ids (caller holds the lock)
+
+        Args:
+            keys: (id, projectCode, already counted as invalid) per record
+        """
+        for project_id, code, invalid in keys:
+            if project_id is not None:
+                if project_id in self._ids:
+                    self.report.add('duplicate_id', project_id)
+                    if not invalid:
+                        self.report.invalid_records += 1
+                self._ids.add(project_id)
+            if code:
+                owner = self._codes.setdefault(code, project_id)
+                if owner != project_id:
+                    self.report.add('duplicate_project_code', project_id)
+
+    def write(self, projects: List[Dict]):
+        """Check a batch of records (one API page when used as a sink)"""
+        page = QualityReport(self.report.max_examples)
+        keys = []
+        for position, project in enumerate(projects):
+            invalid = page.add_record(project, validate_record(project), _example(project, position))
+            if isinstance(project, dict):
+                keys.append((project.get('id'), project.get('projectCode'), invalid))
+        with self._lock:
+            self.report.merge(page)
+            self._check_duplicates(keys)
+
+    def check_files(self, files: Iterable[Path], workers: Optional[int] = None) -> QualityReport:
+        """
+        Check part files across a process pool
+
+        Records are checked in the workers, which send back only their
+        file's counts, examples and (id, projectCode) keys; duplicates are
+        then found across all files here.
+
+        Args:
+            files: Part files to check
+            workers: Number of worker processes (defaults to the CPU count;
+                1 checks in the current process)
+
+        Returns:
+            The accumulated report
+        """
+        from .loader import _map_ordered
+
+        for result in _map_ordered(_validate_file, list(files), (self.report.max_examples,), workers):
+            with self._lock:
+                self.report.merge(QualityReport.from_dict(result['report']))
+                self._check_duplicates(result['keys'])
+        return self.report
+
+
+def validate_files(data_dir: str = "scraped_data", workers: Optional[int] = None,
+                   max_examples: int = 5) -> QualityReport:
+    """
+    Check every part file in a directory
+
+    Args:
+        data_dir: Directory holding the scraped part files
+        workers: Number of worker processes
+        max_examples: Example ids kept per check
+
+    Returns:
+        The report
+    """
+    from .loader import find_part_files
+
+    files = find_part_files(data_dir)
+    if not files:
+        logger.warning(f"No part files found in {data_dir}")
+    return DataQualityValidator(max_examples).check_files(files, workers)
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog=prog, description="Check scraped DIME part files for data-quality problems")
+    parser.add_argument('data_dir', nargs='?', default="scraped_data")
+    parser.add_argument('--output', help=f"Report file (default: <data_dir>/{DEFAULT_REPORT_NAME})")
+    parser.add_argument('--workers', type=int, help="Worker processes")
+    parser.add_argument('--examples', type=int, default=5, help="Example ids per check")
+    args = parser.parse_args(argv)
+
+    report = validate_files(args.data_dir, args.workers, args.examples)
+    path = report.write(args.output or Path(args.data_dir) / DEFAULT_REPORT_NAME)
+    print(f"Checked {report.records:,} records: {report.invalid_records:,} with errors")
+    for check, values in report.to_dict()['checks'].items():
+        print(f"   {values['severity']:7} {check}: {values['count']:,}")
+    print(f"Report: {path}")
+    # Non-zero when error-severity checks failed, so the command can gate a pipeline
+    return 1 if report.errors or report.file_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Rate limiting helpers for the DIME scraper
+Provides a thread-safe token bucket used to pace requests to the DIME API
+instead of sleeping a fixed amount of time after every page.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the token bucket
+
+        Args:
+            rate: Tokens added per second (i.e. sustained requests per second)
+            capacity: Maximum number of tokens the bucket can hold (burst size).
+                Defaults to max(1, rate).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens accumulated since the last refill (caller holds the lock)"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def set_rate(self, rate: float):
+        """
+        Change the sustained rate (used by the adaptive controller)
+
+        Args:
+            rate: New number of tokens added per second
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens only if they are available right now
+
+        Returns:
+            True if the tokens were taken, False otherwise
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until the requested number of tokens is available
+
+        Args:
+            tokens: Number of tokens to take from the bucket
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than the bucket capacity")
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait_time = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait_time)
+            waited += wait_time
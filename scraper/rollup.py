@@ -0,0 +1,419 @@
+"""
+Precomputed rollup cube for dashboard queries
+Aggregates cost and utilizedAmount once per scrape into cells keyed by
+region × province × program × status × combination of fund sources. Any
+slice, drill-down or group-by over those dimensions is then answered by
+summing a few thousand cells instead of re-reading every record. The cube
+also keeps each project's cell and measures, so new or changed records (a
+scraper sink, new part files, or an incremental delta file) update it in
+place without a rebuild. It is saved as an .npz archive next to the part files.
+"""
+
+import argparse
+import json
+import logging
+import math
+import zipfile
+from array import array
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Sequence, Tuple, Any
+
+from .aggregate import DIMENSIONS, MULTI_DIMENSIONS, MEASURES, _Dictionary
+from .columnar import _npy_bytes, _read_npy
+
+logger = logging.getLogger(__name__)
+
+# Single-valued dimensions of the cube, in key order
+CUBE_DIMENSIONS = ('region', 'province', 'program', 'status')
+
+# Multi-valued dimension; a project counts once in each of its fund sources
+FUND_DIMENSION = 'fundSource'
+
+QUERY_DIMENSIONS = CUBE_DIMENSIONS + (FUND_DIMENSION,)
+
+# Project fields the cube is built from
+SOURCE_FIELDS = ('id', 'region', 'province', 'program', 'status', 'sourceOfFunds') + MEASURES
+
+DEFAULT_CUBE_NAME = "rollup_cube.npz"
+
+
+def _measure_value(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _accepted(wanted: Any) -> set:
+    """Filter value(s) as a set"""
+    return set(wanted) if isinstance(wanted, (list, tuple, set, frozenset)) else {wanted}
+
+
+class RollupCube:
+    """Materialised aggregates over the dashboard dimensions"""
+
+    def __init__(self, metadata: Optional[Dict] = None):
+        """
+        Create an empty cube
+
+        Args:
+            metadata: Extra information saved with the cube
+        """
+        self.metadata = dict(metadata or {})
+        self._dicts = {dim: _Dictionary() for dim in CUBE_DIMENSIONS + (FUND_DIMENSION,)}
+        self._cells: Dict[Tuple[int, ...], int] = {}
+        self._cell_keys: List[Tuple[int, ...]] = []
+        self._counts = array('q')
+        self._sums = {m: array('d') for m in MEASURES}
+        self._valid = {m: array('q') for m in MEASURES}
+        # project id -> (cell, measure values) so updates can take back the old contribution
+        self._rows: Dict[int, Tuple[int, Tuple[float, ...]]] = {}
+        self._next_anonymous = -1
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Dict], **kwargs) -> 'RollupCube':
+        """Build a cube from project records"""
+        cube = cls(**kwargs)
+        cube.write(projects)
+        return cube
+
+    @classmethod
+    def from_files(cls, files: Iterable[Path], workers: Optional[int] = None) -> 'RollupCube':
+        """Build a cube from part files using the parallel loader"""
+        from .loader import iter_projects, source_signatures
+
+        files = list(files)
+        cube = cls(metadata={'source_files': source_signatures(files)})
+        cube.write(iter_projects(files, fields=SOURCE_FIELDS, workers=workers))
+        return cube
+
+    def __len__(self) -> int:
+        """Number of projects in the cube"""
+        return len(self._rows)
+
+    @property
+    def num_cells(self) -> int:
+        return sum(1 for count in self._counts if count)
+
+    def _cell(self, project: Dict) -> int:
+        key = tuple(self._dicts[dim].code(DIMENSIONS[dim](project)) for dim in CUBE_DIMENSIONS)
+        funds = tuple(sorted(set(MULTI_DIMENSIONS[FUND_DIMENSION](project)), key=str))
+        key += (self._dicts[FUND_DIMENSION].code(funds),)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = len(self._cell_keys)
+            self._cell_keys.append(key)
+            self._counts.append(0)
+            for measure in MEASURES:
+                self._sums[measure].append(0.0)
+                self._valid[measure].append(0)
+        return cell
+
+    def _apply(self, cell: int, values: Tuple[float, ...], sign: int):
+        self._counts[cell] += sign
+        for measure, value in zip(MEASURES, values):
+            if value == value:
+                self._sums[measure][cell] += sign * value
+                self._valid[measure][cell] += sign
+        if not self._counts[cell]:
+            # Clear rounding left over from subtracting
+            for measure in MEASURES:
+                self._sums[measure][cell] = 0.0
+
+    def upsert(self, project: Dict):
+        """Add a project, replacing the previous version of the same id"""
+        project_id = project.get('id')
+        if project_id is None:
+            # Cannot be matched to a later version; counted but never replaced
+            project_id = self._next_anonymous
+            self._next_anonymous -= 1
+        previous = self._rows.get(project_id)
+        if previous is not None:
+            self._apply(previous[0], previous[1], -1)
+        cell = self._cell(project)
+        values = tuple(_measure_value(project.get(m)) for m in MEASURES)
+        self._apply(cell, values, 1)
+        self._rows[project_id] = (cell, values)
+
+    def write(self, projects: Iterable[Dict]):
+        """
+        Upsert a batch of projects
+
+        Lets the cube be passed as one of DIMEScraper(sinks=[...]) so it is
+        updated page by page while scraping.
+        """
+        for project in projects:
+            self.upsert(project)
+
+    def remove(self, project_ids: Iterable[int]) -> int:
+        """
+        Take projects out of the cube
+
+        Returns:
+            Number of projects that were present
+        """
+        removed = 0
+        for project_id in project_ids:
+            previous = self._rows.pop(project_id, None)
+            if previous is not None:
+                self._apply(previous[0], previous[1], -1)
+                removed += 1
+        return removed
+
+    def apply_delta(self, path: Path) -> Dict[str, int]:
+        """
+        Apply a delta file written by DIMEScraper.scrape_incremental
+
+        Returns:
+            Counts of inserted, updated and removed projects applied
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        self.write(delta.get('inserted', []))
+        self.write(delta.get('updated', []))
+        removed = self.remove(delta.get('removed', []))
+        return {'inserted': len(delta.get('inserted', [])), 'updated': len(delta.get('updated', [])),
+                'removed': removed}
+
+    def _allowed(self, filters: Dict[str, Any]) -> Dict[str, set]:
+        """Codes of each filtered dimension that pass the filter"""
+        allowed = {}
+        for dim, wanted in filters.items():
+            if dim not in QUERY_DIMENSIONS:
+                raise KeyError(f"Unknown dimension '{dim}' (expected one of {QUERY_DIMENSIONS})")
+            wanted = _accepted(wanted)
+            values = self._dicts[dim].values
+            if dim == FUND_DIMENSION:
+                allowed[dim] = {code for code, funds in enumerate(values) if wanted.intersection(funds)}
+            else:
+                allowed[dim] = {code for code, value in enumerate(values) if value in wanted}
+        return allowed
+
+    def query(self, group_by: Sequence[str] = (), filters: Optional[Dict[str, Any]] = None,
+              sort_by: str = 'count', top: Optional[int] = None) -> List[Dict]:
+        """
+        Aggregate a slice of the cube
+
+        Results have the same shape as ProjectTable.group_by. Grouping by
+        fundSource counts a project in each of its fund sources; filtering
+        on it keeps projects funded by any of the given sources.
+
+        Args:
+            group_by: Dimensions to group by ([] for a single total)
+            filters: Dimension -> value, or list of accepted values
+            sort_by: Result key to sort by, descending
+            top: Only return the first N groups
+
+        Returns:
+            One dict per group with the dimension values, `count`, the sum and
+            `<measure>_mean` of each measure and `utilization` (None when the
+            cost is zero or no project reports utilizedAmount)
+
+        Raises:
+            KeyError: For a dimension the cube does not have
+        """
+        group_by = list(group_by)
+        for dim in group_by:
+            if dim not in QUERY_DIMENSIONS:
+                raise KeyError(f"Unknown dimension '{dim}' (expected one of {QUERY_DIMENSIONS})")
+        filters = filters or {}
+        allowed = self._allowed(filters)
+        allowed_funds = _accepted(filters[FUND_DIMENSION]) if FUND_DIMENSION in filters else None
+        positions = {dim: i for i, dim in enumerate(QUERY_DIMENSIONS)}
+
+        groups: Dict[Tuple, List[float]] = {}
+        width = 1 + 2 * len(MEASURES)
+        for cell, key in enumerate(self._cell_keys):
+            if not self._counts[cell]:
+                continue
+            if any(key[positions[dim]] not in codes for dim, codes in allowed.items()):
+                continue
+            group_keys = [()]
+            for dim in group_by:
+                if dim == FUND_DIMENSION:
+                    funds = self._dicts[dim].values[key[positions[dim]]]
+                    if allowed_funds is not None:
+                        funds = [fund for fund in funds if fund in allowed_funds]
+                    group_keys = [k + (fund,) for k in group_keys for fund in funds]
+                else:
+                    value = self._dicts[dim].values[key[positions[dim]]]
+                    group_keys = [k + (value,) for k in group_keys]
+            for group_key in group_keys:
+                acc = groups.get(group_key)
+                if acc is None:
+                    acc = groups[group_key] = [0.0] * width
+                acc[0] += self._counts[cell]
+                for j, measure in enumerate(MEASURES):
+                    acc[1 + 2 * j] += self._sums[measure][cell]
+                    acc[2 + 2 * j] += self._valid[measure][cell]
+
+        if not group_by and not groups:
+            groups[()] = [0.0] * width
+        results = []
+        for group_key, acc in groups.items():
+            group = dict(zip(group_by, group_key))
+            group['count'] = int(acc[0])
+            valid = {}
+            for j, measure in enumerate(MEASURES):
+                group[measure] = acc[1 + 2 * j]
+                valid[measure] = int(acc[2 + 2 * j])
+                group[f"{measure}_mean"] = group[measure] / valid[measure] if valid[measure] else None
+            reported = group['cost'] and valid['utilizedAmount']
+            group['utilization'] = group['utilizedAmount'] / group['cost'] if reported else None
+            results.append(group)
+
+        results.sort(key=lambda g: (g[sort_by] is not None, g[sort_by] or 0), reverse=True)
+        return results[:top] if top is not None else results
+
+    def total(self, filters: Optional[Dict[str, Any]] = None) -> Dict:
+        """Count and measure totals of a slice"""
+        return self.query((), filters)[0]
+
+    def drill_down(self, dim: str, filters: Optional[Dict[str, Any]] = None, **kwargs) -> List[Dict]:
+        """
+        Break a slice down by one more dimension
+
+        Example:
+            cube.drill_down('province', {'region': 'Region VII'})
+        """
+        return self.query([dim], filters, **kwargs)
+
+    def values(self, dim: str) -> List[Any]:
+        """Distinct values of a dimension present in the cube"""
+        if dim == FUND_DIMENSION:
+            seen = {}
+            for funds in self._dicts[dim].values:
+                seen.update(dict.fromkeys(funds))
+            return list(seen)
+        return list(self._dicts[dim].values)
+
+    def save(self, path: str) -> Path:
+        """
+        Write the cube as an .npz archive
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            'dimensions': list(QUERY_DIMENSIONS),
+            'measures': list(MEASURES),
+            'dictionaries': {dim: [list(v) if dim == FUND_DIMENSION else v for v in d.values]
+                             for dim, d in self._dicts.items()},
+            'projects': len(self),
+            'next_anonymous': self._next_anonymous,
+            'metadata': self.metadata,
+        }
+        arrays = {f"cell_{dim}": array('i', (key[i] for key in self._cell_keys))
+                  for i, dim in enumerate(QUERY_DIMENSIONS)}
+        arrays['cell_count'] = self._counts
+        row_ids = array('q', self._rows)
+        arrays['row_id'] = row_ids
+        arrays['row_cell'] = array('q', (cell for cell, _ in self._rows.values()))
+        for j, measure in enumerate(MEASURES):
+            arrays[f"cell_{measure}_sum"] = self._sums[measure]
+            arrays[f"cell_{measure}_valid"] = self._valid[measure]
+            arrays[f"row_{measure}"] = array('d', (values[j] for _, values in self._rows.values()))
+
+        tmp_path = path.with_name(path.name + '.tmp')
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, values in arrays.items():
+                archive.writestr(f"{name}.npy", _npy_bytes(values))
+            archive.writestr('cube.json', json.dumps(header, ensure_ascii=False))
+        tmp_path.replace(path)
+        logger.info(f"Saved rollup cube of {len(self)} projects ({self.num_cells} cells) to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'RollupCube':
+        """Load a cube written by save()"""
+        with zipfile.ZipFile(path) as archive:
+            header = json.loads(archive.read('cube.json'))
+            arrays = {name[:-4]: _read_npy(archive.read(name))
+                      for name in archive.namelist() if name.endswith('.npy')}
+
+        cube = cls(metadata=header.get('metadata'))
+        for dim, values in header['dictionaries'].items():
+            for value in values:
+                cube._dicts[dim].code(tuple(value) if dim == FUND_DIMENSION else value)
+        cube._cell_keys = list(zip(*(arrays[f"cell_{dim}"] for dim in QUERY_DIMENSIONS)))
+        cube._cells = {key: cell for cell, key in enumerate(cube._cell_keys)}
+        cube._counts = arrays['cell_count']
+        for measure in MEASURES:
+            cube._sums[measure] = arrays[f"cell_{measure}_sum"]
+            cube._valid[measure] = arrays[f"cell_{measure}_valid"]
+        measures = [arrays[f"row_{measure}"] for measure in MEASURES]
+        cube._rows = {project_id: (cell, tuple(column[i] for column in measures))
+                      for i, (project_id, cell) in enumerate(zip(arrays['row_id'], arrays['row_cell']))}
+        cube._next_anonymous = header.get('next_anonymous', -1)
+        return cube
+
+    @classmethod
+    def load_or_build(cls, data_dir: str = "scraped_data", path: Optional[str] = None,
+                      workers: Optional[int] = None) -> 'RollupCube':
+        """
+        Load the saved cube, bringing it up to date with the part files
+
+        Part files that appeared since the cube was saved are upserted into
+        it; if any file it was built from changed or disappeared, the cube
+        is rebuilt from scratch.
+
+        Args:
+            data_dir: Directory holding the scraped part files
+            path: Cube file (defaults to rollup_cube.npz in data_dir)
+            workers: Number of parser processes used when reading part files
+
+        Returns:
+            The cube
+        """
+        from .loader import find_part_files, iter_projects, new_part_files, source_signatures
+
+        path = Path(path) if path else Path(data_dir) / DEFAULT_CUBE_NAME
+        files = find_part_files(data_dir)
+        if path.exists():
+            cube = cls.load(path)
+            new_files = new_part_files(path, files, cube.metadata.get('source_files', []))
+            if new_files == []:
+                return cube
+            if new_files:
+                logger.info(f"Adding {len(new_files)} new part files to {path}")
+                cube.write(iter_projects(new_files, fields=SOURCE_FIELDS, workers=workers))
+                cube.metadata['source_files'] = source_signatures(files)
+                cube.save(path)
+                return cube
+
+        cube = cls.from_files(files, workers=workers)
+        cube.save(path)
+        return cube
+
+
+def _print_groups(groups: List[Dict], dims: Sequence[str]):
+    for group in groups:
+        label = ' / '.join(str(group[dim]) for dim in dims) or 'Total'
+        utilization = f"{group['utilization']:.1%}" if group['utilization'] is not None else "n/a"
+        print(f"   {label}: {group['count']:,} projects, ₱{group['cost']:,.2f} "
+              f"({utilization} utilized)")
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Query the rollup cube of scraped DIME projects")
+    parser.add_argument('data_dir', help="Directory with scraped part files")
+    parser.add_argument('--group-by', default='',
+                        help=f"Comma-separated dimensions ({', '.join(QUERY_DIMENSIONS)})")
+    parser.add_argument('--filter', action='append', default=[], metavar='DIM=VALUE',
+                        help="Restrict to a dimension value (repeatable)")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--sort-by', default='cost')
+    args = parser.parse_args(argv)
+
+    filters: Dict[str, List[str]] = {}
+    for item in args.filter:
+        dim, _, value = item.partition('=')
+        filters.setdefault(dim, []).append(value)
+    dims = [d for d in args.group_by.split(',') if d]
+
+    cube = RollupCube.load_or_build(args.data_dir)
+    print(f"Rollup cube: {len(cube):,} projects in {cube.num_cells:,} cells")
+    _print_groups(cube.query(dims, filters, sort_by=args.sort_by, top=args.top), dims)
+
+
+if __name__ == "__main__":
+    main()
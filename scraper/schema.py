@@ -0,0 +1,118 @@
+"""
+Field layout of DIME project records
+Groups the fields returned by /api/v1/projects by storage kind so that the
+columnar, snapshot and analysis code agree on how each field is typed.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+# Order in which the API returns the fields of a project record
+FIELD_ORDER = (
+    'id', 'latitude', 'longitude', 'status', 'latestProgress',
+    'implementingOffices', 'program', 'contractors', 'sourceOfFunds',
+    'projectName', 'projectCode', 'description', 'projectImageUrl',
+    'streetAddress', 'city', 'cityCode', 'zipCode', 'projectType', 'cost',
+    'utilizedAmount', 'dateStarted', 'contractCompletionDate',
+    'actualContractCompletionDate', 'barangay', 'barangayCode', 'province',
+    'provinceCode', 'country', 'region', 'regionCode',
+    'lastUpdatedProjectCost', 'actualDateStarted',
+)
+
+# Numeric measures and coordinates
+FLOAT_FIELDS = ('latitude', 'longitude', 'latestProgress', 'cost', 'utilizedAmount')
+
+# Integer identifiers
+INT_FIELDS = ('id', 'zipCode')
+
+# ISO-8601 timestamps such as "2025-02-18T16:00:00.000Z"
+DATE_FIELDS = (
+    'dateStarted', 'contractCompletionDate', 'actualContractCompletionDate',
+    'lastUpdatedProjectCost', 'actualDateStarted',
+)
+
+# Low-cardinality strings (status, PSGC location names and codes)
+CATEGORY_FIELDS = (
+    'status', 'projectType', 'city', 'cityCode', 'barangay', 'barangayCode',
+    'province', 'provinceCode', 'country', 'region', 'regionCode',
+)
+
+# Free text, mostly unique per project
+TEXT_FIELDS = ('projectName', 'projectCode', 'description', 'projectImageUrl', 'streetAddress')
+
+# Nested entities shared across many projects
+ENTITY_FIELDS = ('program',)
+ENTITY_LIST_FIELDS = ('implementingOffices', 'contractors', 'sourceOfFunds')
+
+# Keys of the nested entity objects, in API order ('id' is an integer, the rest strings)
+ENTITY_KEYS = {
+    'program': ('id', 'programName', 'nameAbbreviation', 'programDescription'),
+    'implementingOffices': ('id', 'name', 'nameAbbreviation'),
+    'contractors': ('id', 'name', 'nameAbbreviation', 'logoUrl'),
+    'sourceOfFunds': ('id', 'name', 'nameAbbreviation'),
+}
+
+# Null marker for timestamps stored as int64 milliseconds (numpy's NaT)
+NULL_TIMESTAMP = -2 ** 63
+
+
+def field_kind(field: str) -> str:
+    """
+    Storage kind of a project field
+
+    Returns:
+        One of 'float', 'int', 'date', 'category', 'text', 'entity',
+        'entity_list', or 'json' for fields this module does not know about
+    """
+    if field in FLOAT_FIELDS:
+        return 'float'
+    if field in INT_FIELDS:
+        return 'int'
+    if field in DATE_FIELDS:
+        return 'date'
+    if field in CATEGORY_FIELDS:
+        return 'category'
+    if field in TEXT_FIELDS:
+        return 'text'
+    if field in ENTITY_FIELDS:
+        return 'entity'
+    if field in ENTITY_LIST_FIELDS:
+        return 'entity_list'
+    return 'json'
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """
+    Convert an API timestamp to milliseconds since the Unix epoch
+
+    Args:
+        value: Timestamp string (e.g. "2025-02-18T16:00:00.000Z") or None
+
+    Returns:
+        Milliseconds since epoch (UTC), or None for null values
+
+    Raises:
+        ValueError: If the value is not an ISO-8601 timestamp
+    """
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(round(parsed.timestamp() * 1000))
+
+
+def format_timestamp(millis: Optional[int]) -> Optional[str]:
+    """
+    Convert milliseconds since epoch back to the API timestamp format
+
+    Args:
+        millis: Milliseconds since epoch, or None / NULL_TIMESTAMP for null
+
+    Returns:
+        Timestamp string such as "2025-02-18T16:00:00.000Z", or None
+    """
+    if millis is None or millis == NULL_TIMESTAMP:
+        return None
+    parsed = datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S.') + f"{millis % 1000:03d}Z"
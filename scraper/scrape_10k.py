@@ -5,23 +5,20 @@ Saves data in JSON files with 1000 records each (10 files total if 10k records a
 
 import sys
 from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from scraper.dime_scraper import DIMEScraper
-import logging
+if __package__ in (None, ''):
+    # Run as a script: make the scraper package importable
+    sys.path.insert(0, str(Path(__file__).parent.parent))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scrape_10k.log'),
-        logging.StreamHandler()
-    ]
-)
+from scraper.cli import configure_logging
+import logging
 
 logger = logging.getLogger(__name__)
 
 def main():
+    from scraper.dime_scraper import DIMEScraper
+    
+    configure_logging(log_file='scrape_10k.log')
     logger.info("="*60)
     logger.info("DIME Philippines - Scraping 10,000+ Records")
     logger.info("="*60)
@@ -36,16 +33,22 @@ def main():
     logger.info("This will create multiple JSON files with 1000 records each")
     
     try:
-        # Scrape all projects - API will return all available data
-        all_projects = scraper.scrape_all_projects(
+        # Scrape all projects - API will return all available data.
+        # Each page is streamed straight into the part files as it arrives.
+        result = scraper.scrape_to_files(
             status=None,        # No filter - get all projects
+            prefix="dime_projects_all",
             per_page=100,       # Fetch 100 records per API call
             max_retries=3,      # Retry failed requests 3 times
             retry_delay=5       # Wait 5 seconds between retries
         )
         
-        total_scraped = len(all_projects)
+        total_scraped = result['total_projects']
         logger.info(f"="*60)
+        if not result['complete']:
+            logger.error(f"❌ Scrape stopped early with {total_scraped:,} projects on disk")
+            logger.error(f"   Run this script again to resume from the last checkpoint")
+            return
         logger.info(f"✅ Successfully scraped {total_scraped:,} projects")
         
         if total_scraped >= 10000:
@@ -57,13 +60,8 @@ def main():
             logger.error(f"❌ No projects were scraped. Check the logs for errors.")
             return
         
-        # Save to JSON files
-        logger.info(f"="*60)
-        logger.info("Saving data to JSON files...")
-        scraper.save_projects_to_json(all_projects, prefix="dime_projects_all")
-        
         # Calculate file count
-        num_files = (total_scraped + 999) // 1000  # Round up
+        num_files = len(result['files'])
         logger.info(f"="*60)
         logger.info(f"✅ SCRAPING COMPLETE!")
         logger.info(f"="*60)
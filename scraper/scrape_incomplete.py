@@ -1,42 +1,22 @@
 """
 Example: Scrape only Incomplete projects
+
+Same as `python -m scraper --log-file incomplete_projects_scraper.log scrape --status Incomplete --output-dir scraped_data/incomplete`
 """
 
 import sys
 from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from scraper.dime_scraper import DIMEScraper
-import logging
+if __package__ in (None, ''):
+    # Run as a script: make the scraper package importable
+    sys.path.insert(0, str(Path(__file__).parent.parent))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('incomplete_projects_scraper.log'),
-        logging.StreamHandler()
-    ]
-)
+from scraper.cli import main as cli_main
 
-logger = logging.getLogger(__name__)
 
 def main():
-    logger.info("="*60)
-    logger.info("Scraping INCOMPLETE projects only")
-    logger.info("="*60)
-    
-    # Initialize scraper
-    scraper = DIMEScraper(
-        output_dir="scraped_data/incomplete",
-        records_per_file=1000
-    )
-    
-    # Scrape only incomplete projects
-    scraper.scrape_by_status(statuses=["Incomplete"])
-    
-    logger.info("="*60)
-    logger.info("Completed! Check 'scraped_data/incomplete/' directory")
-    logger.info("="*60)
+    return cli_main(['--log-file', 'incomplete_projects_scraper.log',
+                     'scrape', '--status', 'Incomplete', '--output-dir', 'scraped_data/incomplete'])
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,426 @@
+"""
+Full-text search over scraped DIME projects
+Builds an inverted index from each project's name, description and code,
+its contractors and sources of funds, and its location (street, barangay,
+city, province, region). Tokens are case- and accent-folded (Parañaque
+matches Paranaque), hyphenated names are indexed both split and joined, and
+common abbreviations in Philippine place names (Pob., Sto., Brgy., ...) are
+expanded. Results are ranked with BM25, weighting name and code matches above
+description matches, and the last query word also matches as a prefix. The
+index is saved as an .npz archive next to the part files and extended in
+place when new part files appear.
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import logging
+import math
+import re
+import unicodedata
+import zipfile
+from array import array
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from .columnar import _npy_bytes, _read_npy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_NAME = "search_index.npz"
+
+# Relative weight of a token found in each field
+FIELD_WEIGHTS = {
+    'projectName': 3.0,
+    'projectCode': 3.0,
+    'contractors': 2.0,
+    'sourceOfFunds': 1.5,
+    'barangay': 1.5,
+    'city': 1.5,
+    'province': 1.5,
+    'region': 1.0,
+    'streetAddress': 1.0,
+    'description': 1.0,
+}
+
+# Project fields the index is built from
+SOURCE_FIELDS = ('id',) + tuple(FIELD_WEIGHTS)
+
+# Abbreviations common in PSGC and DPWH names, indexed alongside their expansion
+ABBREVIATIONS = {
+    'pob': 'poblacion', 'brgy': 'barangay', 'bgy': 'barangay', 'sto': 'santo', 'sta': 'santa',
+    'gen': 'general', 'pres': 'president', 'mun': 'municipality', 'prov': 'province',
+    'nat': 'national', 'natl': 'national', 'rd': 'road', 'ave': 'avenue', 'hwy': 'highway',
+    'bldg': 'building', 'dist': 'district', 'sitio': 'sitio',
+}
+
+# English and Filipino function words that carry no meaning on their own
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'into', 'of', 'on', 'or', 'the', 'to',
+    'with', 'along', 'ang', 'ng', 'sa', 'na', 'mga', 'ni', 'si',
+})
+
+# Relative score of a term matched only as a prefix of the last query word
+PREFIX_WEIGHT = 0.7
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"[0-9a-z]+(?:[-'][0-9a-z]+)*")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents (ñ -> n, é -> e)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into index terms
+
+    Hyphenated and apostrophised words yield their parts and the joined
+    word ("lapu-lapu" -> lapu, lapu, lapulapu), and abbreviations also
+    yield their expansion ("pob." -> pob, poblacion).
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in _WORD.findall(fold(text)):
+        parts = re.split(r"[-']", word)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in STOPWORDS)
+            tokens.append(''.join(parts))
+        elif word not in STOPWORDS:
+            tokens.append(word)
+            if word in ABBREVIATIONS:
+                tokens.append(ABBREVIATIONS[word])
+    return tokens
+
+
+def query_words(query: str) -> List[str]:
+    """
+    Split a query into words, each of which a result must match
+
+    Unlike tokenize(), every query word maps to a single term: hyphenated
+    words to their joined form and abbreviations to their expansion, both
+    of which the index holds for every spelling.
+    """
+    words = []
+    for word in _WORD.findall(fold(query)):
+        word = re.sub(r"[-']", '', word)
+        if word not in STOPWORDS and word not in words:
+            words.append(word)
+    return words
+
+
+def _field_text(project: Dict, field: str) -> str:
+    value = project.get(field)
+    if isinstance(value, list):
+        return ' '.join(str(entity.get('name') or '') for entity in value if isinstance(entity, dict))
+    return str(value) if value is not None else ''
+
+
+class SearchIndex:
+    """BM25-ranked inverted index of project text fields"""
+
+    def __init__(self, metadata: Optional[Dict] = None):
+        """
+        Create an empty index
+
+        Args:
+            metadata: Extra information saved with the index
+        """
+        self.metadata = dict(metadata or {})
+        self.ids = array('q')
+        self.names: List[str] = []
+        self.lengths = array('d')
+        self.deleted = array('B')
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_by_id: Dict[int, int] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self._norm_cache: Optional[List[Optional[float]]] = None
+        self._live = 0
+        self._total_length = 0.0
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Dict], **kwargs) -> 'SearchIndex':
+        """Build an index from project records"""
+        index = cls(**kwargs)
+        index.add(projects)
+        return index
+
+    @classmethod
+    def from_files(cls, files: Iterable[Path], workers: Optional[int] = None) -> 'SearchIndex':
+        """Build an index from part files using the parallel loader"""
+        from .loader import iter_projects, source_signatures
+
+        files = list(files)
+        index = cls(metadata={'source_files': source_signatures(files)})
+        index.add(iter_projects(files, fields=SOURCE_FIELDS, workers=workers))
+        return index
+
+    def __len__(self) -> int:
+        """Number of searchable projects"""
+        return self._live
+
+    def add(self, projects: Iterable[Dict]):
+        """
+        Index projects; a project whose id is already indexed replaces it
+        """
+        for project in projects:
+            project_id = project.get('id')
+            previous = self._doc_by_id.get(project_id)
+            if previous is not None:
+                self._delete(previous)
+
+            doc = len(self.ids)
+            weights: Dict[str, float] = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(_field_text(project, field)):
+                    weights[token] = weights.get(token, 0.0) + weight
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array('i'), array('d'))
+                    self._sorted_terms = None
+                postings[0].append(doc)
+                postings[1].append(weight)
+
+            length = sum(weights.values())
+            self.ids.append(project_id if project_id is not None else -1)
+            self.names.append(project.get('projectName') or '')
+            self.lengths.append(length)
+            self.deleted.append(0)
+            if project_id is not None:
+                self._doc_by_id[project_id] = doc
+            self._live += 1
+            self._total_length += length
+            self._norm_cache = None
+
+    def remove(self, project_ids: Iterable[int]) -> int:
+        """
+        Drop projects from the results
+
+        Returns:
+            Number of projects that were indexed
+        """
+        removed = 0
+        for project_id in project_ids:
+            doc = self._doc_by_id.pop(project_id, None)
+            if doc is not None:
+                self._delete(doc)
+                removed += 1
+        return removed
+
+    def _delete(self, doc: int):
+        if not self.deleted[doc]:
+            self.deleted[doc] = 1
+            self._live -= 1
+            self._total_length -= self.lengths[doc]
+            self._norm_cache = None
+
+    def _expand(self, word: str, prefix: bool) -> List[Tuple[str, float]]:
+        """Index terms matching a query word, with their score multiplier"""
+        term = ABBREVIATIONS.get(word, word)
+        matches = [(term, 1.0)] if term in self._postings else []
+        if prefix:
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(self._postings)
+            start = bisect.bisect_left(self._sorted_terms, word)
+            for candidate in self._sorted_terms[start:]:
+                if not candidate.startswith(word):
+                    break
+                if candidate != term:
+                    matches.append((candidate, PREFIX_WEIGHT))
+        return matches
+
+    def _norms(self) -> List[Optional[float]]:
+        """Per-document BM25 length normalisation (None for deleted documents)"""
+        if self._norm_cache is None:
+            avg_length = self._total_length / self._live if self._live else 1.0
+            self._norm_cache = [None if deleted else BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                                for length, deleted in zip(self.lengths, self.deleted)]
+        return self._norm_cache
+
+    def search(self, query: str, limit: Optional[int] = 20, prefix: bool = True) -> List[Dict]:
+        """
+        Projects matching every word of a query, best first
+
+        Args:
+            query: Keywords, e.g. "seawall Tacloban" or "jica loan"
+            limit: Maximum number of results (None for all)
+            prefix: Let the last word also match longer terms ("sea" ->
+                seawall, seaport)
+
+        Returns:
+            Dicts with `id`, `projectName` and BM25 `score`
+        """
+        words = query_words(query)
+        if not words or not self._live:
+            return []
+        norms = self._norms()
+
+        scores: Optional[Dict[int, float]] = None
+        for position, word in enumerate(words):
+            word_scores: Dict[int, float] = {}
+            for term, multiplier in self._expand(word, prefix and position == len(words) - 1):
+                docs, weights = self._postings[term]
+                idf = math.log(1 + (self._live - len(docs) + 0.5) / (len(docs) + 0.5))
+                scale = multiplier * idf * (BM25_K1 + 1)
+                for doc, weight in zip(docs, weights):
+                    norm = norms[doc]
+                    if norm is None:
+                        continue
+                    score = scale * weight / (weight + norm)
+                    if score > word_scores.get(doc, 0.0):
+                        word_scores[doc] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc: score + word_scores[doc] for doc, score in scores.items() if doc in word_scores}
+            if not scores:
+                return []
+
+        def rank(item):
+            return -item[1], self.ids[item[0]]
+
+        if limit is None:
+            ranked = sorted(scores.items(), key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, scores.items(), key=rank)
+        return [{'id': self.ids[doc], 'projectName': self.names[doc], 'score': round(score, 4)}
+                for doc, score in ranked]
+
+    def _compacted(self) -> 'SearchIndex':
+        """A copy without deleted documents"""
+        keep = [doc for doc in range(len(self.ids)) if not self.deleted[doc]]
+        if len(keep) == len(self.ids):
+            return self
+        remap = {doc: new for new, doc in enumerate(keep)}
+        index = SearchIndex(metadata=self.metadata)
+        index.ids = array('q', (self.ids[doc] for doc in keep))
+        index.names = [self.names[doc] for doc in keep]
+        index.lengths = array('d', (self.lengths[doc] for doc in keep))
+        index.deleted = array('B', bytes(len(keep)))
+        for term, (docs, weights) in self._postings.items():
+            pairs = [(remap[doc], weight) for doc, weight in zip(docs, weights) if doc in remap]
+            if pairs:
+                index._postings[term] = (array('i', (p[0] for p in pairs)), array('d', (p[1] for p in pairs)))
+        index._doc_by_id = {project_id: doc for doc, project_id in enumerate(index.ids) if project_id != -1}
+        index._live = len(keep)
+        index._total_length = sum(index.lengths)
+        return index
+
+    def save(self, path: str) -> Path:
+        """
+        Write the index as an .npz archive (deleted documents are dropped)
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        index = self._compacted()
+        terms = sorted(index._postings)
+        starts, docs, weights = array('q', [0]), array('i'), array('d')
+        for term in terms:
+            term_docs, term_weights = index._postings[term]
+            docs.extend(term_docs)
+            weights.extend(term_weights)
+            starts.append(len(docs))
+
+        header = {'documents': len(index.ids), 'metadata': self.metadata}
+        tmp_path = path.with_name(path.name + '.tmp')
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, values in (('ids', index.ids), ('lengths', index.lengths), ('term_starts', starts),
+                                 ('docs', docs), ('weights', weights)):
+                archive.writestr(f"{name}.npy", _npy_bytes(values))
+            archive.writestr('terms.json', json.dumps(terms, ensure_ascii=False))
+            archive.writestr('names.json', json.dumps(index.names, ensure_ascii=False))
+            archive.writestr('index.json', json.dumps(header, ensure_ascii=False))
+        tmp_path.replace(path)
+        logger.info(f"Saved search index of {len(index.ids)} projects ({len(terms)} terms) to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        """Load an index written by save()"""
+        with zipfile.ZipFile(path) as archive:
+            header = json.loads(archive.read('index.json'))
+            arrays = {name: _read_npy(archive.read(f"{name}.npy"))
+                      for name in ('ids', 'lengths', 'term_starts', 'docs', 'weights')}
+            terms = json.loads(archive.read('terms.json'))
+            names = json.loads(archive.read('names.json'))
+
+        index = cls(metadata=header.get('metadata'))
+        index.ids = arrays['ids']
+        index.names = names
+        index.lengths = arrays['lengths']
+        index.deleted = array('B', bytes(len(index.ids)))
+        starts, docs, weights = arrays['term_starts'], arrays['docs'], arrays['weights']
+        index._postings = {term: (docs[starts[i]:starts[i + 1]], weights[starts[i]:starts[i + 1]])
+                           for i, term in enumerate(terms)}
+        index._sorted_terms = terms
+        index._doc_by_id = {project_id: doc for doc, project_id in enumerate(index.ids) if project_id != -1}
+        index._live = len(index.ids)
+        index._total_length = sum(index.lengths)
+        return index
+
+    @classmethod
+    def load_or_build(cls, data_dir: str = "scraped_data", path: Optional[str] = None,
+                      workers: Optional[int] = None) -> 'SearchIndex':
+        """
+        Load the saved index, bringing it up to date with the part files
+
+        Part files that appeared since the index was saved are added to it
+        (replacing earlier versions of the same projects); if any file it was
+        built from changed or disappeared, it is rebuilt from scratch.
+
+        Args:
+            data_dir: Directory holding the scraped part files
+            path: Index file (defaults to search_index.npz in data_dir)
+            workers: Number of parser processes used when reading part files
+
+        Returns:
+            The index
+        """
+        from .loader import find_part_files, iter_projects, new_part_files, source_signatures
+
+        path = Path(path) if path else Path(data_dir) / DEFAULT_INDEX_NAME
+        files = find_part_files(data_dir)
+        if path.exists():
+            index = cls.load(path)
+            new_files = new_part_files(path, files, index.metadata.get('source_files', []))
+            if new_files == []:
+                return index
+            if new_files:
+                logger.info(f"Adding {len(new_files)} new part files to {path}")
+                index.add(iter_projects(new_files, fields=SOURCE_FIELDS, workers=workers))
+                index.metadata['source_files'] = source_signatures(files)
+                index.save(path)
+                return index
+
+        index = cls.from_files(files, workers=workers)
+        index.save(path)
+        return index
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Search scraped DIME projects by keyword")
+    parser.add_argument('data_dir', help="Directory with scraped part files")
+    parser.add_argument('query', help="Keywords, e.g. \"seawall tacloban\"")
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--exact', action='store_true', help="Do not prefix-match the last word")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex.load_or_build(args.data_dir)
+    results = index.search(args.query, limit=args.limit, prefix=not args.exact)
+    print(f"{len(results)} results for {args.query!r} in {len(index):,} projects")
+    for result in results:
+        print(f"   [{result['id']}] {result['projectName']} ({result['score']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Memory-mapped, read-only snapshot of a scraped dataset
+Packs every project from the part files into one file: fixed-width columns
+(id, cost, utilizedAmount, coordinates, dates, category codes) and
+offset-indexed string and entity tables, each aligned so it can be used in
+place. A Snapshot maps the file instead of parsing it, so opening one takes
+no parse time and every process reading the same snapshot shares its pages
+through the OS page cache. Snapshots are rebuilt, never modified: a new
+build replaces the file atomically and processes that still have the old
+one open keep reading it.
+"""
+
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Any
+
+from .columnar import ColumnarFile, encode_columns
+from .schema import format_timestamp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_NAME = "dataset.snapshot"
+
+SNAPSHOT_MAGIC = b'DIMESNAP'
+SNAPSHOT_VERSION = 1
+
+# Column data starts on a multiple of this many bytes (one cache line)
+ALIGNMENT = 64
+
+# magic, version, header length
+_PREAMBLE = struct.Struct('<8sII')
+
+# Row numbers ordered by project id, for lookups by id without an in-memory dict
+_ID_ORDER = '__id_order'
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _latest_by_id(projects: Iterable[Dict]) -> List[Dict]:
+    """Projects with later records of the same id replacing earlier ones"""
+    by_id: Dict[Any, Dict] = {}
+    anonymous = []
+    for project in projects:
+        project_id = project.get('id')
+        if project_id is None:
+            anonymous.append(project)
+        else:
+            by_id.pop(project_id, None)
+            by_id[project_id] = project
+    return list(by_id.values()) + anonymous
+
+
+def write_snapshot(projects: Iterable[Dict], path: str, metadata: Optional[Dict] = None) -> Path:
+    """
+    Write projects as a memory-mappable snapshot
+
+    The file is an 8-byte magic, a version, a JSON header (row count,
+    column kinds, category dictionaries, entity tables and the offset,
+    typecode and length of every column array) and the little-endian
+    column arrays. It is written to a temporary file and renamed, so
+    readers never see a partial snapshot.
+
+    Args:
+        projects: Project records; a later record with the same id replaces
+            an earlier one
+        path: Output file
+        metadata: Extra information stored in the header
+
+    Returns:
+        The path written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    projects = _latest_by_id(projects)
+    encoded = encode_columns(projects)
+    arrays = dict(encoded['arrays'])
+    ids = [project.get('id') for project in projects]
+    if all(isinstance(i, int) for i in ids):
+        arrays[_ID_ORDER] = array('q', sorted(range(len(ids)), key=ids.__getitem__))
+
+    members = {}
+    offset = 0
+    for name, values in arrays.items():
+        members[name] = [offset, values.typecode, len(values)]
+        offset = _aligned(offset + len(values) * values.itemsize)
+    header = json.dumps({
+        'num_rows': len(projects),
+        'columns': encoded['columns'],
+        'dictionaries': encoded['dictionaries'],
+        'entities': encoded['entities'],
+        'members': members,
+        'metadata': metadata or {},
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(data_start + members[name][0])
+            if sys.byteorder == 'big' and values.itemsize > 1:
+                values = array(values.typecode, values)
+                values.byteswap()
+            f.write(values.tobytes())
+        f.truncate(data_start + offset)
+    tmp_path.replace(path)
+    logger.info(f"Wrote snapshot of {len(projects)} projects to {path} "
+                f"({path.stat().st_size / 1e6:.1f} MB)")
+    return path
+
+
+class Snapshot(ColumnarFile):
+    """Zero-copy reader for a file written by write_snapshot"""
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file
+
+        Args:
+            path: File written by write_snapshot
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mmap)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a version {SNAPSHOT_VERSION} snapshot")
+        header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        self._data_start = _aligned(_PREAMBLE.size + header_len)
+        self._buffer = memoryview(self._mmap)
+        self._views: Dict[str, Any] = {}
+        self.num_rows: int = header['num_rows']
+        self.columns: Dict[str, str] = header['columns']
+        self.dictionaries: Dict[str, List[str]] = header['dictionaries']
+        self.entities: Dict[str, List[Dict]] = header['entities']
+        self.members: Dict[str, List] = header['members']
+        self.metadata: Dict = header['metadata']
+
+    def __reduce__(self):
+        # Worker processes re-map the file rather than receiving a copy of it
+        return Snapshot, (str(self.path),)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @property
+    def _members(self) -> set:
+        return set(self.members)
+
+    def raw(self, name: str):
+        """
+        Column array backed directly by the mapped file (e.g. 'cost' or 'status__codes')
+
+        Returns:
+            A read-only memoryview cast to the column's type (a copied array
+            on big-endian machines); valid until close()
+        """
+        view = self._views.get(name)
+        if view is None:
+            offset, typecode, length = self.members[name]
+            start = self._data_start + offset
+            size = length * array(typecode).itemsize
+            view = self._buffer[start:start + size].cast(typecode)
+            if sys.byteorder == 'big' and view.itemsize > 1:
+                view = array(typecode, view)
+                view.byteswap()
+            self._views[name] = view
+        return view
+
+    def value(self, field: str, row: int) -> Any:
+        """
+        Decode one field of one project without touching the rest of the column
+
+        Args:
+            field: Project field name
+            row: Row number (0 <= row < len(snapshot))
+
+        Returns:
+            The value in the API's JSON shape (None for nulls)
+        """
+        kind = self.columns[field]
+        if kind == 'float':
+            value = self.raw(field)[row]
+            return None if value != value else value
+        if kind == 'int':
+            if f"{field}__valid" in self.members and not self.raw(f"{field}__valid")[row]:
+                return None
+            return self.raw(field)[row]
+        if kind == 'date':
+            return format_timestamp(self.raw(field)[row])
+        if kind in ('category', 'entity'):
+            code = self.raw(f"{field}__codes")[row]
+            table = self.dictionaries[field] if kind == 'category' else self.entities[field]
+            return table[code] if code >= 0 else None
+        if not self.raw(f"{field}__valid")[row]:
+            return None
+        offsets = self.raw(f"{field}__offsets")
+        start, end = offsets[row], offsets[row + 1]
+        if kind == 'entity_list':
+            table = self.entities[field]
+            return [table[c] for c in self.raw(f"{field}__codes")[start:end]]
+        text = self.raw(f"{field}__data")[start:end].tobytes().decode('utf-8')
+        return json.loads(text) if kind == 'json' else text
+
+    def project(self, row: int, fields: Optional[Iterable[str]] = None) -> Dict:
+        """One project as a dict in the API's JSON shape"""
+        if not 0 <= row < self.num_rows:
+            raise IndexError(f"row {row} out of range for {self.num_rows} projects")
+        return {field: self.value(field, row) for field in (fields or self.columns)}
+
+    def __getitem__(self, row: int) -> Dict:
+        return self.project(row)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_projects()
+
+    def row_of(self, project_id: int) -> Optional[int]:
+        """
+        Row number of a project, by binary search over the id order stored in the file
+
+        Returns:
+            The row, or None if the id is not in the snapshot
+        """
+        if _ID_ORDER not in self.members:
+            return None
+        order, ids = self.raw(_ID_ORDER), self.raw('id')
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if ids[order[middle]] < project_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and ids[order[low]] == project_id:
+            return order[low]
+        return None
+
+    def get(self, project_id: int, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """The project with the given id, or None"""
+        row = self.row_of(project_id)
+        return None if row is None else self.project(row, fields)
+
+    def close(self):
+        """
+        Unmap the file
+
+        Arrays returned by raw() must not be used afterwards; if any are
+        still referenced, the mapping is released once they are garbage
+        collected instead.
+        """
+        for view in self._views.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self._views.clear()
+        self._buffer.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    @classmethod
+    def load_or_build(cls, data_dir: str = "scraped_data", path: Optional[str] = None,
+                      workers: Optional[int] = None) -> 'Snapshot':
+        """
+        Open the snapshot of a data directory, rebuilding it first if stale
+
+        The snapshot is rebuilt when part files were added, changed or
+        removed since it was written.
+
+        Args:
+            data_dir: Directory holding the scraped part files
+            path: Snapshot file (defaults to dataset.snapshot in data_dir)
+            workers: Number of parser processes used when reading part files
+
+        Returns:
+            The mapped snapshot
+        """
+        from .loader import find_part_files, is_current, iter_projects, source_signatures
+
+        path = Path(path) if path else Path(data_dir) / DEFAULT_SNAPSHOT_NAME
+        files = find_part_files(data_dir)
+        if path.exists():
+            snapshot = cls(path)
+            if is_current(path, files, snapshot.metadata.get('source_files', [])):
+                return snapshot
+            snapshot.close()
+
+        write_snapshot(iter_projects(files, workers=workers), path, {'source_files': source_signatures(files)})
+        return cls(path)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m scraper.snapshot <data_dir> [snapshot_path]")
+        return
+
+    snapshot = Snapshot.load_or_build(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"{snapshot.path}: {len(snapshot):,} projects, {len(snapshot.columns)} fields, "
+          f"{snapshot.path.stat().st_size / 1e6:.1f} MB")
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
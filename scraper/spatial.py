@@ -0,0 +1,347 @@
+"""
+Spatial index over project coordinates
+Buckets projects into a fixed latitude/longitude grid stored as sorted flat
+arrays (cell keys, cell offsets, ids and coordinates), so bounding-box,
+radius and k-nearest queries only touch the cells around the query point.
+The index is saved as an .npz archive and reloaded without rebuilding.
+"""
+
+import bisect
+import json
+import logging
+import math
+import sys
+import zipfile
+from array import array
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+from .columnar import _npy_bytes, _read_npy
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+DEFAULT_INDEX_PATH = "scraped_data/spatial_index.npz"
+DEFAULT_CELL_SIZE = 0.05
+
+_ARRAYS = ('cell_keys', 'cell_starts', 'ids', 'latitudes', 'longitudes')
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _valid_point(lat, lon) -> bool:
+    return (lat is not None and lon is not None and lat == lat and lon == lon
+            and -90 <= lat <= 90 and -180 <= lon <= 180)
+
+
+class SpatialIndex:
+    """Grid index of project locations"""
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_size: float = DEFAULT_CELL_SIZE,
+                 metadata: Optional[Dict] = None):
+        """
+        Build the index
+
+        Args:
+            points: (project id, latitude, longitude) tuples; points with
+                missing or out-of-range coordinates are skipped
+            cell_size: Grid cell size in degrees (0.05 is roughly 5.5 km)
+            metadata: Extra information saved with the index
+        """
+        self.cell_size = cell_size
+        self.columns = math.ceil(360 / cell_size)
+        self.metadata = dict(metadata or {})
+
+        keyed = sorted((self._cell_key(lat, lon), project_id, lat, lon)
+                       for project_id, lat, lon in points if _valid_point(lat, lon))
+
+        self.cell_keys = array('q')
+        self.cell_starts = array('q')
+        self.ids = array('q', (p[1] for p in keyed))
+        self.latitudes = array('d', (p[2] for p in keyed))
+        self.longitudes = array('d', (p[3] for p in keyed))
+        for position, point in enumerate(keyed):
+            if not self.cell_keys or self.cell_keys[-1] != point[0]:
+                self.cell_keys.append(point[0])
+                self.cell_starts.append(position)
+        self.cell_starts.append(len(keyed))
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Dict], **kwargs) -> 'SpatialIndex':
+        """Build an index from project records"""
+        return cls(((p['id'], p.get('latitude'), p.get('longitude')) for p in projects), **kwargs)
+
+    @classmethod
+    def from_files(cls, files: Iterable[Path], workers: Optional[int] = None, **kwargs) -> 'SpatialIndex':
+        """Build an index from part files using the parallel loader"""
+        from .loader import iter_projects, source_signatures
+
+        files = list(files)
+        metadata = kwargs.pop('metadata', None) or {'source_files': source_signatures(files)}
+        projects = iter_projects(files, fields=('id', 'latitude', 'longitude'), workers=workers)
+        return cls.from_projects(projects, metadata=metadata, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _row_col(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = int((lat + 90) // self.cell_size)
+        col = int((lon + 180) // self.cell_size) % self.columns
+        return row, col
+
+    def _cell_key(self, lat: float, lon: float) -> int:
+        row, col = self._row_col(lat, lon)
+        return row * self.columns + col
+
+    def _cell_range(self, row: int, col: int) -> range:
+        key = row * self.columns + col
+        i = bisect.bisect_left(self.cell_keys, key)
+        if i == len(self.cell_keys) or self.cell_keys[i] != key:
+            return range(0)
+        return range(self.cell_starts[i], self.cell_starts[i + 1])
+
+    def _cells_in_box(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        min_row, min_col = self._row_col(max(min_lat, -90), min_lon)
+        max_row, max_col = self._row_col(min(max_lat, 90), max_lon)
+        if max_lon - min_lon >= 360 or (min_lon <= -180 and max_lon >= 180):
+            # lon 180 wraps to column 0, so a full span must not be read as a wrapped box
+            cols = range(self.columns)
+        elif min_col <= max_col:
+            cols = range(min_col, max_col + 1)
+        else:
+            cols = list(range(min_col, self.columns)) + list(range(0, max_col + 1))
+        for row in range(min_row, max_row + 1):
+            for col in cols:
+                yield row, col
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        """
+        Projects inside a bounding box (edges inclusive)
+
+        A box with min_lon > max_lon wraps across the antimeridian.
+
+        Returns:
+            Project ids
+        """
+        wraps = min_lon > max_lon
+        result = []
+        for row, col in self._cells_in_box(min_lat, min_lon, max_lat, max_lon):
+            for i in self._cell_range(row, col):
+                lat, lon = self.latitudes[i], self.longitudes[i]
+                in_lon = (lon >= min_lon or lon <= max_lon) if wraps else min_lon <= lon <= max_lon
+                if min_lat <= lat <= max_lat and in_lon:
+                    result.append(self.ids[i])
+        return result
+
+    def radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        Projects within a distance of a point
+
+        Returns:
+            (project id, distance in km) pairs, nearest first
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlon = min(180.0, dlat / cos_lat)
+        if dlon >= 180:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            min_lon = (lon - dlon + 180) % 360 - 180
+            max_lon = (lon + dlon + 180) % 360 - 180
+
+        result = []
+        for row, col in self._cells_in_box(lat - dlat, min_lon, lat + dlat, max_lon):
+            for i in self._cell_range(row, col):
+                distance = haversine_km(lat, lon, self.latitudes[i], self.longitudes[i])
+                if distance <= radius_km:
+                    result.append((self.ids[i], distance))
+        result.sort(key=lambda item: (item[1], item[0]))
+        return result
+
+    def nearest(self, lat: float, lon: float, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        The k projects closest to a point
+
+        Searches a box of grid cells around the point's cell, growing it
+        (1, 3, 7, 15, ... cells across) until the k-th closest point found is
+        nearer than anything outside the box can be. Rows are read nearest
+        first as runs of cell keys (two bisections each, so empty cells cost
+        nothing), and once k points are found, rows and columns further away
+        than the k-th of them are skipped.
+
+        Returns:
+            (project id, distance in km) pairs, nearest first
+        """
+        if k <= 0 or not len(self):
+            return []
+        center_row, center_col = self._row_col(lat, lon)
+        max_row = int(180 // self.cell_size)
+        best: List[Tuple[float, int]] = []
+
+        # Distance of the k-th best so far
+        limit = math.inf
+        searched, radius = -1, 0
+        while True:
+            # Rows nearest the point first, so the limit tightens early
+            for offset in range(radius + 1):
+                if (offset - 1) * self.cell_size * KM_PER_DEGREE > limit:
+                    break
+                for row in {center_row - offset, center_row + offset}:
+                    if not 0 <= row <= max_row:
+                        continue
+                    inner = searched if offset <= searched else -1
+                    outer = min(radius, self._reach(lat, limit))
+                    if outer <= inner:
+                        continue
+                    for i in self._annulus(row, center_col, inner, outer):
+                        if abs(self.latitudes[i] - lat) * KM_PER_DEGREE <= limit:
+                            distance = haversine_km(lat, lon, self.latitudes[i], self.longitudes[i])
+                            if distance <= limit:
+                                best.append((distance, self.ids[i]))
+                    if len(best) >= k:
+                        best.sort()
+                        del best[k:]
+                        limit = best[-1][0]
+
+            bound_km = self._outside_km(lat, lon, center_row, center_col, radius, max_row)
+            if bound_km is None or limit <= bound_km:
+                break
+            searched, radius = radius, radius * 2 + 1
+        best.sort()
+        return [(project_id, distance) for distance, project_id in best]
+
+    def _reach(self, lat: float, limit_km: float) -> int:
+        """Columns either side of a point's cell that can hold points within limit_km of it"""
+        cos_lat = math.cos(math.radians(lat))
+        if limit_km >= EARTH_RADIUS_KM * math.pi / 2 or math.sin(limit_km / EARTH_RADIUS_KM) >= cos_lat:
+            return self.columns
+        dlon = math.degrees(math.asin(math.sin(limit_km / EARTH_RADIUS_KM) / cos_lat))
+        return int(dlon // self.cell_size) + 1
+
+    def _annulus(self, row: int, col: int, inner: int, outer: int) -> Iterator[int]:
+        """Positions of the points in a row's columns col±outer but not col±inner"""
+        whole = 2 * outer + 1 >= self.columns
+        if inner >= 0 and 2 * inner + 1 >= self.columns:
+            return
+        if inner < 0:
+            spans = [(0, self.columns - 1)] if whole else [(col - outer, col + outer)]
+        elif whole:
+            spans = [(col + inner + 1, col - inner - 1 + self.columns)]
+        else:
+            spans = [(col - outer, col - inner - 1), (col + inner + 1, col + outer)]
+        base = row * self.columns
+        for first, last in spans:
+            first, last = first % self.columns, last % self.columns
+            pieces = [(first, last)] if first <= last else [(first, self.columns - 1), (0, last)]
+            for low, high in pieces:
+                start = bisect.bisect_left(self.cell_keys, base + low)
+                stop = bisect.bisect_right(self.cell_keys, base + high, start)
+                yield from range(self.cell_starts[start], self.cell_starts[stop])
+
+    def _outside_km(self, lat: float, lon: float, row: int, col: int, radius: int,
+                    max_row: int) -> Optional[float]:
+        """Lower bound on the distance to any point outside the box of cells row±radius, col±radius
+
+        Returns:
+            The bound in km, or None if the box covers the whole grid
+        """
+        bounds = []
+        lat_offset = (lat + 90) / self.cell_size - row
+        if row - radius > 0:
+            bounds.append((lat_offset + radius) * self.cell_size * KM_PER_DEGREE)
+        if row + radius < max_row:
+            bounds.append((1 - lat_offset + radius) * self.cell_size * KM_PER_DEGREE)
+        if 2 * radius + 1 < self.columns:
+            lon_offset = ((lon + 180) % 360) / self.cell_size - col
+            dlon = min(lon_offset + radius, 1 - lon_offset + radius) * self.cell_size
+            # Distance from the point to the meridian dlon degrees away
+            cross = math.cos(math.radians(lat)) * math.sin(math.radians(min(90.0, dlon)))
+            bounds.append(EARTH_RADIUS_KM * math.asin(min(1.0, cross)))
+        return min(bounds) if bounds else None
+
+    def save(self, path: str = DEFAULT_INDEX_PATH) -> Path:
+        """
+        Write the index as an .npz archive
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {'cell_size': self.cell_size, 'count': len(self), 'metadata': self.metadata}
+        tmp_path = path.with_name(path.name + '.tmp')
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as archive:
+            for name in _ARRAYS:
+                archive.writestr(f"{name}.npy", _npy_bytes(getattr(self, name)))
+            archive.writestr('index.json', json.dumps(header, ensure_ascii=False))
+        tmp_path.replace(path)
+        logger.info(f"Saved spatial index of {len(self)} projects to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> 'SpatialIndex':
+        """Load an index written by save()"""
+        with zipfile.ZipFile(path) as archive:
+            header = json.loads(archive.read('index.json'))
+            index = cls((), cell_size=header['cell_size'], metadata=header.get('metadata'))
+            for name in _ARRAYS:
+                setattr(index, name, _read_npy(archive.read(f"{name}.npy")))
+        return index
+
+    @classmethod
+    def load_or_build(cls, data_dir: str = "scraped_data", path: Optional[str] = None,
+                      workers: Optional[int] = None, **kwargs) -> 'SpatialIndex':
+        """
+        Load the saved index, rebuilding it if part files have changed
+
+        The index is rebuilt when it is missing, when it was built with
+        another cell_size, when the set of part files differs from the one it
+        was built from, or when any of them changed size or modification time
+        (loader.is_current).
+
+        Args:
+            data_dir: Directory holding the scraped part files
+            path: Index file (defaults to spatial_index.npz in data_dir)
+            workers: Number of parser processes used when rebuilding
+            **kwargs: Passed to the constructor when rebuilding (cell_size)
+
+        Returns:
+            The index
+        """
+        from .loader import find_part_files, is_current
+
+        path = Path(path) if path else Path(data_dir) / "spatial_index.npz"
+        files = find_part_files(data_dir)
+        if path.exists():
+            index = cls.load(path)
+            cell_size = kwargs.get('cell_size', DEFAULT_CELL_SIZE)
+            if index.cell_size != cell_size:
+                logger.info(f"{path} uses {index.cell_size} degree cells, rebuilding with {cell_size}")
+            elif is_current(path, files, index.metadata.get('source_files', [])):
+                return index
+
+        index = cls.from_files(files, workers=workers, **kwargs)
+        index.save(path)
+        return index
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m scraper.spatial <data_dir> [index_path]")
+        return
+
+    index = SpatialIndex.load_or_build(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Spatial index covers {len(index)} projects")
+
+
+if __name__ == "__main__":
+    main()
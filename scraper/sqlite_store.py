@@ -0,0 +1,345 @@
+"""
+SQLite project store for scraped DIME data
+Upserts project records into a local SQLite database keyed on `id`, with
+implementing offices, contractors, sources of funds and programs normalised
+into lookup tables and indexes on the fields used for filtering. Can be
+attached to DIMEScraper as an output sink so each page is written in one
+transaction as it arrives.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Sequence, Tuple, Any
+
+from .schema import FIELD_ORDER, ENTITY_FIELDS, ENTITY_LIST_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Scalar project fields stored as columns of the `projects` table
+SCALAR_FIELDS = tuple(f for f in FIELD_ORDER
+                      if f not in ENTITY_FIELDS and f not in ENTITY_LIST_FIELDS)
+
+# Entity list field -> (lookup table, link table, entity columns)
+ENTITY_TABLES = {
+    'implementingOffices': ('implementing_offices', 'project_implementing_offices',
+                            ('name', 'nameAbbreviation')),
+    'contractors': ('contractors', 'project_contractors',
+                    ('name', 'nameAbbreviation', 'logoUrl')),
+    'sourceOfFunds': ('funds', 'project_funds',
+                      ('name', 'nameAbbreviation')),
+}
+
+PROGRAM_COLUMNS = ('programName', 'nameAbbreviation', 'programDescription')
+
+INDEXED_FIELDS = ('status', 'regionCode', 'provinceCode', 'cityCode', 'cost',
+                  'dateStarted', 'contractCompletionDate', 'actualDateStarted',
+                  'lastUpdatedProjectCost')
+
+_COLUMN_TYPES = {
+    'id': 'INTEGER PRIMARY KEY', 'latitude': 'REAL', 'longitude': 'REAL',
+    'latestProgress': 'REAL', 'cost': 'REAL', 'utilizedAmount': 'REAL', 'zipCode': 'INTEGER',
+}
+
+
+def _schema_sql() -> List[str]:
+    columns = ',\n    '.join(f"{field} {_COLUMN_TYPES.get(field, 'TEXT')}" for field in SCALAR_FIELDS)
+    statements = [
+        f"""CREATE TABLE IF NOT EXISTS programs (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f'{c} TEXT' for c in PROGRAM_COLUMNS)}
+)""",
+        f"""CREATE TABLE IF NOT EXISTS projects (
+    {columns},
+    program_id INTEGER REFERENCES programs(id),
+    program_raw TEXT
+)""",
+    ]
+    for table, link, entity_columns in ENTITY_TABLES.values():
+        statements.append(f"""CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f'{c} TEXT' for c in entity_columns)}
+)""")
+        # One row per list position, so repeated entities survive; entities
+        # without an id are kept verbatim in entity_raw
+        statements.append(f"""CREATE TABLE IF NOT EXISTS {link} (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    entity_id INTEGER REFERENCES {table}(id),
+    entity_raw TEXT,
+    PRIMARY KEY (project_id, position)
+)""")
+        statements.append(f"CREATE INDEX IF NOT EXISTS idx_{link}_entity ON {link} (entity_id)")
+    for field in INDEXED_FIELDS:
+        statements.append(f"CREATE INDEX IF NOT EXISTS idx_projects_{field} ON projects ({field})")
+    statements.append("CREATE INDEX IF NOT EXISTS idx_projects_program ON projects (program_id)")
+    return statements
+
+
+class ProjectStore:
+    """Local SQLite database of projects, usable as a DIMEScraper sink"""
+
+    def __init__(self, path: str = "scraped_data/dime_projects.sqlite"):
+        """
+        Open (and create if needed) the project database
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            outdated = self._rename_outdated_links()
+            for statement in _schema_sql():
+                self.conn.execute(statement)
+            for link in outdated:
+                self.conn.execute(f"INSERT INTO {link} (project_id, position, entity_id) "
+                                  f"SELECT project_id, position, entity_id FROM {link}_old")
+                self.conn.execute(f"DROP TABLE {link}_old")
+
+    def _rename_outdated_links(self) -> List[str]:
+        """Move aside link tables created before they were keyed on list position"""
+        outdated = []
+        for _, link, _ in ENTITY_TABLES.values():
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({link})")]
+            if columns and 'entity_raw' not in columns:
+                logger.info(f"Migrating {link} to position-keyed links")
+                self.conn.execute(f"DROP INDEX IF EXISTS idx_{link}_entity")
+                self.conn.execute(f"ALTER TABLE {link} RENAME TO {link}_old")
+                outdated.append(link)
+        return outdated
+
+    def write(self, projects: List[Dict]):
+        """
+        Upsert a batch of projects (typically one API page) in one transaction
+
+        Records repeating an id in the batch are collapsed to the last one.
+
+        Args:
+            projects: Project records in the API's JSON shape
+        """
+        if not projects:
+            return
+        # A page can repeat an id (the API's ordering is unstable); the last copy wins
+        projects = list({project['id']: project for project in projects}.values())
+
+        placeholders = ', '.join('?' for _ in SCALAR_FIELDS)
+        updates = ', '.join(f"{f} = excluded.{f}" for f in SCALAR_FIELDS[1:])
+        project_sql = (f"INSERT INTO projects ({', '.join(SCALAR_FIELDS)}, program_id, program_raw) "
+                       f"VALUES ({placeholders}, ?, ?) "
+                       f"ON CONFLICT(id) DO UPDATE SET {updates}, program_id = excluded.program_id, "
+                       f"program_raw = excluded.program_raw")
+
+        programs = {}
+        entities = {field: {} for field in ENTITY_TABLES}
+        links = {field: [] for field in ENTITY_TABLES}
+        rows = []
+        for project in projects:
+            program = project.get('program')
+            program_id = program_raw = None
+            if program and program.get('id') is not None:
+                program_id = program['id']
+                programs[program_id] = tuple(program.get(c) for c in PROGRAM_COLUMNS)
+            elif program is not None:
+                # Placeholder programs without an id are kept verbatim
+                program_raw = json.dumps(program, ensure_ascii=False)
+            rows.append(tuple(project.get(f) for f in SCALAR_FIELDS) + (program_id, program_raw))
+            for field, (_, _, columns) in ENTITY_TABLES.items():
+                for position, entity in enumerate(project.get(field) or []):
+                    if entity.get('id') is None:
+                        links[field].append((project['id'], position, None,
+                                             json.dumps(entity, ensure_ascii=False)))
+                        continue
+                    entities[field][entity['id']] = tuple(entity.get(c) for c in columns)
+                    links[field].append((project['id'], position, entity['id'], None))
+
+        ids = [(project['id'],) for project in projects]
+        with self._lock, self.conn:
+            self._upsert_lookup('programs', PROGRAM_COLUMNS, programs)
+            for field, (table, link, columns) in ENTITY_TABLES.items():
+                self._upsert_lookup(table, columns, entities[field])
+            self.conn.executemany(project_sql, rows)
+            for field, (_, link, _) in ENTITY_TABLES.items():
+                self.conn.executemany(f"DELETE FROM {link} WHERE project_id = ?", ids)
+                self.conn.executemany(
+                    f"INSERT INTO {link} (project_id, position, entity_id, entity_raw) VALUES (?, ?, ?, ?)",
+                    links[field])
+
+    def _upsert_lookup(self, table: str, columns: Sequence[str], values: Dict[Any, Tuple]):
+        if not values:
+            return
+        updates = ', '.join(f"{c} = excluded.{c}" for c in columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} (id, {', '.join(columns)}) VALUES (?, {', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            [(key,) + row for key, row in values.items()])
+
+    def import_files(self, files: Iterable[Path], workers: Optional[int] = None) -> int:
+        """
+        Load existing JSON part files into the store
+
+        Args:
+            files: Part files to import
+            workers: Number of parser processes (see loader.iter_parts)
+
+        Returns:
+            Number of projects written
+        """
+        from .loader import iter_parts
+
+        total = 0
+        for part in iter_parts(files, workers=workers):
+            if part['error']:
+                logger.warning(f"Skipping {part['path']}: {part['error']}")
+                continue
+            self.write(part['projects'])
+            total += len(part['projects'])
+        logger.info(f"Imported {total} projects into {self.path.name}")
+        return total
+
+    def count(self) -> int:
+        """Number of projects in the store"""
+        return self.conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def query(self, where: str = "1=1", params: Sequence = (),
+              order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Fetch projects matching a SQL condition, rebuilt in the API's JSON shape
+
+        The `projects` table is aliased `p` and the program lookup `prog`.
+
+        Args:
+            where: SQL condition, e.g. "p.regionCode = ? AND p.cost > ?"
+            params: Parameters for the condition
+            order_by: SQL ORDER BY expression
+            limit: Maximum number of projects
+
+        Returns:
+            Matching project records
+        """
+        sql = (f"SELECT p.*, {', '.join(f'prog.{c} AS program_{c}' for c in PROGRAM_COLUMNS)} "
+               f"FROM projects p LEFT JOIN programs prog ON prog.id = p.program_id WHERE {where}")
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self.conn.execute(sql, tuple(params)).fetchall()
+            return self._to_projects(rows)
+
+    def find(self, status: Optional[str] = None,
+             region: Optional[str] = None,
+             region_code: Optional[str] = None,
+             province_code: Optional[str] = None,
+             city_code: Optional[str] = None,
+             program: Optional[str] = None,
+             min_cost: Optional[float] = None,
+             max_cost: Optional[float] = None,
+             started_after: Optional[str] = None,
+             limit: Optional[int] = None) -> List[Dict]:
+        """
+        Fetch projects by the common filters, most expensive first
+
+        Example: find(program="Flood Control Infrastructure",
+        region="CALABARZON", min_cost=1e9)
+
+        Returns:
+            Matching project records
+        """
+        conditions, params = [], []
+        for column, value in (('p.status', status), ('p.region', region),
+                              ('p.regionCode', region_code), ('p.provinceCode', province_code),
+                              ('p.cityCode', city_code), ('prog.programName', program)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if min_cost is not None:
+            conditions.append("p.cost >= ?")
+            params.append(min_cost)
+        if max_cost is not None:
+            conditions.append("p.cost <= ?")
+            params.append(max_cost)
+        if started_after is not None:
+            conditions.append("p.dateStarted >= ?")
+            params.append(started_after)
+        return self.query(' AND '.join(conditions) or "1=1", params,
+                          order_by="p.cost DESC", limit=limit)
+
+    def get(self, project_id: int) -> Optional[Dict]:
+        """Fetch one project by id"""
+        projects = self.query("p.id = ?", (project_id,))
+        return projects[0] if projects else None
+
+    def _to_projects(self, rows: List[sqlite3.Row]) -> List[Dict]:
+        """Rebuild project dicts (caller holds the lock)"""
+        if not rows:
+            return []
+        ids = [row['id'] for row in rows]
+        related = {field: self._related(field, ids) for field in ENTITY_TABLES}
+
+        projects = []
+        for row in rows:
+            program = json.loads(row['program_raw']) if row['program_raw'] else None
+            if row['program_id'] is not None:
+                program = {'id': row['program_id']}
+                program.update({c: row[f"program_{c}"] for c in PROGRAM_COLUMNS})
+            project = {}
+            for field in FIELD_ORDER:
+                if field == 'program':
+                    project[field] = program
+                elif field in ENTITY_TABLES:
+                    project[field] = related[field].get(row['id'], [])
+                else:
+                    project[field] = row[field]
+            projects.append(project)
+        return projects
+
+    def _related(self, field: str, ids: List[int]) -> Dict[int, List[Dict]]:
+        table, link, columns = ENTITY_TABLES[field]
+        result: Dict[int, List[Dict]] = {}
+        # Stay under SQLite's host parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT l.project_id, l.entity_raw, e.id, {', '.join(f'e.{c}' for c in columns)} "
+                f"FROM {link} l LEFT JOIN {table} e ON e.id = l.entity_id "
+                f"WHERE l.project_id IN ({', '.join('?' for _ in chunk)}) "
+                f"ORDER BY l.project_id, l.position", chunk).fetchall()
+            for row in rows:
+                if row['entity_raw'] is not None:
+                    entity = json.loads(row['entity_raw'])
+                else:
+                    entity = {'id': row['id']}
+                    entity.update({c: row[c] for c in columns})
+                result.setdefault(row['project_id'], []).append(entity)
+        return result
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield every project in id order, a batch at a time"""
+        last_id = None
+        while True:
+            where, params = ("p.id > ?", (last_id,)) if last_id is not None else ("1=1", ())
+            batch = self.query(where, params, order_by="p.id", limit=batch_size)
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1]['id']
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self) -> 'ProjectStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
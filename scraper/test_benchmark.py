@@ -0,0 +1,52 @@
+"""
+Tests for the benchmark harness (scraper.benchmark)
+"""
+
+import json
+
+import pytest
+
+from scraper.benchmark import fixture_projects, run_benchmark, synthetic_projects
+from scraper.partio import write_part_file
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    """Two part files of synthetic records, as a scrape would leave them"""
+    projects = synthetic_projects(30, seed=3)
+    write_part_file(tmp_path / "dime_projects_all_20250101_000000_part_1_of_2.json", {}, projects[:20])
+    write_part_file(tmp_path / "dime_projects_all_20250101_000000_part_2_of_2.json", {}, projects[20:])
+    return tmp_path
+
+
+def test_benchmark_reports_every_stage():
+    """The benchmark scrapes, saves and analyses everything the mock serves"""
+    report = run_benchmark(synthetic_projects(250, seed=1), per_page=50, concurrency=2,
+                           jitter=0.002, error_rate=0.05, retry_delay=0.01, records_per_file=100)
+
+    assert [r['stage'] for r in report['results']] == [
+        'scrape_all_projects', 'save_projects_to_json', 'analyze_scraped_data']
+    scrape, save, analyze = report['results']
+    assert scrape['complete'] and scrape['pages'] == 5 and scrape['requests'] >= 5
+    assert save['files'] == 3 and analyze['records'] == 250
+    assert all(r['seconds'] > 0 and r['records_per_sec'] for r in report['results'])
+    json.dumps(report)
+
+
+def test_synthetic_projects_are_reproducible():
+    """The same seed gives the same records, a different seed different ones"""
+    assert synthetic_projects(20, seed=5) == synthetic_projects(20, seed=5)
+    assert synthetic_projects(20, seed=5) != synthetic_projects(20, seed=6)
+
+
+def test_fixture_projects_replays_all_or_repeats_with_fresh_ids(fixture_dir, tmp_path_factory):
+    """Fixtures default to every record and are repeated with new ids beyond that"""
+    assert len(fixture_projects(str(fixture_dir))) == 30
+    assert len(fixture_projects(str(fixture_dir), 10)) == 10
+
+    projects = fixture_projects(str(fixture_dir), 75)
+    ids = [p['id'] for p in projects]
+    assert len(projects) == 75 and len(set(ids)) == 75
+
+    with pytest.raises(ValueError):
+        fixture_projects(str(tmp_path_factory.mktemp("empty")))
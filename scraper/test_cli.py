@@ -0,0 +1,84 @@
+"""
+Tests for the command-line entry point (scraper.cli)
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from scraper.cli import main as cli_main
+from scraper.mock_server import MockDIMEServer
+from scraper.snapshot import Snapshot
+
+
+@pytest.fixture
+def server():
+    """Mock API with 45 projects across three statuses, each with an update timestamp"""
+    statuses = ["Completed", "On-Going", "Not Yet Started"]
+    projects = [{'id': i, 'projectName': f"Project {i}", 'status': statuses[i % 3], 'cost': float(i * 1000),
+                 'lastUpdatedProjectCost': f"2025-01-{i % 28 + 1:02d} 00:00:00"}
+                for i in range(1, 46)]
+    with MockDIMEServer(projects) as server:
+        yield server
+
+
+def scrape_args(server, output_dir, *extra):
+    return ['scrape', '--base-url', server.base_url, '--output-dir', str(output_dir), '--rps', '1000', *extra]
+
+
+def test_import_is_lightweight(tmp_path):
+    """Importing the package neither imports requests nor creates a log file"""
+    code = ("import sys, scraper, scraper.analyze_data, scraper.cli; "
+            "assert 'requests' not in sys.modules, 'requests imported'")
+    subprocess.run([sys.executable, '-c', code], cwd=tmp_path, check=True,
+                   env={'PYTHONPATH': str(Path(__file__).parent.parent)})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cli_scrape_export_analyze_and_bench(tmp_path, server):
+    """The CLI scrapes, exports, analyses and replays the part files it wrote"""
+    assert cli_main(scrape_args(server, tmp_path, '--per-page', '20', '--records-per-file', '20')) == 0
+    assert len(list(tmp_path.glob("dime_projects_all_*_part_*"))) == 3
+    assert cli_main(['export', str(tmp_path), '--format', 'snapshot']) == 0
+    assert len(Snapshot(tmp_path / "dataset.snapshot")) == 45
+    assert cli_main(['analyze', str(tmp_path)]) == 0
+
+    # Logging is already configured here, so the log file must not be created
+    assert cli_main(['--log-file', str(tmp_path / "cli.log"), 'bench', '--fixtures', str(tmp_path),
+                     '--per-page', '20', '--output', str(tmp_path / "bench.json")]) == 0
+    assert not (tmp_path / "cli.log").exists()
+    # Every scraped record is replayed, and pages are counted as fetched
+    bench = json.loads((tmp_path / "bench.json").read_text())
+    assert bench['config']['records'] == 45 and bench['results'][0]['pages'] == 3
+
+
+def test_cli_scrape_several_statuses_keeps_separate_indexes(tmp_path, server):
+    """Each status gets its own prefix and incremental index, and --per-page is honoured"""
+    args = scrape_args(server, tmp_path, '--status', 'Completed', '--status', 'On-Going', '--per-page', '5')
+    assert cli_main(args) == 0
+    assert server.request_count == 6
+    for _ in range(2):
+        assert cli_main(args + ['--incremental']) == 0
+
+    assert sorted(p.name for p in tmp_path.glob(".*_index.json")) == [
+        ".dime_projects_completed_index.json", ".dime_projects_on-going_index.json"]
+    deltas = sorted(tmp_path.glob("*_delta_*.json"))
+    assert [json.loads(p.read_text())['metadata']['removed'] for p in deltas] == [0, 0]
+    with pytest.raises(SystemExit):
+        cli_main(args + ['--prefix', 'shared'])
+
+
+def test_cli_rejects_unknown_arguments(capsys):
+    with pytest.raises(SystemExit):
+        cli_main(['analyze', '--bogus'])
+    assert "unrecognized arguments: --bogus" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('command', ['bench', 'validate', 'search', 'rollup', 'history'])
+def test_cli_delegated_help_names_the_command(command, capsys):
+    with pytest.raises(SystemExit):
+        cli_main([command, '--help'])
+    assert capsys.readouterr().out.startswith(f"usage: python -m scraper {command} ")
@@ -0,0 +1,84 @@
+"""
+Tests for JSON decoding and schema validation (scraper.decoding)
+"""
+
+import json
+
+import pytest
+
+from scraper.decoding import (ProjectValidationError, available_backends, check_project,
+                              decode_projects, get_loads, get_typed_loads)
+from scraper.dime_scraper import DIMEScraper
+from scraper.mock_server import MockDIMEServer
+
+
+@pytest.fixture
+def page_projects():
+    """60 records shaped like an API page, two of them with type problems"""
+    projects = [{'id': i, 'projectName': f"Project {i}", 'status': "On-Going",
+                 'cost': float(i * 1000), 'latitude': 14.5, 'dateStarted': "2024-03-01T16:00:00.000Z",
+                 'implementingOffices': [{'id': 1, 'name': "DPWH NCR"}]}
+                for i in range(1, 61)]
+    projects[5]['dateStarted'] = "last year"
+    projects[7]['latitude'] = 7300
+    return projects
+
+
+PROBLEMS = [
+    ({'id': 1, 'cost': "1,000"}, "cost: expected a number"),
+    ({'id': 1, 'zipCode': 1.5}, "zipCode: expected an integer"),
+    ({'id': 1, 'longitude': -200.0}, "longitude: -200.0 is outside"),
+    ({'id': 1, 'status': 3}, "status: expected a string"),
+    ({'id': 1, 'dateStarted': "2024-13-01"}, "dateStarted: expected an ISO-8601 timestamp"),
+    ({'id': 1, 'program': "Flood Control"}, "program: expected an object"),
+    ({'id': 1, 'contractors': [{'name': "A"}, "B"]}, "contractors: expected an object"),
+    ({'cost': 1.0}, "id: missing"),
+]
+
+
+@pytest.mark.parametrize('record, problem', PROBLEMS)
+def test_check_project_reports_each_kind_of_problem(record, problem):
+    """Every field kind has its own check; nulls are always accepted"""
+    [error] = check_project(record)
+    assert error.startswith(problem)
+    assert check_project(dict.fromkeys(record, None) | {'id': 1}) == []
+
+
+def test_json_backends_and_schema_validation(tmp_path, page_projects):
+    """Every JSON backend decodes alike; validation flags bad records without dropping them"""
+    body = json.dumps({'data': page_projects}).encode('utf-8')
+    assert {backend: get_loads(backend)(body) == {'data': page_projects}
+            for backend in available_backends()} == dict.fromkeys(available_backends(), True)
+
+    with pytest.raises(ProjectValidationError) as raised:
+        decode_projects(body, validate=True)
+    assert len(raised.value.errors) == 2 and "dateStarted: expected an ISO-8601" in raised.value.errors[0]
+
+    with MockDIMEServer(page_projects) as server:
+        scraper = DIMEScraper(base_url=server.base_url, output_dir=str(tmp_path),
+                              requests_per_second=200, json_backend='json', validate=True)
+        scraped = scraper.scrape_all_projects(per_page=25)
+    assert len(scraped) == 60 and scraper.metrics.counter('invalid_records') == 2
+    # Decoding and validation are timed separately
+    assert scraper.metrics.histogram('decode_seconds').count == 3
+    assert scraper.metrics.histogram('validate_seconds').count == 3
+
+
+def test_typed_decoding_agrees_with_check_project(page_projects):
+    """msgspec validates while decoding, accepting exactly the records check_project accepts"""
+    pytest.importorskip("msgspec")
+    typed_loads = get_typed_loads()
+    valid = page_projects[:5] + [dict.fromkeys(page_projects[0], None) | {'id': 6}]
+    body = json.dumps({'data': valid, 'meta': {'total': 6}}).encode('utf-8')
+    assert typed_loads(body) == json.loads(body)
+    assert decode_projects(body, validate=True) == json.loads(body)
+
+    for record, _ in PROBLEMS:
+        assert typed_loads(json.dumps({'data': [record]})) is None
+    # Fields and members the schema does not know about are kept by falling back
+    assert typed_loads(json.dumps({'data': [{'id': 1, 'extra': 1}]})) is None
+    assert typed_loads(json.dumps({'data': [], 'links': {}})) is None
+    body = json.dumps({'data': page_projects}).encode('utf-8')
+    with pytest.raises(ProjectValidationError) as raised:
+        decode_projects(body, validate=True, backend='msgspec')
+    assert len(raised.value.errors) == 2
@@ -0,0 +1,65 @@
+"""
+Tests for the change history store (scraper.history)
+"""
+
+import json
+from datetime import date
+
+import pytest
+
+from scraper.dime_scraper import DIMEScraper
+from scraper.history import HistoryStore
+
+
+@pytest.fixture
+def projects():
+    """30 projects without latestProgress (so three tracked fields each, plus presence)"""
+    statuses = ["Completed", "On-Going", "Not Yet Started"]
+    return [{'id': i, 'projectName': f"Project {i}", 'status': statuses[i % 3],
+             'cost': float(i * 1000), 'utilizedAmount': float(i * 500)}
+            for i in range(1, 31)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    yield store
+    store.close()
+
+
+def test_history_ingests_part_file_runs_once(tmp_path, store, projects):
+    DIMEScraper(output_dir=str(tmp_path), records_per_file=20).save_projects_to_json(projects, prefix="all")
+    [first] = store.ingest(str(tmp_path))
+    assert first['projects'] == 30 and store.ingest(str(tmp_path)) == []
+
+
+def test_history_records_changes_and_answers_as_of(store, projects):
+    """Only changed values are stored; as-of lookups, time series and status changes follow the runs"""
+    store.ingest_projects(projects, "20250101_000000", "all")
+    second = [dict(p) for p in projects[1:]]
+    second[0].update(status="Completed", cost=5.0)
+    assert store.ingest_projects(second, "20991231_120000", "all")['changes'] == 3
+    store.ingest_projects([dict(p) for p in second] + [projects[0]], "21000101_000000", "all")
+
+    assert store.value_as_of(2, 'status', date(2099, 12, 30)) == "Not Yet Started"
+    assert store.value_as_of(2, 'status', "2099-12-31") == "Completed"
+    assert store.value_as_of(1, 'cost', "20991231_120000") is None
+    assert store.value_as_of(1, 'cost') == 1000.0
+    assert [c['value'] for c in store.history(2, 'cost')] == [2000.0, 5.0]
+    assert store.changed_between(end="20991231_120000") == [
+        {'id': 2, 'before': "Not Yet Started", 'after': "Completed"}]
+    assert store.changed_between() == []
+    assert store.stats() == {'runs': 3, 'projects': 30, 'changes': 30 * 4 + 3 + 1}
+
+
+def test_history_ingests_incremental_deltas(tmp_path, store, projects):
+    """A delta run records its updates and removals but not the projects it did not list"""
+    store.ingest_projects(projects, "20250101_000000", "all")
+    delta = tmp_path / "all_delta_20250102_000000.json"
+    delta.write_text(json.dumps({'metadata': {'scraped_at': "20250102_000000"}, 'inserted': [],
+                                 'updated': [dict(projects[4], cost=1.0)], 'removed': [6]}))
+    store.ingest_delta(delta)
+
+    assert store.value_as_of(5, 'cost') == 1.0
+    assert store.project_as_of(6) is None and store.project_as_of(6, "20250101_000000") is not None
+    assert store.value_as_of(7, 'cost') == 7000.0
@@ -0,0 +1,63 @@
+"""
+Tests for scraper run instrumentation (scraper.metrics)
+"""
+
+import json
+
+import pytest
+
+from scraper.dime_scraper import DIMEScraper
+from scraper.metrics import Histogram, ScrapeMetrics
+from scraper.mock_server import MockDIMEServer
+
+
+@pytest.fixture
+def projects():
+    """150 minimal records, three pages of 50"""
+    return [{'id': i, 'projectName': f"Project {i}", 'status': "Completed", 'cost': float(i)}
+            for i in range(1, 151)]
+
+
+def test_histogram_buckets_and_quantiles():
+    """Observations land in cumulative buckets; quantiles report bucket bounds"""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+    assert histogram.quantile(0.5) == 0.1 and histogram.quantile(1.0) == 3.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_scrape_metrics_hooks_and_exports(tmp_path, projects):
+    """Requests, retries, decode and write times are counted and exported"""
+    events = []
+    metrics = ScrapeMetrics(hooks=[lambda name, value, labels: events.append(name)])
+
+    with MockDIMEServer(projects) as server:
+        server.fail_pages = {2}
+        scraper = DIMEScraper(base_url=server.base_url, output_dir=str(tmp_path),
+                              records_per_file=100, requests_per_second=200, metrics=metrics)
+        result = scraper.scrape_to_files(per_page=50, max_retries=2, retry_delay=0.01)
+
+    assert not result['complete']
+    assert metrics.counter('requests') == 3 and metrics.counter('requests', status=500) == 2
+    assert metrics.counter('retries') == 1 and metrics.counter('failed_pages') == 1
+    assert metrics.counter('records') == 50 and metrics.counter('response_bytes') > 0
+    assert metrics.histogram('request_seconds').count == 3
+    assert metrics.histogram('decode_seconds').count == 1
+    assert {'requests', 'retries', 'rate_limit_wait_seconds', 'decode_seconds'} <= set(events)
+
+    prom = metrics.write(tmp_path / "metrics.prom").read_text()
+    assert 'dime_scraper_requests_total{status="500"} 2' in prom
+    assert 'dime_scraper_request_seconds_bucket{status="500",le="+Inf"} 2' in prom
+    assert 'dime_scraper_request_seconds_count{status="200"} 1' in prom
+    summary = json.loads(metrics.write(tmp_path / "metrics.json").read_text())
+    assert set(summary['time_breakdown']) == {'network', 'rate_limit', 'decode', 'validate', 'write'}
+
+
+def test_prometheus_label_values_are_escaped():
+    """Backslashes, quotes and newlines in label values are escaped, names and quoting are not"""
+    metrics = ScrapeMetrics()
+    metrics.inc('requests', status='Bad "gateway"\nC:\\proxy')
+    assert ('dime_scraper_requests_total{status="Bad \\"gateway\\"\\nC:\\\\proxy"} 1'
+            in metrics.to_prometheus())
@@ -0,0 +1,96 @@
+"""
+Tests for the data-quality validation stage (scraper.quality)
+"""
+
+import json
+
+import pytest
+
+from scraper.cli import main as cli_main
+from scraper.partio import write_part_file
+from scraper.quality import DataQualityValidator, QualityReport, validate_record
+
+
+@pytest.fixture
+def good_project():
+    """A record in Makati that passes every check"""
+    return {'id': 1, 'projectName': "Drainage Improvement", 'status': "On-Going",
+            'cost': 1000000.0, 'utilizedAmount': 250000.0, 'latestProgress': 25.0,
+            'latitude': 14.55, 'longitude': 121.02,
+            'dateStarted': "2024-01-15T00:00:00.000Z", 'contractCompletionDate': "2024-12-31T00:00:00.000Z",
+            'regionCode': '130000000', 'provinceCode': '137600000', 'cityCode': '137602000',
+            'barangayCode': '137602001', 'contractors': [{'id': 5, 'name': "ABC Builders"}]}
+
+
+@pytest.fixture
+def projects(good_project):
+    """62 records: five with injected problems, plus copies of ids 1 and 4"""
+    projects = [dict(good_project, id=i) for i in range(1, 61)]
+    projects[3]['latitude'] = 40.0
+    projects[7]['utilizedAmount'] = projects[7]['cost'] * 2
+    projects[11]['contractors'] = [{'id': 1, 'name': 'No Data Available'}]
+    projects[15]['barangayCode'] = '137501001'
+    projects[19]['latestProgress'] = 150.0
+    projects.append(dict(projects[0]))
+    projects.append(dict(projects[3]))
+    return projects
+
+
+@pytest.fixture
+def part_dir(tmp_path, projects):
+    for part in range(3):
+        write_part_file(tmp_path / f"dime_projects_all_part_{part + 1}_of_3.json", {},
+                        projects[part * 21:(part + 1) * 21])
+    return tmp_path
+
+
+@pytest.mark.parametrize('changes, check', [
+    ({'longitude': 130.5}, 'coordinates_outside_ph'),
+    ({'latitude': None}, 'missing_coordinates'),
+    ({'cost': 0.0}, 'nonpositive_cost'),
+    ({'utilizedAmount': -1.0}, 'negative_utilized'),
+    ({'contractCompletionDate': "2023-01-01T00:00:00.000Z"}, 'completion_before_start'),
+    ({'cityCode': '13760'}, 'code_format'),
+    ({'cityCode': '137404000'}, 'code_hierarchy'),
+    ({'contractors': [{'name': " n/a "}]}, 'placeholder_contractors'),
+    ({'cost': "1,000,000"}, 'schema'),
+])
+def test_validate_record_flags_each_problem(good_project, changes, check):
+    assert validate_record(good_project) == []
+    assert check in validate_record(dict(good_project, **changes))
+
+
+def test_code_hierarchy_allows_province_level_cities(good_project):
+    """Manila districts are coded under the city, which is coded like a province"""
+    manila = dict(good_project, provinceCode='133900000', cityCode='133900000', barangayCode='133901001')
+    assert validate_record(manila) == []
+
+
+def test_quality_validation_in_parallel_matches_sink(part_dir, projects):
+    """Part files checked across processes and pages checked as a sink give the same report"""
+    report = DataQualityValidator(max_examples=2).check_files(sorted(part_dir.glob("*.json")), workers=2)
+    counts = report.to_dict()['checks']
+    assert report.records == 62
+    assert {name: values['count'] for name, values in counts.items()} == {
+        'coordinates_outside_ph': 2, 'utilized_exceeds_cost': 1, 'code_hierarchy': 1,
+        'progress_out_of_range': 1, 'duplicate_id': 2, 'placeholder_contractors': 1}
+    assert counts['duplicate_id']['examples'] == [1, 4]
+    # The copy of project 4 is invalid on its own and is not counted twice
+    assert report.invalid_records == 6
+
+    sink = DataQualityValidator(max_examples=2)
+    for start in range(0, len(projects), 20):
+        sink.write(projects[start:start + 20])
+    assert sink.report.to_dict() == report.to_dict()
+
+
+def test_validate_command_writes_report_and_fails_on_errors(part_dir, tmp_path_factory):
+    report = DataQualityValidator().check_files(sorted(part_dir.glob("*.json")), workers=1)
+    assert cli_main(['validate', str(part_dir), '--workers', '1']) == 1
+    saved = json.loads((part_dir / "quality_report.json").read_text())
+    assert QualityReport.from_dict(saved).to_dict() == report.to_dict()
+
+    clean = tmp_path_factory.mktemp("clean")
+    write_part_file(clean / "dime_projects_all_part_1_of_1.json", {}, [{'id': 1, 'cost': 5.0,
+                                                                         'latitude': 14.0, 'longitude': 121.0}])
+    assert cli_main(['validate', str(clean)]) == 0
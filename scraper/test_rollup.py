@@ -0,0 +1,66 @@
+"""
+Tests for the precomputed rollup cube (scraper.rollup)
+"""
+
+import pytest
+
+from scraper.aggregate import ProjectTable
+from scraper.dime_scraper import DIMEScraper
+from scraper.rollup import RollupCube
+
+
+@pytest.fixture
+def funded_projects():
+    """90 projects split between two regions, every third also loan-funded"""
+    statuses = ["Completed", "On-Going", "Not Yet Started"]
+    return [{'id': i, 'projectName': f"Project {i}", 'status': statuses[i % 3],
+             'cost': float(i * 1000), 'utilizedAmount': float(i * 500),
+             'region': 'NCR' if i % 2 else 'CALABARZON',
+             'sourceOfFunds': [{'name': 'GAA FY 2024'}] + ([{'name': 'JICA Loan'}] if i % 3 == 0 else [])}
+            for i in range(1, 91)]
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return DIMEScraper(output_dir=str(tmp_path), records_per_file=50)
+
+
+def test_rollup_cube_matches_table(funded_projects):
+    """Cube slices equal ProjectTable results, including the multi-valued fund dimension"""
+    projects = funded_projects[:60]
+    cube = RollupCube.from_projects(projects)
+    table = ProjectTable.from_projects(projects)
+    for dims in (['region', 'status'], ['fundSource'], []):
+        expected = {tuple(g[d] for d in dims): (g['count'], g['cost']) for g in table.group_by(dims)}
+        assert {tuple(g[d] for d in dims): (g['count'], g['cost']) for g in cube.query(dims)} == expected
+    jica_ncr = [p for p in projects if p['id'] % 3 == 0 and p['region'] == 'NCR']
+    assert cube.total({'fundSource': 'JICA Loan', 'region': 'NCR'})['count'] == len(jica_ncr)
+    ncr = cube.drill_down('status', {'region': 'NCR'}, sort_by='cost')
+    assert [g['status'] for g in ncr] == ['Not Yet Started', 'Completed', 'On-Going']
+
+
+def test_rollup_cube_utilization_needs_reported_amounts(funded_projects):
+    """A group where no project reports utilizedAmount has no utilization, as in ProjectTable"""
+    for project in funded_projects[:10]:
+        project.update(region='BARMM', utilizedAmount=None)
+    [unreported] = RollupCube.from_projects(funded_projects).query(['region'], {'region': 'BARMM'})
+    assert unreported['utilization'] is None and unreported['utilizedAmount_mean'] is None
+
+
+def test_rollup_cube_upserts_and_removes(funded_projects):
+    """Rewriting a project moves its contribution; removing takes it back"""
+    cube = RollupCube.from_projects(funded_projects[:60])
+    cube.write([dict(funded_projects[0], cost=1.0, status='Completed')])
+    assert cube.remove([2, 999]) == 1
+    assert cube.total()['count'] == 59
+    assert cube.total()['cost'] == sum(p['cost'] for p in funded_projects[2:60]) + 1.0
+
+
+def test_rollup_cube_load_or_build_adds_new_files(tmp_path, writer, funded_projects):
+    """New part files are folded into the saved cube"""
+    writer.save_projects_to_json(funded_projects[:60], prefix="run1")
+    assert len(RollupCube.load_or_build(str(tmp_path))) == 60
+
+    writer.save_projects_to_json(funded_projects[60:], prefix="run2")
+    cube = RollupCube.load_or_build(str(tmp_path))
+    assert len(cube) == 90 and RollupCube.load(tmp_path / "rollup_cube.npz").total()['count'] == 90
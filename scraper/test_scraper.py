@@ -3,11 +3,26 @@ Test script to verify the DIME scraper works correctly
 This will fetch a small sample of data for testing
 """
 
+import json
 import sys
 from pathlib import Path
+
+import pytest
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scraper.dime_scraper import DIMEScraper
+from scraper.http_cache import ResponseCache
+from scraper.aggregate import ProjectTable
+from scraper.columnar import ColumnarFile
+from scraper.loader import discover_datasets, is_current, iter_projects, load_columns, new_part_files, source_signatures
+from scraper.mock_server import MockDIMEServer
+from scraper.search import SearchIndex
+from scraper.snapshot import Snapshot
+from scraper.partio import iter_records, manifest_path, read_manifest, write_part_file
+from scraper.models import ProjectDataset
+from scraper.spatial import SpatialIndex, haversine_km
+from scraper.sqlite_store import ProjectStore
+from scraper.transport import TransportResponse
 import logging
 
 logging.basicConfig(
@@ -26,7 +41,8 @@ def test_scraper():
     # Initialize scraper
     scraper = DIMEScraper(
         output_dir="test_data",
-        records_per_file=100  # Smaller files for testing
+        records_per_file=100,  # Smaller files for testing
+        cache=ResponseCache("test_data/.http_cache", ttl=600)  # Reruns replay from disk
     )
     
     # Test fetching a single page
@@ -54,6 +70,507 @@ def test_scraper():
         logger.error(f"❌ Error during test: {e}")
         return False
 
+def make_sample_projects(count=250):
+    """Build synthetic project records in the shape the DIME API returns"""
+    statuses = ["Completed", "On-Going", "Not Yet Started"]
+    return [
+        {
+            'id': i,
+            'projectName': f"Sample Project {i}",
+            'status': statuses[i % len(statuses)],
+            'cost': float(i * 1000),
+            'utilizedAmount': float(i * 500),
+        }
+        for i in range(1, count + 1)
+    ]
+
+def test_concurrent_scrape_against_mock(tmp_path):
+    """Concurrent page fetching returns every record in page order"""
+    projects = make_sample_projects()
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            concurrency=4,
+            requests_per_second=200
+        )
+        scraped = scraper.scrape_all_projects(per_page=20)
+    
+    expected = sorted(projects, key=lambda p: p['cost'], reverse=True)
+    assert [p['id'] for p in scraped] == [p['id'] for p in expected]
+    assert server.request_count == 13
+
+def test_scrape_to_files_streams_part_files(tmp_path):
+    """Streaming scrape writes the same part files save_projects_to_json would"""
+    projects = make_sample_projects()
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            records_per_file=100,
+            requests_per_second=200
+        )
+        result = scraper.scrape_to_files(per_page=30)
+    
+    assert result['total_projects'] == 250
+    assert [f.name.split('_part_')[1] for f in result['files']] == [
+        '001_of_003.json', '002_of_003.json', '003_of_003.json'
+    ]
+    
+    with open(result['files'][-1], encoding='utf-8') as f:
+        last = json.load(f)
+    assert last['metadata']['records_range'] == '201-250'
+    assert len(last['projects']) == 50
+
+def test_scrape_to_files_resumes_from_journal(tmp_path):
+    """A rerun after a failed page only fetches the pages not yet on disk"""
+    projects = make_sample_projects()
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            records_per_file=100,
+            requests_per_second=200
+        )
+        server.fail_pages = {6}
+        first = scraper.scrape_to_files(per_page=30, max_retries=2, retry_delay=0)
+        
+        assert not first['complete']
+        assert first['total_projects'] == 100
+        
+        server.fail_pages = set()
+        server.request_count = 0
+        second = scraper.scrape_to_files(per_page=30, max_retries=2, retry_delay=0)
+    
+    assert second['complete']
+    assert second['total_projects'] == 250
+    # Resumes at page 4 (records 91-120), the first page not fully on disk
+    assert server.request_count == 6
+    assert not list(tmp_path.glob('.*.journal.json'))
+    
+    ids = []
+    for part in second['files']:
+        with open(part, encoding='utf-8') as f:
+            ids.extend(p['id'] for p in json.load(f)['projects'])
+    assert ids == sorted(ids, reverse=True) == list(range(250, 0, -1))
+
+def test_scrape_incremental_emits_only_changes(tmp_path):
+    """Incremental scrape stops early and writes only changed projects"""
+    projects = make_sample_projects()
+    for project in projects:
+        project['lastUpdatedProjectCost'] = f"2025-01-01T00:00:{project['id'] % 60:02d}.{project['id']:03d}Z"
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            requests_per_second=200
+        )
+        first = scraper.scrape_incremental(per_page=25)
+        assert (first['inserted'], first['updated'], first['removed']) == (250, 0, 0)
+        
+        projects[10]['cost'] = 1.0
+        projects[10]['lastUpdatedProjectCost'] = "2025-06-01T00:00:00.000Z"
+        server.projects.append({'id': 999, 'status': 'Completed', 'cost': 5.0,
+                                'lastUpdatedProjectCost': "2025-06-02T00:00:00.000Z"})
+        second = scraper.scrape_incremental(per_page=25)
+        assert (second['inserted'], second['updated'], second['removed']) == (1, 1, 0)
+        assert second['pages_fetched'] == 2
+        
+        with open(second['delta_file'], encoding='utf-8') as f:
+            delta = json.load(f)
+        assert [p['id'] for p in delta['inserted']] == [999]
+        assert [p['id'] for p in delta['updated']] == [11]
+        
+        server.projects = [p for p in server.projects if p['id'] != 42]
+        third = scraper.scrape_incremental(per_page=25)
+        assert (third['inserted'], third['updated'], third['removed']) == (0, 0, 1)
+        assert third['pages_fetched'] == 10
+        
+        assert scraper.scrape_incremental(per_page=25)['pages_fetched'] == 2
+
+def test_scrape_incremental_does_not_stop_before_last_run_timestamp(tmp_path):
+    """Unchanged pages at the last run's newest timestamp do not end the crawl"""
+    projects = make_sample_projects(100)
+    for project in projects:
+        newest = project['id'] > 70
+        project['lastUpdatedProjectCost'] = "2025-06-01T00:00:00.000Z" if newest else \
+            f"2025-01-01T00:00:{project['id'] % 60:02d}.{project['id']:03d}Z"
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(base_url=server.base_url, output_dir=str(tmp_path), requests_per_second=200)
+        scraper.scrape_incremental(per_page=25)
+        # Updated at the same instant as 29 others, so it sorts onto page 2
+        projects[72]['cost'] = 1.0
+        result = scraper.scrape_incremental(per_page=25)
+    assert (result['inserted'], result['updated'], result['pages_fetched']) == (0, 1, 3)
+
+def test_adaptive_scrape_against_throttling_mock(tmp_path):
+    """Adaptive mode finds the capped page size and survives 429 responses"""
+    projects = make_sample_projects(2000)
+    
+    with MockDIMEServer(projects, max_per_page=250, requests_per_second=10) as server:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            concurrency=6,
+            requests_per_second=50,
+            adaptive=True
+        )
+        scraped = scraper.scrape_all_projects(retry_delay=0.1, max_retries=5)
+    
+    assert scraper.adaptive.page_size == 250
+    assert sorted(p['id'] for p in scraped) == list(range(1, 2001))
+
+def test_columnar_export_round_trip(tmp_path):
+    """Columnar copies of part files decode back to the original records"""
+    projects = make_sample_projects(150)
+    projects[0]['program'] = {'id': 10, 'programName': 'Flood Control Infrastructure'}
+    projects[0]['dateStarted'] = "2025-04-07T16:00:00.000Z"
+    
+    scraper = DIMEScraper(output_dir=str(tmp_path), records_per_file=100, columnar_format='npz')
+    scraper.save_projects_to_json(projects, prefix="dime_projects_all")
+    
+    npz_files = sorted(tmp_path.glob('*.npz'))
+    assert len(npz_files) == 2
+    
+    with ColumnarFile(npz_files[0]) as columns:
+        assert columns.metadata['records_range'] == '1-100'
+        assert columns.columns['status'] == 'category'
+        assert list(columns.iter_projects()) == [
+            {field: p.get(field) for field in columns.columns} for p in projects[:100]
+        ]
+
+def test_parquet_parts_share_one_schema(tmp_path):
+    """Parts with different null patterns read back as one table"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    
+    projects = make_sample_projects(40)
+    projects[0].update(dateStarted="2025-04-07T16:00:00.000Z", region="NCR",
+                       program={'id': 10, 'programName': 'Flood Control', 'nameAbbreviation': None,
+                                'programDescription': None},
+                       contractors=[{'id': 5, 'name': "ABC Builders", 'nameAbbreviation': "ABC", 'logoUrl': None}])
+    projects[25]['cost'] = "n/a"
+    
+    scraper = DIMEScraper(output_dir=str(tmp_path), records_per_file=20, columnar_format='parquet')
+    scraper.save_projects_to_json(projects, prefix="dime_projects_all")
+    (tmp_path / "parquet").mkdir()
+    for path in tmp_path.glob('*.parquet'):
+        path.rename(tmp_path / "parquet" / path.name)
+    
+    table = pq.read_table(tmp_path / "parquet")
+    assert table.num_rows == 40
+    assert str(table.schema.field('region').type) == 'dictionary<values=string, indices=int32, ordered=0>'
+    rows = sorted(table.to_pylist(), key=lambda row: row['id'])
+    assert rows[0]['contractors'] == projects[0]['contractors'] and rows[0]['program'] == projects[0]['program']
+    assert rows[0]['dateStarted'].year == 2025 and rows[1]['dateStarted'] is None
+    assert rows[25]['cost'] is None and rows[26]['cost'] == 27000.0
+
+
+def test_loader_discovers_and_loads_part_files(tmp_path):
+    """Part files are grouped by scrape run and loaded in order"""
+    projects = make_sample_projects(250)
+    scraper = DIMEScraper(output_dir=str(tmp_path), records_per_file=100)
+    scraper.save_projects_to_json(projects, prefix="dime_projects_all")
+    
+    datasets = discover_datasets(str(tmp_path))
+    assert len(datasets) == 1
+    assert datasets[0].is_complete and datasets[0].total_projects == 250
+    
+    files = datasets[0].files
+    assert [p['id'] for p in iter_projects(files, workers=2)] == list(range(1, 251))
+    
+    columns = load_columns(files, ['id', 'cost', 'status'], workers=1)
+    assert list(columns['id']) == list(range(1, 251))
+    assert sum(columns['cost']) == sum(p['cost'] for p in projects)
+    assert columns['status'][:3] == ['On-Going', 'Not Yet Started', 'Completed']
+
+def test_project_table_group_by():
+    """Grouped aggregates match a plain per-record computation"""
+    projects = make_sample_projects(90)
+    for project in projects:
+        project['region'] = 'NCR' if project['id'] % 2 else 'CALABARZON'
+        project['sourceOfFunds'] = [{'name': 'GAA FY 2024'}] + (
+            [{'name': 'JICA Loan'}] if project['id'] % 3 == 0 else [])
+    projects[0]['cost'] = None
+    
+    table = ProjectTable.from_projects(projects)
+    groups = table.group_by(['region', 'status'])
+    
+    assert sum(g['count'] for g in groups) == 90
+    ncr_completed = next(g for g in groups if g['region'] == 'NCR' and g['status'] == 'Completed')
+    expected = [p for p in projects if p['region'] == 'NCR' and p['status'] == 'Completed']
+    assert ncr_completed['count'] == len(expected)
+    assert ncr_completed['cost'] == sum(p['cost'] for p in expected)
+    assert ncr_completed['utilization'] == 0.5
+    
+    assert table.value_counts('fundSource') == [('GAA FY 2024', 90), ('JICA Loan', 30)]
+    assert table.group_by([])[0]['cost_mean'] == sum(p['cost'] or 0 for p in projects) / 89
+    
+    for project in projects[:10]:
+        project.update(region='BARMM', utilizedAmount=None)
+    [unreported] = [g for g in ProjectTable.from_projects(projects).group_by(['region']) if g['region'] == 'BARMM']
+    assert unreported['utilization'] is None and unreported['utilizedAmount_mean'] is None
+
+def test_sqlite_store_as_scrape_sink(tmp_path):
+    """Pages streamed to a ProjectStore sink can be queried back by filter"""
+    projects = make_sample_projects(120)
+    
+    with MockDIMEServer(projects) as server, ProjectStore(str(tmp_path / "dime.sqlite")) as store:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            requests_per_second=200,
+            sinks=[store]
+        )
+        scraper.scrape_to_files(per_page=50)
+        # Upserting the same records again must not duplicate them
+        store.write(projects[:10])
+        
+        assert store.count() == 120
+        stored = store.get(projects[7]['id'])
+        assert {k: stored[k] for k in projects[7]} == projects[7]
+        expensive = store.find(status='Completed', min_cost=projects[60]['cost'])
+        assert [p['id'] for p in expensive] == [
+            p['id'] for p in sorted(projects, key=lambda p: p['cost'], reverse=True)
+            if p['status'] == 'Completed' and p['cost'] >= projects[60]['cost']]
+
+def test_sqlite_store_round_trips_repeated_and_id_less_entities(tmp_path):
+    """An entity listed twice and one without an id come back exactly as written"""
+    office = {'id': 7, 'name': 'DPWH Region IV-A', 'nameAbbreviation': None}
+    project = dict(make_sample_projects(1)[0],
+                   implementingOffices=[office, {'id': 8, 'name': 'DPWH NCR', 'nameAbbreviation': None}, office],
+                   contractors=[{'name': 'No Data Available', 'nameAbbreviation': None, 'logoUrl': None},
+                                {'id': 3, 'name': 'ABC Builders', 'nameAbbreviation': 'ABC', 'logoUrl': None}])
+    with ProjectStore(str(tmp_path / "dime.sqlite")) as store:
+        store.write([project])
+        store.write([project])
+        stored = store.get(project['id'])
+    assert stored['implementingOffices'] == project['implementingOffices']
+    assert stored['contractors'] == project['contractors']
+
+def test_sqlite_store_collapses_repeated_ids_in_a_batch(tmp_path):
+    """A batch listing an id twice keeps the last copy instead of failing on the link table"""
+    office = {'id': 7, 'name': 'DPWH Region IV-A', 'nameAbbreviation': None}
+    first, second = make_sample_projects(2)
+    first['implementingOffices'] = [office]
+    with ProjectStore(str(tmp_path / "dime.sqlite")) as store:
+        store.write([first, second, dict(first, cost=1.0)])
+        assert store.count() == 2
+        stored = store.get(first['id'])
+    assert stored['cost'] == 1.0 and stored['implementingOffices'] == [office]
+
+def test_spatial_index_queries_match_linear_scan(tmp_path):
+    """Bounding-box, radius and nearest queries agree with a full scan"""
+    projects = make_sample_projects(400)
+    for project in projects:
+        project['latitude'] = 14.0 + (project['id'] * 37 % 100) / 50
+        project['longitude'] = 120.5 + (project['id'] * 53 % 100) / 50
+    projects[0]['latitude'] = None
+    
+    index = SpatialIndex.from_projects(projects, cell_size=0.1)
+    index = SpatialIndex.load(index.save(tmp_path / "spatial.npz"))
+    located = [p for p in projects if p['latitude'] is not None]
+    assert len(index) == len(located)
+    
+    assert sorted(index.bbox(14.5, 121.0, 15.0, 121.5)) == [
+        p['id'] for p in located
+        if 14.5 <= p['latitude'] <= 15.0 and 121.0 <= p['longitude'] <= 121.5]
+    
+    by_distance = sorted((haversine_km(14.6, 121.0, p['latitude'], p['longitude']), p['id'])
+                         for p in located)
+    assert [pid for pid, _ in index.radius(14.6, 121.0, 20)] == [
+        pid for d, pid in by_distance if d <= 20]
+    assert [pid for pid, _ in index.nearest(14.6, 121.0, k=7)] == [pid for _, pid in by_distance[:7]]
+    # A point far from every project, and k larger than the index
+    far = sorted((haversine_km(10.0, 125.0, p['latitude'], p['longitude']), p['id']) for p in located)
+    assert [pid for pid, _ in index.nearest(10.0, 125.0, k=5)] == [pid for _, pid in far[:5]]
+    assert len(index.nearest(10.0, 125.0, k=1000)) == len(located)
+    
+    # Changing the cell size rebuilds the saved index
+    scraper = DIMEScraper(output_dir=str(tmp_path / "data"), records_per_file=200)
+    scraper.save_projects_to_json(projects, prefix="run")
+    assert SpatialIndex.load_or_build(str(tmp_path / "data"), cell_size=0.1).cell_size == 0.1
+    assert SpatialIndex.load_or_build(str(tmp_path / "data")).cell_size == 0.05
+    assert SpatialIndex.load(tmp_path / "data" / "spatial_index.npz").cell_size == 0.05
+
+def test_spatial_index_whole_world_queries():
+    """A whole-world box and a radius spanning every longitude return every project"""
+    points = [(1, 14.6, 121.0), (2, -33.9, 151.2), (3, 51.5, -0.1), (4, 0.0, 180.0), (5, 10.0, -180.0)]
+    index = SpatialIndex(points, cell_size=0.25)
+    assert sorted(index.bbox(-90, -180, 90, 180)) == [1, 2, 3, 4, 5]
+    assert sorted(pid for pid, _ in index.radius(14.5, 121.0, 20000)) == [1, 2, 3, 4, 5]
+    assert sorted(index.bbox(-10, 179.0, 20, -179.0)) == [4, 5]
+
+def test_project_dataset_interns_entities(tmp_path):
+    """Compact records share entity objects and convert back to identical dicts"""
+    projects = make_sample_projects(30)
+    for project in projects:
+        project['implementingOffices'] = [{'id': 7, 'name': 'DPWH Region IV-A', 'nameAbbreviation': None}]
+        project['program'] = {'id': project['id'] % 2, 'programName': f"Program {project['id'] % 2}"}
+        project['region'] = 'CALABARZON'
+    scraper = DIMEScraper(output_dir=str(tmp_path), records_per_file=10)
+    scraper.save_projects_to_json(projects, prefix="compact")
+    
+    dataset = ProjectDataset.from_files(sorted(tmp_path.glob("compact_*.json")), workers=2)
+    
+    assert dataset.to_dicts() == projects
+    assert dataset[0].implementingOffices is dataset[29].implementingOffices
+    assert dataset[1].program is dataset[3].program
+    assert len(dataset.pool) == 3
+    assert dataset[4]['region'] == 'CALABARZON' and dataset[4].get('city') is None
+    assert ProjectTable.from_projects(dataset).value_counts('implementingOffice') == [('DPWH Region IV-A', 30)]
+
+def test_scrape_by_status_parallel_partitions_dedupe(tmp_path):
+    """Partitions run concurrently and overlapping ones are deduplicated on id"""
+    projects = make_sample_projects(120)
+    for project in projects:
+        project['region'] = 'NCR' if project['id'] % 2 else 'Region IV-A'
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(
+            base_url=server.base_url,
+            output_dir=str(tmp_path),
+            records_per_file=25,
+            requests_per_second=200
+        )
+        results = scraper.scrape_by_status(
+            statuses=[None, "Completed"],
+            partitions=[{'region': 'NCR'}, {'region': 'Region IV-A'}],
+            max_parallel=4
+        )
+    
+    assert [r['prefix'] for r in results] == [
+        "dime_projects_all_ncr", "dime_projects_all_region-iv-a",
+        "dime_projects_completed_ncr", "dime_projects_completed_region-iv-a"]
+    assert [r['total_projects'] for r in results] == [60, 60, 0, 0]
+    assert [r['duplicates_removed'] for r in results] == [0, 0, 20, 20]
+    
+    ids = [p['id'] for p in iter_projects(sorted(tmp_path.glob("*_part_*.json")))]
+    assert sorted(ids) == list(range(1, 121))
+
+def test_response_cache_replays_and_revalidates(tmp_path):
+    """Fresh pages come from disk, stale ones are revalidated with their ETag"""
+    projects = make_sample_projects()
+    cache_dir = tmp_path / "cache"
+    
+    with MockDIMEServer(projects) as server:
+        def scrape(cache):
+            scraper = DIMEScraper(base_url=server.base_url, output_dir=str(tmp_path),
+                                  requests_per_second=200, cache=cache)
+            return scraper.scrape_all_projects(per_page=50)
+        
+        first = scrape(ResponseCache(str(cache_dir)))
+        assert server.request_count == 5
+        
+        assert scrape(ResponseCache(str(cache_dir))) == first
+        assert server.request_count == 5
+        
+        stale = ResponseCache(str(cache_dir), ttl=0)
+        assert scrape(stale) == first
+        assert server.request_count == 10
+        assert server.not_modified_count == stale.revalidated == 5
+    
+    lru = ResponseCache(str(tmp_path / "lru"), max_bytes=25)
+    lru.put(server.base_url, {'page': 1}, b'0123456789')
+    lru.put(server.base_url, {'page': 2}, b'0123456789')
+    lru.get(server.base_url, {'page': 1})
+    lru.put(server.base_url, {'page': 3}, b'0123456789')
+    assert [lru.get(server.base_url, {'page': p}) is not None for p in (1, 2, 3)] == [True, False, True]
+
+def test_not_modified_without_cached_copy_is_fetched_again(tmp_path):
+    """A 304 the cache cannot answer is retried without validators"""
+    projects = make_sample_projects(20)
+    transport = MockDIMEServer(projects).transport()
+    send, sent = transport.get, []
+    
+    def get(url, params=None, headers=None, timeout=30):
+        sent.append(headers)
+        if len(sent) == 1:
+            return TransportResponse(304, {}, b'', url)
+        return send(url, params=params, headers=headers, timeout=timeout)
+    
+    transport.get = get
+    cache = ResponseCache(str(tmp_path / "cache"))
+    scraper = DIMEScraper(base_url="http://dime.test", output_dir=str(tmp_path), cache=cache, transport=transport)
+    assert len(scraper.fetch_projects(per_page=20)['data']) == 20
+    assert sent == [None, {'Cache-Control': 'no-cache'}]
+    assert cache.misses == 1 and scraper.metrics.counter('requests', status=304) == 1
+
+def test_compressed_part_files_round_trip(tmp_path):
+    """Compact, NDJSON and gzip part files load like the original JSON ones"""
+    projects = make_sample_projects(120)
+    
+    for file_format, compression in (('compact', None), ('ndjson', 'gzip'), ('compact', 'gzip')):
+        scraper = DIMEScraper(output_dir=str(tmp_path / f"{file_format}_{compression}"),
+                              records_per_file=50, file_format=file_format, compression=compression)
+        scraper.save_projects_to_json(projects)
+        
+        datasets = discover_datasets(str(scraper.output_dir))
+        assert len(datasets) == 1 and datasets[0].is_complete
+        assert datasets[0].total_projects == 120
+        assert list(iter_projects(datasets[0].files)) == projects
+    
+    assert datasets[0].files[0].name.endswith("_part_001_of_003.json.gz")
+    
+    # A failed write leaves neither a truncated file nor its temporary behind
+    target = tmp_path / "broken_part_001_of_001.ndjson.gz"
+    try:
+        write_part_file(target, {}, [{'id': 1, 'cost': object()}])
+    except TypeError:
+        pass
+    assert list(tmp_path.glob("*broken*")) == []
+
+def test_ndjson_scrape_writes_manifest_and_streams(tmp_path):
+    """NDJSON part files hold only records; their metadata lives in the manifest"""
+    projects = make_sample_projects(120)
+    
+    with MockDIMEServer(projects) as server:
+        scraper = DIMEScraper(base_url=server.base_url, output_dir=str(tmp_path),
+                              records_per_file=50, requests_per_second=200, file_format='ndjson')
+        result = scraper.scrape_to_files(per_page=40)
+    
+    files = result['files']
+    assert [f.name.endswith(f"_part_00{n}_of_003.ndjson") for n, f in enumerate(files, 1)] == [True] * 3
+    with open(files[0], encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == list(range(120, 70, -1))
+    
+    manifest = read_manifest(manifest_path(files[0]))
+    assert manifest['total_projects'] == 120 and manifest['total_files'] == 3
+    assert manifest['files'][files[2].name]['records_range'] == "101-120"
+    assert discover_datasets(str(tmp_path))[0].is_complete
+    assert [p['id'] for p in iter_records(files, fields=('id',))] == list(range(120, 0, -1))
+
+def test_part_file_signatures_detect_rewrites_and_survive_moves(tmp_path, monkeypatch):
+    """A part file rewritten with the same mtime is seen as changed; moving the directory is not"""
+    import os
+    import shutil
+    
+    scraper = DIMEScraper(output_dir=str(tmp_path / "data"), records_per_file=10)
+    scraper.save_projects_to_json(make_sample_projects(20), prefix="run")
+    files = sorted((tmp_path / "data").glob("run_*"))
+    recorded = source_signatures(files)
+    assert is_current(tmp_path / "x", files, recorded)
+    assert new_part_files(tmp_path / "x", files, recorded[:1]) == files[1:]
+    assert not is_current(tmp_path / "x", files, recorded[:1])
+    
+    # The spatial index is reused from a copy reached through a relative path
+    SpatialIndex.load_or_build(str(tmp_path / "data"))
+    shutil.copytree(tmp_path / "data", tmp_path / "moved", copy_function=shutil.copy2)
+    monkeypatch.chdir(tmp_path)
+    built = Path("moved/spatial_index.npz").stat().st_mtime_ns
+    SpatialIndex.load_or_build("moved")
+    assert Path("moved/spatial_index.npz").stat().st_mtime_ns == built
+    
+    stat = files[0].stat()
+    write_part_file(files[0], {}, make_sample_projects(9))
+    os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert new_part_files(tmp_path / "x", files, recorded) is None
+
+
 if __name__ == "__main__":
     success = test_scraper()
     
@@ -0,0 +1,77 @@
+"""
+Tests for the full-text search index (scraper.search)
+"""
+
+import os
+
+import pytest
+
+from scraper.dime_scraper import DIMEScraper
+from scraper.partio import write_part_file
+from scraper.search import SearchIndex, fold, tokenize
+
+
+@pytest.fixture
+def named_projects():
+    """40 projects; the first three carry accented, hyphenated and abbreviated names"""
+    projects = [{'id': i, 'projectName': f"Sample Project {i}", 'status': "Completed", 'cost': float(i)}
+                for i in range(1, 41)]
+    projects[0].update(projectName="Construction of Seawall, Barangay Poblacion, Santo Niño",
+                       description="Seawall protection works")
+    projects[1].update(projectName="Rehabilitation of Lapu-Lapu Drainage, Parañaque City")
+    projects[2].update(projectName="Road Widening", description="Road near the seawall of Sto. Nino Pob.")
+    return projects
+
+
+@pytest.fixture
+def index(named_projects):
+    return SearchIndex.from_projects(named_projects[:30])
+
+
+def test_tokenize_folds_accents_hyphens_and_abbreviations():
+    assert fold("Parañaque") == "paranaque"
+    assert tokenize("Lapu-Lapu, Sto. Niño of the Brgy.") == [
+        'lapu', 'lapu', 'lapulapu', 'sto', 'santo', 'nino', 'brgy', 'barangay']
+    assert tokenize(None) == []
+
+
+def test_search_ranks_and_folds(index):
+    """Name matches rank first; accents, abbreviations and prefixes are folded"""
+    assert [r['id'] for r in index.search("seawall")] == [1, 3]
+    assert [r['id'] for r in index.search("sto nino pob")] == [1, 3]
+    assert [r['id'] for r in index.search("paranaque lapulapu")] == [2]
+    assert [r['id'] for r in index.search("seaw")] == [1, 3]
+    assert index.search("seaw", prefix=False) == []
+    assert index.search("the of") == []
+
+
+def test_search_index_replaces_and_removes(index, named_projects):
+    """Re-adding an id replaces its postings; removed ids stop matching"""
+    index.add([dict(named_projects[2], projectName="Road Widening", description="")])
+    assert [r['id'] for r in index.search("seawall")] == [1]
+    assert index.remove([1, 999]) == 1 and index.search("seawall") == []
+
+
+def test_search_index_load_or_build_adds_new_files(tmp_path, named_projects):
+    """New part files are added to the saved index"""
+    writer = DIMEScraper(output_dir=str(tmp_path), records_per_file=25)
+    writer.save_projects_to_json(named_projects[:30], prefix="run1")
+    assert len(SearchIndex.load_or_build(str(tmp_path))) == 30
+
+    named_projects[35]['projectName'] = "Seawall Extension"
+    writer.save_projects_to_json(named_projects[30:], prefix="run2")
+    index = SearchIndex.load_or_build(str(tmp_path))
+    assert len(index) == 40 and [r['id'] for r in index.search("seawall")][0] == 36
+    assert len(SearchIndex.load(tmp_path / "search_index.npz").search("sample project", limit=None)) == 36
+
+
+def test_search_index_load_or_build_rebuilds_rewritten_files(tmp_path, named_projects):
+    """A part file rewritten in place, even with its old mtime, forces a rebuild"""
+    DIMEScraper(output_dir=str(tmp_path), records_per_file=20).save_projects_to_json(named_projects, prefix="run")
+    assert len(SearchIndex.load_or_build(str(tmp_path))) == 40
+
+    part = sorted(tmp_path.glob("run_*"))[0]
+    stat = part.stat()
+    write_part_file(part, {}, named_projects[1:20])
+    os.utime(part, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert len(SearchIndex.load_or_build(str(tmp_path))) == 39
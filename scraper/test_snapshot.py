@@ -0,0 +1,77 @@
+"""
+Tests for the memory-mapped dataset snapshot (scraper.snapshot)
+"""
+
+import os
+import pickle
+
+import pytest
+
+from scraper.dime_scraper import DIMEScraper
+from scraper.partio import write_part_file
+from scraper.snapshot import Snapshot, write_snapshot
+
+
+@pytest.fixture
+def projects():
+    """60 projects with the same fields; the first one has every kind of value set"""
+    projects = [{'id': i, 'projectName': f"Sample Project {i}", 'status': "Completed",
+                 'cost': float(i * 1000), 'latitude': 14.5, 'dateStarted': None, 'region': "CALABARZON",
+                 'contractors': [], 'description': None}
+                for i in range(1, 61)]
+    projects[0].update(latitude=None, dateStarted="2024-03-01T16:00:00.000Z", region="NCR",
+                       contractors=[{'name': 'ACME Builders'}], description="Seawall, Barangay Poblacion")
+    return projects
+
+
+@pytest.fixture
+def snapshot(tmp_path, projects):
+    snapshot = Snapshot(write_snapshot(projects[:50], tmp_path / "dataset.snapshot"))
+    yield snapshot
+    snapshot.close()
+
+
+def test_snapshot_round_trips_records(snapshot, projects):
+    """Records, per-row values and raw columns come back as written"""
+    assert len(snapshot) == 50 and list(snapshot) == projects[:50]
+    assert snapshot.get(1) == projects[0] and snapshot.get(999) is None
+    assert snapshot.value('contractors', snapshot.row_of(1)) == [{'name': 'ACME Builders'}]
+    assert sum(snapshot.raw('cost')) == sum(p['cost'] for p in projects[:50])
+
+
+def test_snapshot_pickles_by_path(snapshot):
+    copy = pickle.loads(pickle.dumps(snapshot))
+    assert copy.get(7, fields=['projectName']) == {'projectName': "Sample Project 7"}
+    copy.close()
+
+
+def test_snapshot_keeps_latest_record_per_id(tmp_path, projects):
+    snapshot = Snapshot(write_snapshot(projects[:3] + [dict(projects[1], cost=1.0)], tmp_path / "s"))
+    assert len(snapshot) == 3 and snapshot.get(2)['cost'] == 1.0
+    snapshot.close()
+
+
+def test_snapshot_load_or_build_rebuilds_when_stale(tmp_path, projects):
+    """New part files trigger a rebuild that includes their records"""
+    writer = DIMEScraper(output_dir=str(tmp_path), records_per_file=25)
+    writer.save_projects_to_json(projects[:50], prefix="run1")
+    Snapshot.load_or_build(str(tmp_path)).close()
+
+    writer.save_projects_to_json([dict(projects[1], cost=1.0)] + projects[50:], prefix="run2")
+    snapshot = Snapshot.load_or_build(str(tmp_path))
+    assert len(snapshot) == 60 and snapshot.get(2)['cost'] == 1.0
+    snapshot.close()
+
+
+def test_snapshot_load_or_build_rebuilds_rewritten_files(tmp_path, projects):
+    """A part file rewritten in place, even with its old mtime, forces a rebuild"""
+    DIMEScraper(output_dir=str(tmp_path), records_per_file=20).save_projects_to_json(projects[:40], prefix="run")
+    Snapshot.load_or_build(str(tmp_path)).close()
+
+    part = sorted(tmp_path.glob("run_*"))[0]
+    stat = part.stat()
+    write_part_file(part, {}, projects[1:20])
+    os.utime(part, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    snapshot = Snapshot.load_or_build(str(tmp_path))
+    assert len(snapshot) == 39 and snapshot.get(1) is None
+    snapshot.close()
@@ -0,0 +1,82 @@
+"""
+Tests for the HTTP transports (scraper.transport)
+"""
+
+import json
+
+import pytest
+
+from scraper.dime_scraper import DIMEScraper
+from scraper.mock_server import MockDIMEServer
+from scraper.transport import HttpxTransport, RequestsTransport, create_transport
+
+
+@pytest.fixture
+def projects():
+    """200 records, ten pages of 20"""
+    return [{'id': i, 'projectName': f"Road Project {i}", 'status': "Completed", 'cost': float(i * 1000)}
+            for i in range(1, 201)]
+
+
+@pytest.fixture
+def compressing_server(projects):
+    """Mock API on a local socket that gzips its responses"""
+    with MockDIMEServer(projects, compress=True) as server:
+        yield server
+
+
+def test_transport_keep_alive_and_compression(tmp_path, projects, compressing_server):
+    """Connections are reused and gzip is negotiated"""
+    scraper = DIMEScraper(base_url=compressing_server.base_url, output_dir=str(tmp_path),
+                          requests_per_second=200, concurrency=2)
+    assert len(scraper.scrape_all_projects(per_page=20)) == 200
+    gauges = scraper.metrics.gauges()
+    assert gauges['connections_opened'] <= 2 and gauges['connections_reused'] >= 8
+    # response_bytes counts the compressed bodies
+    assert scraper.metrics.counter('response_bytes') < len(json.dumps(projects)) / 2
+
+
+def test_httpx_transport_keep_alive_and_compression(tmp_path, projects, compressing_server):
+    """The httpx transport reuses its connections, decompresses gzip and counts connections"""
+    pytest.importorskip("httpx")
+    # The mock server speaks HTTP/1.1 only, and HTTP/2 would also need the h2 package
+    transport = HttpxTransport(pool_size=2, http2=False)
+    scraper = DIMEScraper(base_url=compressing_server.base_url, output_dir=str(tmp_path),
+                          requests_per_second=200, concurrency=2, transport=transport)
+    with transport:
+        assert scraper.scrape_all_projects(per_page=20) == sorted(projects, key=lambda p: -p['cost'])
+        stats = transport.stats()
+    assert stats['requests'] == 10 and 1 <= stats['connections_opened'] <= 2
+    assert stats['connections_reused'] == 10 - stats['connections_opened']
+    assert scraper.metrics.gauges()['connections_opened'] == stats['connections_opened']
+    # The body was gzipped on the wire
+    assert scraper.metrics.counter('response_bytes') < len(json.dumps(projects)) / 2
+
+
+def test_mock_transport_needs_no_socket(tmp_path, projects):
+    """MockTransport answers in process with the same pages"""
+    server = MockDIMEServer(projects, compress=True)
+    scraper = DIMEScraper(base_url="http://dime.test", output_dir=str(tmp_path),
+                          requests_per_second=200, transport=server.transport())
+    assert scraper.scrape_all_projects(per_page=50) == sorted(projects, key=lambda p: -p['cost'])
+    assert server.request_count == 4 and scraper.transport.stats()['requests'] == 4
+
+
+def test_requests_transport_resize_closes_replaced_pools(compressing_server):
+    """Growing the pool twice leaves only the current adapter's pools open, and counters survive"""
+    url = f"{compressing_server.base_url}/api/v1/projects"
+    with RequestsTransport(pool_size=2) as transport:
+        replaced = []
+        for pool_size in (20, 30):
+            transport.get(url)
+            replaced.append(transport.session.get_adapter(url))
+            transport.resize(pool_size)
+        transport.get(url)
+        assert all(len(adapter.poolmanager.pools) == 0 for adapter in replaced)
+        assert transport.session.get_adapter(url).poolmanager.connection_pool_kw['maxsize'] == 30
+        assert transport.stats()['requests'] == 3
+
+
+def test_create_transport_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        create_transport('curl')
@@ -0,0 +1,247 @@
+"""
+HTTP transports for DIMEScraper
+A transport sends the scraper's GET requests and returns a TransportResponse.
+RequestsTransport (the default) keeps a requests.Session whose keep-alive
+connection pool is sized to the scraper's concurrency and negotiates gzip
+(and brotli when installed) compression; HttpxTransport multiplexes every
+worker's requests over HTTP/2 connections when httpx is installed. Each
+transport reports how many connections it opened and how often an idle
+keep-alive connection was reused. Tests can pass mock_server.MockTransport
+to run without sockets.
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is optional
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    # urllib3 adds ",br" when brotli is installed and decodes either transparently
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class TransportResponse:
+    """Decoded response returned by every transport"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes,
+                 url: str = "", wire_bytes: Optional[int] = None):
+        """
+        Args:
+            status_code: HTTP status
+            headers: Response headers (looked up case-insensitively)
+            content: Body after content decoding
+            url: Final request URL
+            wire_bytes: Body size as transferred, before decompression
+                (defaults to len(content))
+        """
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+        self.wire_bytes = len(content) if wire_bytes is None else wire_bytes
+
+    def raise_for_status(self):
+        """
+        Raises:
+            requests.HTTPError: For 4xx and 5xx responses, with this response
+                as its `response` (so Retry-After can be read from it)
+        """
+        if self.status_code >= 400:
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise requests.HTTPError(f"{self.status_code} {kind} Error for url: {self.url}", response=self)
+
+
+class Transport(ABC):
+    """Interface implemented by all transports"""
+
+    pool_size = 1
+
+    @abstractmethod
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> TransportResponse:
+        """
+        Send a GET request
+
+        Raises:
+            requests.RequestException: If no response could be obtained
+        """
+
+    def resize(self, pool_size: int):
+        """Allow at least `pool_size` concurrent connections"""
+        self.pool_size = max(self.pool_size, pool_size)
+
+    def stats(self) -> Dict[str, int]:
+        """Connection counters: requests, connections_opened, connections_reused"""
+        return {}
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'Transport':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """requests.Session with a keep-alive pool sized for the scraper's workers"""
+
+    def __init__(self, pool_size: int = 10, headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            pool_size: Connections kept open per host; should be at least the
+                number of threads sending requests, or connections beyond it
+                are closed after each request instead of being reused
+            headers: Headers sent with every request (DEFAULT_HEADERS if omitted)
+        """
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        self.pool_size = 0
+        self._adapter: Optional[HTTPAdapter] = None
+        # Counters of replaced adapters, whose pools are closed
+        self._closed_requests = 0
+        self._closed_connections = 0
+        self.resize(max(10, pool_size))
+
+    def resize(self, pool_size: int):
+        if pool_size <= self.pool_size:
+            return
+        self.pool_size = pool_size
+        old, self._adapter = self._adapter, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        if old is not None:
+            sent, opened = self._pool_counts(old)
+            self._closed_requests += sent
+            self._closed_connections += opened
+            old.close()
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> TransportResponse:
+        response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        content = response.content
+        # urllib3 counts the bytes read from the socket, before decompression
+        wire_bytes = response.raw.tell() if response.raw is not None else None
+        return TransportResponse(response.status_code, response.headers, content,
+                                 response.url, wire_bytes or len(content))
+
+    @staticmethod
+    def _pool_counts(adapter: HTTPAdapter):
+        sent = opened = 0
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                sent += pool.num_requests
+                opened += pool.num_connections
+        return sent, opened
+
+    def stats(self) -> Dict[str, int]:
+        sent, opened = self._pool_counts(self._adapter)
+        sent += self._closed_requests
+        opened += self._closed_connections
+        return {'requests': sent, 'connections_opened': opened,
+                'connections_reused': max(0, sent - opened)}
+
+    def close(self):
+        self.session.close()
+
+
+class HttpxTransport(Transport):
+    """httpx client multiplexing concurrent requests over HTTP/2 (needs httpx[http2])"""
+
+    def __init__(self, pool_size: int = 10, headers: Optional[Dict[str, str]] = None,
+                 http2: bool = True):
+        """
+        Args:
+            pool_size: Maximum open connections (with HTTP/2, one connection
+                carries many concurrent requests)
+            headers: Headers sent with every request (DEFAULT_HEADERS if omitted)
+            http2: Negotiate HTTP/2 with servers that support it
+
+        Raises:
+            ValueError: If httpx is not installed
+        """
+        if httpx is None:
+            raise ValueError("HttpxTransport requires the httpx package (pip install 'httpx[http2]')")
+        self.http2 = http2
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        # httpx decodes gzip itself, and brotli only with the brotli package
+        self.headers['Accept-Encoding'] = ACCEPT_ENCODING.replace(',', ', ')
+        self.pool_size = max(10, pool_size)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections_opened = 0
+        self._client = self._new_client()
+
+    def _new_client(self):
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        return httpx.Client(http2=self.http2, limits=limits, headers=self.headers)
+
+    def resize(self, pool_size: int):
+        if pool_size > self.pool_size:
+            self.pool_size = pool_size
+            old, self._client = self._client, self._new_client()
+            old.close()
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> TransportResponse:
+        try:
+            response = self._client.get(url, params=params, headers=headers, timeout=timeout,
+                                        extensions={'trace': self._trace})
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+        with self._lock:
+            self._requests += 1
+        return TransportResponse(response.status_code, dict(response.headers), response.content,
+                                 str(response.url), response.num_bytes_downloaded)
+
+    def _trace(self, event_name: str, info: Dict[str, Any]):
+        # httpcore reports every new TCP connection, including reconnects
+        if event_name == 'connection.connect_tcp.complete':
+            with self._lock:
+                self._connections_opened += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'requests': self._requests, 'connections_opened': self._connections_opened,
+                    'connections_reused': max(0, self._requests - self._connections_opened)}
+
+    def close(self):
+        self._client.close()
+
+
+def create_transport(kind: str = 'requests', pool_size: int = 10, **kwargs) -> Transport:
+    """
+    Build a transport by name
+
+    Args:
+        kind: 'requests' or 'httpx' (HTTP/2)
+        pool_size: Connection pool size
+
+    Raises:
+        ValueError: For an unknown kind, or 'httpx' without httpx installed
+    """
+    if kind == 'requests':
+        return RequestsTransport(pool_size, **kwargs)
+    if kind == 'httpx':
+        return HttpxTransport(pool_size, **kwargs)
+    raise ValueError(f"Unknown transport '{kind}' (expected 'requests' or 'httpx')")
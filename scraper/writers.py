@@ -0,0 +1,225 @@
+"""
+Part-file writers for scraped DIME project data
+Streams project records to disk as they are fetched, closing a part file
+every `records_per_file` records so memory stays bounded to one part file.
+Parts are written through partio in any of its encodings (indented or
+compact JSON, or NDJSON with the run's metadata in a manifest), optionally
+gzip- or zstd-compressed, with an npz / Parquet copy next to each part when
+a columnar format is set. When the run ends with a different number of
+records than expected, the parts are renumbered and their metadata (and the
+manifest) patched.
+"""
+
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Callable
+
+from .columnar import export_columnar
+from .partio import part_suffix, read_part_file, remove_part_file, sidecar_path, write_part_file
+
+logger = logging.getLogger(__name__)
+
+
+class PartFileWriter:
+    """Rolling writer that splits a stream of projects into numbered part files"""
+
+    def __init__(self, output_dir: Path,
+                 prefix: str,
+                 records_per_file: int = 1000,
+                 base_url: str = "https://www.dime.gov.ph",
+                 timestamp: Optional[str] = None,
+                 expected_total: Optional[int] = None,
+                 existing_files: Optional[List[Path]] = None,
+                 on_part_written: Optional[Callable[[Path, int], None]] = None,
+                 columnar_format: Optional[str] = None,
+                 file_format: str = 'json',
+                 compression: Optional[str] = None,
+                 metrics=None):
+        """
+        Initialize the writer
+
+        Args:
+            output_dir: Directory to save JSON files
+            prefix: Prefix for output filenames
+            records_per_file: Number of records per JSON file
+            base_url: Source URL recorded in each file's metadata
+            timestamp: Timestamp used in filenames (defaults to now)
+            expected_total: Total number of records expected, used to number
+                files as `part_NNN_of_MMM` up front. If it turns out to be
+                wrong the files are renamed when the writer is closed.
+            existing_files: Full part files already written by an earlier,
+                interrupted run; new parts are numbered after them
+            on_part_written: Called with (filepath, total records written)
+                after each part file is closed
+            columnar_format: Also write each part as 'npz' or 'parquet'
+                (same name, different extension) with the same metadata
+            file_format: 'json' (indented, the default), 'compact' (JSON
+                without whitespace) or 'ndjson' (one project per line)
+            compression: 'gzip' or 'zstd' (needs zstandard) to compress
+                each part file as it is written
+            metrics: ScrapeMetrics that part-file write times and sizes are
+                recorded in
+        """
+        self.output_dir = Path(output_dir)
+        self.prefix = prefix
+        self.records_per_file = records_per_file
+        self.base_url = base_url
+        self.timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.expected_total = expected_total
+        self.files: List[Path] = list(existing_files or [])
+        self.total_written = len(self.files) * records_per_file
+        self.total_received = self.total_written
+        self.on_part_written = on_part_written
+        self.columnar_format = columnar_format
+        self.file_format = file_format
+        self.suffix = part_suffix(file_format, compression)
+        self.metrics = metrics
+        self._buffer: List[Dict] = []
+        self._closed = False
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def _num_files(self, total: int) -> int:
+        return max(1, (total + self.records_per_file - 1) // self.records_per_file)
+
+    def _filename(self, file_number: int, num_files: int) -> str:
+        return f"{self.prefix}_{self.timestamp}_part_{file_number:03d}_of_{num_files:03d}{self.suffix}"
+
+    def _metadata(self, chunk_size: int, file_number: int, start_idx: int,
+                  num_files: int, total_projects: int) -> Dict:
+        return {
+            'total_projects_in_file': chunk_size,
+            'file_number': file_number,
+            'total_files': num_files,
+            'records_range': f"{start_idx + 1}-{start_idx + chunk_size}",
+            'total_projects': total_projects,
+            'scraped_at': self.timestamp,
+            'source': 'DIME Philippines Dashboard',
+            'url': self.base_url
+        }
+
+    def _write_part(self, chunk: List[Dict]):
+        """Write one part file for the given chunk of records"""
+        file_number = len(self.files) + 1
+        start_idx = self.total_written
+        total = self.expected_total if self.expected_total is not None else start_idx + len(chunk)
+        num_files = self._num_files(max(total, start_idx + len(chunk)))
+
+        filepath = self.output_dir / self._filename(file_number, num_files)
+        metadata = self._metadata(len(chunk), file_number, start_idx, num_files, total)
+        self._write_file(filepath, metadata, chunk)
+
+        self.files.append(filepath)
+        self.total_written += len(chunk)
+        logger.info(f"Saved {len(chunk)} projects to {filepath.name}")
+
+        if self.on_part_written is not None:
+            self.on_part_written(filepath, self.total_written)
+
+    def _write_file(self, filepath: Path, metadata: Dict, chunk: List[Dict], rewrite: bool = False):
+        """Write a part file and its columnar copy, recording the time taken"""
+        started = time.perf_counter()
+        write_part_file(filepath, metadata, chunk, self.file_format)
+        self._write_columnar(filepath, chunk, metadata)
+        if self.metrics is not None:
+            self.metrics.observe('write_seconds', time.perf_counter() - started)
+            self.metrics.inc('written_bytes', filepath.stat().st_size)
+            if not rewrite:
+                self.metrics.inc('written_records', len(chunk))
+
+    def _write_columnar(self, filepath: Path, chunk: List[Dict], metadata: Dict):
+        """Write the columnar copy of a part file, if enabled"""
+        if self.columnar_format:
+            export_columnar(chunk, sidecar_path(filepath, f".{self.columnar_format}"),
+                            self.columnar_format, metadata)
+
+    def write(self, projects: List[Dict]):
+        """
+        Add projects to the stream, flushing every full part file to disk
+
+        Args:
+            projects: Project records (typically one API page)
+        """
+        if self._closed:
+            raise ValueError("write() called on a closed PartFileWriter")
+
+        self._buffer.extend(projects)
+        self.total_received += len(projects)
+        while len(self._buffer) >= self.records_per_file:
+            chunk = self._buffer[:self.records_per_file]
+            del self._buffer[:self.records_per_file]
+            self._write_part(chunk)
+
+    def close(self) -> List[Path]:
+        """
+        Flush any remaining records and finalize file numbering
+
+        Returns:
+            Paths of all part files written
+        """
+        if self._closed:
+            return self.files
+        self._closed = True
+
+        if self._buffer:
+            self._write_part(self._buffer)
+            self._buffer = []
+
+        self._finalize()
+        return self.files
+
+    def abort(self) -> List[Path]:
+        """
+        Stop writing without flushing the partially filled part file
+
+        Used when a scrape fails part-way: every closed part file stays on
+        disk and the buffered remainder is fetched again on resume.
+
+        Returns:
+            Paths of the part files written so far
+        """
+        if not self._closed:
+            self._closed = True
+            if self._buffer:
+                logger.info(f"Discarding {len(self._buffer)} buffered projects")
+            self._buffer = []
+        return self.files
+
+    def _finalize(self):
+        """Rename and patch metadata if the actual total differs from the expected one"""
+        num_files = len(self.files)
+        if not self.files:
+            return
+        if self.expected_total == self.total_written:
+            return
+
+        logger.info(f"Finalizing {num_files} part files ({self.total_written} projects)")
+        finalized = []
+        for file_number, filepath in enumerate(self.files, start=1):
+            # Only one part file is held in memory at a time
+            content = read_part_file(filepath)
+
+            metadata = content['metadata']
+            metadata['total_files'] = num_files
+            metadata['total_projects'] = self.total_written
+
+            target = self.output_dir / self._filename(file_number, num_files)
+            self._write_file(target, metadata, content['projects'], rewrite=True)
+            if target != filepath:
+                remove_part_file(filepath)
+                if self.columnar_format:
+                    sidecar_path(filepath, f".{self.columnar_format}").unlink(missing_ok=True)
+            finalized.append(target)
+
+        self.files = finalized
+
+    def __enter__(self) -> 'PartFileWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()